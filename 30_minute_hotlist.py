@@ -1,11 +1,18 @@
 import requests
+import sqlite3
 import time
+import tempfile
+from contextlib import closing
 from datetime import date
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, helpers
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
-import io
+
+# Point-in-time paging for the RPZ pull
+PIT_KEEP_ALIVE = '5m'
+PIT_CHUNK_SIZE = 1000
+RPZ_SPOOL_MAX_SIZE = 8 * 1024 * 1024  # Keep the RPZ in memory up to 8MB, then spill to disk
 
 def main(data, context):
     def iris_investigate_api(initial_hashes, fallback_hashes):
@@ -104,7 +111,7 @@ def main(data, context):
 
     time.sleep(3)    
 
-    def append_to_rpz(documents, drive_service):
+    def append_to_rpz(document_chunks, drive_service):
             # Google Drive folder ID where the rpz files will be stored
             folder_id = '1iVO1nYbcpMynXCBIBZRbmFDoV1QSeh3U'
 
@@ -118,61 +125,73 @@ def main(data, context):
             files_list = existing_files.get('files', [])
             file_id = files_list[0]['id'] if files_list else None
 
-            # RPZ generation
-            rpz_content = ''
-            for doc in documents:
-                if doc.get('visit_rank', float('inf')) >= 100000:  # If visit_rank is less than 100000, skip this domain
-                    domain = doc['domain']
-                    rpz_content += f'{domain} CNAME . ; Block\n'
-
-            if file_id:
-                # File already exists, append to it
-                existing_file = drive_service.files().get_media(fileId=file_id).execute()
-                existing_content = existing_file.decode('utf-8')
-
-                # Convert existing_content to a set (deduping in the process)
-                existing_lines = set(existing_content.split('\n'))
-
-                # Convert new rpz_content to a set (deduping in the process)
-                new_lines = set(rpz_content.split('\n'))
-
-                # Merge old and new sets
-                all_lines = existing_lines.union(new_lines)
-
-                # Convert back to string
-                new_content = '\n'.join(all_lines)
-
-                # RPZ Uploader
-                media = MediaIoBaseUpload(io.BytesIO(new_content.encode('utf-8')), mimetype='text/plain', resumable=True)
-                drive_service.files().update(fileId=file_id, media_body=media).execute()
-
-                print("Existing RPZ file in Google Drive appended with new content and deduped")
+            # The RPZ is assembled in a spooled temp file so large pulls spill to disk instead of RAM,
+            # and deduped against a temporary on-disk SQLite table rather than an in-memory set
+            with tempfile.SpooledTemporaryFile(max_size=RPZ_SPOOL_MAX_SIZE, mode='w+b') as rpz_file, \
+                    closing(sqlite3.connect('')) as seen_lines:
+                seen_lines.execute('CREATE TABLE line (text TEXT PRIMARY KEY) WITHOUT ROWID')
+
+                def write_once(line):
+                    if line and seen_lines.execute('INSERT OR IGNORE INTO line VALUES (?)', (line,)).rowcount:
+                        rpz_file.write(f'{line}\n'.encode('utf-8'))
+
+                if file_id:
+                    # Stream the existing file down in chunks, then copy its distinct lines over
+                    with tempfile.SpooledTemporaryFile(max_size=RPZ_SPOOL_MAX_SIZE, mode='w+b') as existing_file:
+                        downloader = MediaIoBaseDownload(existing_file, drive_service.files().get_media(fileId=file_id))
+                        done = False
+                        while not done:
+                            _, done = downloader.next_chunk()
+                        existing_file.seek(0)
+                        for line in existing_file:
+                            write_once(line.decode('utf-8').rstrip('\n'))
+
+                # RPZ generation, one chunk of Elasticsearch hits at a time
+                for documents in document_chunks:
+                    for doc in documents:
+                        if doc.get('visit_rank', float('inf')) >= 100000:  # If visit_rank is less than 100000, skip this domain
+                            write_once(f"{doc['domain']} CNAME . ; Block")
+
+                rpz_file.seek(0)
+                media = MediaIoBaseUpload(rpz_file, mimetype='text/plain', resumable=True)
+
+                if file_id:
+                    # File already exists, replace it with the appended and deduped content
+                    drive_service.files().update(fileId=file_id, media_body=media).execute()
+
+                    print("Existing RPZ file in Google Drive appended with new content and deduped")
+                else:
+                    # File does not exist, create new file
+                    file_metadata = {
+                        'name': filename,
+                        'parents': [folder_id]
+                    }
+                    drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+
+                    print("New RPZ file created in Google Drive with today's date")
+
+
+    def update_documents(es, document_chunks):
+        # Build update actions lazily so only one chunk of hits is held at a time
+        def generate_actions():
+            for documents in document_chunks:
+                for doc in documents:
+                    yield {
+                        '_op_type': 'update',
+                        '_index': 'inv_hot',
+                        '_id': doc['_id'],
+                        'doc': {'pulled': 'yes'},
+                        'doc_as_upsert': True
+                    }
+
+        updated = 0
+        for ok, item in helpers.streaming_bulk(es, generate_actions(), chunk_size=PIT_CHUNK_SIZE, raise_on_error=False):
+            if ok:
+                updated += 1
             else:
-                # File does not exist, create new file
-                media = MediaIoBaseUpload(io.BytesIO(rpz_content.encode('utf-8')), mimetype='text/plain', resumable=True)
-                file_metadata = {
-                    'name': filename,
-                    'parents': [folder_id]
-                }
-                drive_service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+                print(f"Failed to update document: {item}")
 
-                print("New RPZ file created in Google Drive with today's date")
-
-
-    def update_documents(es, documents):
-        # get document IDs
-        doc_ids = [doc['_id'] for doc in documents]
-
-        # Update the documents using _update API
-        for doc_id in doc_ids:
-            es.update(
-                index='inv_hot',
-                id=doc_id,
-                doc={'pulled': 'yes'},
-                doc_as_upsert=True
-            )
-
-        print("Documents updated with 'pulled' field")
+        print(f"{updated} documents updated with 'pulled' field")
 
     def query_elastic_cloud():
         # Elastic config
@@ -186,38 +205,60 @@ def main(data, context):
             basic_auth=(username, password)
         )
 
-        # Query the "hot_nod" index to fetch documents with pulled='no'
-        query = {"query": {"term": {"pulled": "no"}}}
-        result = es.search(
-            index="inv_hot",
-            body=query,
-            size=10000,  # Adjust the size as per your data volume
-            _source=["domain", "risk_score"]
-        )
+        # Open a point in time so every pass over "inv_hot" sees the same snapshot of pulled='no' documents
+        pit = es.open_point_in_time(index="inv_hot", keep_alive=PIT_KEEP_ALIVE)
+
+        return es, {'id': pit['id'], 'keep_alive': PIT_KEEP_ALIVE}
+
+    def iter_unpulled_documents(es, pit, chunk_size=PIT_CHUNK_SIZE):
+        """
+        Page through pulled='no' documents in the point in time with search_after,
+        yielding one chunk of {'_id', 'domain', 'risk_score'} dicts at a time.
+        """
+        query = {"term": {"pulled": "no"}}
+        search_after = None
+
+        while True:
+            params = {'search_after': search_after} if search_after else {}
+            result = es.search(
+                pit=pit,
+                query=query,
+                size=chunk_size,
+                sort=[{"_shard_doc": "asc"}],
+                _source=["domain", "risk_score"],
+                **params
+            )
+            # Elasticsearch may hand back a refreshed PIT id, always page with the latest one
+            pit['id'] = result.get('pit_id', pit['id'])
+
+            hits = result['hits']['hits']
+            if not hits:
+                return
 
-        # Extract the domain and risk_score values from the search results
-        documents = []
-        for hit in result['hits']['hits']:
-            doc_id = hit['_id']
-            domain = hit['_source']['domain']
-            risk_score = hit['_source']['risk_score']
-            documents.append({'_id': doc_id, 'domain': domain, 'risk_score': risk_score})
+            # Extract the domain and risk_score values from the search results
+            yield [
+                {'_id': hit['_id'], 'domain': hit['_source']['domain'], 'risk_score': hit['_source']['risk_score']}
+                for hit in hits
+            ]
 
-        return es, documents
+            search_after = hits[-1]['sort']
 
 
-    # Query Elasticsearch and retrieve documents
-    es, documents = query_elastic_cloud()
+    # Open a point in time over the documents that still need pulling
+    es, pit = query_elastic_cloud()
 
-    # Authenticate with Google Drive
-    credentials = service_account.Credentials.from_service_account_file('credentials.json')
-    drive_service = build('drive', 'v3', credentials=credentials)
+    try:
+        # Authenticate with Google Drive
+        credentials = service_account.Credentials.from_service_account_file('credentials.json')
+        drive_service = build('drive', 'v3', credentials=credentials)
 
-    # Export documents to CSV file in Google Drive
-    append_to_rpz(documents, drive_service)
+        # Stream documents into the RPZ file in Google Drive
+        append_to_rpz(iter_unpulled_documents(es, pit), drive_service)
 
-    # Update documents with 'pulled' field
-    update_documents(es, documents)
+        # Second pass over the same snapshot to update documents with 'pulled' field
+        update_documents(es, iter_unpulled_documents(es, pit))
+    finally:
+        es.close_point_in_time(id=pit['id'])
 
     print("All Operations Completed")
 
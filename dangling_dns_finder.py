@@ -1,8 +1,14 @@
 import requests
 import openpyxl
-import tldextract
 from datetime import datetime, timedelta
 import json
+import os
+import sys
+
+# The Public Suffix List trie and snapshot are shared with the bot (slack_bot/utils); a
+# standalone deployment copies public_suffix.py and public_suffix_list.dat next to this script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slack_bot', 'utils'))
+from public_suffix import load_public_suffixes
 
 # Constants
 API_KEY = 'dnsdb_api_key'
@@ -32,6 +38,7 @@ def fetch_dns_records(term, time_last_after=None):
     disqualified_records_set = set()
     offset = 0
     more_records_available = True
+    public_suffixes = load_public_suffixes()
 
     while more_records_available:
         url = f"{BASE_URL}^.*\\.*{term}.*\\.[^.]*\\..*$/ANY?limit={LIMIT}&offset={offset}&swclient={SWCLIENT}&version={VERSION}"
@@ -43,9 +50,9 @@ def fetch_dns_records(term, time_last_after=None):
         lines = response.text.strip().split("\n")
         batch_records = {json.loads(line)["obj"]["rrname"] for line in lines if "obj" in json.loads(line)}  # Use json.loads instead of eval
 
-        # Filter records using tldextract and separate qualified and disqualified
+        # Filter records on their registrable label (ICANN suffixes only, like tldextract) and separate qualified and disqualified
         for record in batch_records:
-            domain = tldextract.extract(record).domain
+            domain = public_suffixes.split(record, include_private=False).domain
             # Disqualify records that match the term or contain 'wildcard'
             if domain == term or 'wildcard' in record.lower():
                 disqualified_records_set.add(record)
@@ -1,5 +1,6 @@
+import argparse
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk, scan
+from elasticsearch.helpers import scan, streaming_bulk
 
 # Connect to Elastic Cloud
 elastic_cloud_id = "cloud"
@@ -7,54 +8,143 @@ username = "username"
 password = "password"
 index_name = "inv_hot"
 
-# Create Elasticsearch client
-es = Elasticsearch(
-    cloud_id=elastic_cloud_id,
-    basic_auth=(username, password)
-)
-
-# Query to fetch all documents
-query = {
-    "query": {
-        "match_all": {}
-    }
-}
-
-# Scroll through all documents
-documents = []
-for doc in scan(es, index=index_name, query=query):
-    documents.append(doc)
-
-# Group documents by 'domain'
-domains = {}
-for doc in documents:
-    domain = doc["_source"]["domain"]
-    if domain not in domains:
-        domains[domain] = []
-    domains[domain].append(doc)
-
-# Prepare documents for deletion
-docs_to_delete = []
-for domain, docs in domains.items():
-    if len(docs) > 1:
-        # Find the document(s) with the least amount of content
-        min_fields = float("inf")
-        docs_with_min_fields = []
-        for doc in docs:
-            num_fields = len(doc["_source"])
-            if num_fields < min_fields:
-                min_fields = num_fields
-                docs_with_min_fields = [doc]
-            elif num_fields == min_fields:
-                docs_with_min_fields.append(doc)
-
-        # Keep one document with the minimum fields
-        docs_to_delete.extend(docs_with_min_fields[:-1])
-
-# Delete duplicate documents
-actions = [{"_op_type": "delete", "_index": doc["_index"], "_id": doc["_id"]} for doc in docs_to_delete]
-success, _ = bulk(es, actions)
-
-print(f"Deleted {success} duplicate documents.")
+# Field the duplicates are grouped on
+DOMAIN_FIELD = "domain"
 
+# How many duplicated domains are resolved per round trip
+COMPOSITE_PAGE_SIZE = 500
+SCAN_PAGE_SIZE = 1000
+DELETE_CHUNK_SIZE = 1000
+PROGRESS_EVERY = 10000
 
+
+def iter_duplicated_domains(es, index, page_size=COMPOSITE_PAGE_SIZE):
+    """
+    Page through every domain with a composite terms aggregation and yield
+    lists of the domains that occur at least twice. Composite aggregations
+    don't accept min_doc_count, so the doc_count >= 2 filter is applied per page.
+    """
+    after_key = None
+    while True:
+        composite = {
+            "size": page_size,
+            "sources": [{"domain": {"terms": {"field": DOMAIN_FIELD}}}]
+        }
+        if after_key:
+            composite["after"] = after_key
+
+        result = es.search(
+            index=index,
+            size=0,
+            aggs={"domains": {"composite": composite}}
+        )
+        agg = result["aggregations"]["domains"]
+
+        duplicated = [bucket["key"]["domain"] for bucket in agg["buckets"] if bucket["doc_count"] >= 2]
+        if duplicated:
+            yield duplicated
+
+        after_key = agg.get("after_key")
+        if not after_key or not agg["buckets"]:
+            return
+
+
+def select_docs_to_delete(docs):
+    """
+    Find the document(s) with the least amount of content and
+    keep one of them, returning the rest for deletion.
+    """
+    min_fields = float("inf")
+    docs_with_min_fields = []
+    for doc in docs:
+        num_fields = len(doc["_source"])
+        if num_fields < min_fields:
+            min_fields = num_fields
+            docs_with_min_fields = [doc]
+        elif num_fields == min_fields:
+            docs_with_min_fields.append(doc)
+
+    # Keep one document with the minimum fields
+    return docs_with_min_fields[:-1]
+
+
+def iter_docs_to_delete(es, index, stats):
+    """
+    Fetch only the duplicated groups, one composite page at a time,
+    and yield the documents that should be removed.
+    """
+    for domains in iter_duplicated_domains(es, index):
+        groups = {}
+        query = {"query": {"terms": {DOMAIN_FIELD: domains}}}
+        for doc in scan(es, index=index, query=query, size=SCAN_PAGE_SIZE):
+            groups.setdefault(doc["_source"][DOMAIN_FIELD], []).append(doc)
+
+        for domain, docs in groups.items():
+            stats["domains"] += 1
+            for doc in select_docs_to_delete(docs):
+                yield domain, doc
+
+
+def delete_duplicates(es, index):
+    stats = {"domains": 0, "deleted": 0, "failed": 0}
+
+    # Build delete actions lazily so only one page of duplicates is in memory
+    actions = (
+        {"_op_type": "delete", "_index": doc["_index"], "_id": doc["_id"]}
+        for _, doc in iter_docs_to_delete(es, index, stats)
+    )
+
+    for ok, item in streaming_bulk(es, actions, chunk_size=DELETE_CHUNK_SIZE, raise_on_error=False):
+        if ok:
+            stats["deleted"] += 1
+        else:
+            stats["failed"] += 1
+            print(f"Failed to delete document: {item}")
+
+        processed = stats["deleted"] + stats["failed"]
+        if processed % PROGRESS_EVERY == 0:
+            print(f"Progress: {processed} deletes sent across {stats['domains']} duplicated domains...")
+
+    print(f"Deleted {stats['deleted']} duplicate documents across {stats['domains']} duplicated domains.")
+    if stats["failed"]:
+        print(f"Failed to delete {stats['failed']} documents.")
+
+
+def report_duplicates(es, index):
+    stats = {"domains": 0}
+    would_delete = 0
+    last_domain = None
+
+    for domain, doc in iter_docs_to_delete(es, index, stats):
+        if domain != last_domain:
+            print(f"{domain}:")
+            last_domain = domain
+        print(f"  would delete {doc['_index']}/{doc['_id']} ({len(doc['_source'])} fields)")
+        would_delete += 1
+
+        if would_delete % PROGRESS_EVERY == 0:
+            print(f"Progress: {would_delete} duplicates found across {stats['domains']} duplicated domains...")
+
+    print(f"Dry run: {would_delete} duplicate documents would be deleted across {stats['domains']} duplicated domains.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Remove duplicate domain documents from {index_name}.")
+    parser.add_argument("--index", default=index_name, help="Index to deduplicate")
+    parser.add_argument("--dry-run", action="store_true", help="Report the duplicates without deleting anything")
+    args = parser.parse_args()
+
+    # Create Elasticsearch client
+    es = Elasticsearch(
+        cloud_id=elastic_cloud_id,
+        basic_auth=(username, password)
+    )
+
+    if args.dry_run:
+        report_duplicates(es, args.index)
+    else:
+        delete_duplicates(es, args.index)
+
+
+if __name__ == "__main__":
+    main()
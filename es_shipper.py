@@ -1,5 +1,9 @@
 from elasticsearch import Elasticsearch, helpers
+import argparse
 import csv
+import json
+import os
+import time
 
 # Initialize the Elasticsearch client
 # Elasticsearch credentials
@@ -7,32 +11,135 @@ elastic_cloud_id = "cloud"
 username = "elastic_user"
 password = "elastic_password"
 
-# Connect to Elastic Cloud
-es = Elasticsearch(
-    cloud_id=elastic_cloud_id,
-    http_auth=(username, password)
-)
-
-# Check if index exists and create if it doesn't
-if not es.indices.exists(index='tld_parsed'):  # Change here
-    es.indices.create(index='tld_parsed')  # Change here
-
-# Read CSV file
-with open('C:\DomainTools Python\Last Mile Scripts\dissected_domains.csv', 'r') as f:
-    reader = csv.reader(f)
-    next(reader)  # Skip the header
-    data = [{'tld': row[0]} for row in reader]
-
-# Generate Elasticsearch actions
-actions = [
-    {
-        '_op_type': 'index',
-        '_index': 'tld_parsed',
-        '_source': item,
-    }
-    for item in data
-]
-
-# Bulk index the data
-helpers.bulk(es, actions)
+DEFAULT_INDEX = 'tld_parsed'
+# Without --columns or --use-header a CSV row ships as {'tld': <first column>}
+DEFAULT_COLUMNS = ['tld']
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_THREADS = 4
+PROGRESS_EVERY = 100000
 
+
+def read_csv(path, columns=None, use_header=False):
+    """
+    Lazily yield one dict per CSV row, keyed by columns (DEFAULT_COLUMNS if not
+    given), or by the header row if use_header is set. Extra row values are dropped.
+    """
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)  # The header row is always skipped
+        fields = header if use_header else (columns or DEFAULT_COLUMNS)
+        for row in reader:
+            yield dict(zip(fields, row))
+
+
+def read_ndjson(path):
+    """Lazily yield one dict per non-empty NDJSON line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return 'ndjson' if ext in ('.ndjson', '.jsonl', '.json') else 'csv'
+
+
+def generate_actions(records, index, id_field=None):
+    # Generate Elasticsearch actions one record at a time
+    for record in records:
+        action = {
+            '_op_type': 'index',
+            '_index': index,
+            '_source': record,
+        }
+        if id_field and record.get(id_field):
+            action['_id'] = record[id_field]
+        yield action
+
+
+def disable_refresh(es, index):
+    """Turn index refresh off for the load and return the previous setting."""
+    settings = es.indices.get_settings(index=index, name='index.refresh_interval')
+    previous = settings.get(index, {}).get('settings', {}).get('index', {}).get('refresh_interval')
+    es.indices.put_settings(index=index, settings={'index': {'refresh_interval': '-1'}})
+    return previous
+
+
+def restore_refresh(es, index, previous):
+    # None resets refresh_interval back to the cluster default
+    es.indices.put_settings(index=index, settings={'index': {'refresh_interval': previous}})
+    es.indices.refresh(index=index)
+
+
+def ship(es, path, index, file_format, chunk_size, threads, id_field=None, columns=None, use_header=False, toggle_refresh=True):
+    # Check if index exists and create if it doesn't
+    if not es.indices.exists(index=index):
+        es.indices.create(index=index)
+
+    if file_format == 'ndjson':
+        records = read_ndjson(path)
+    else:
+        records = read_csv(path, columns, use_header)
+    actions = generate_actions(records, index, id_field)
+
+    previous_refresh = disable_refresh(es, index) if toggle_refresh else None
+    sent = 0
+    failed = 0
+    start_time = time.time()
+    try:
+        # Bulk index the data across worker threads
+        for ok, item in helpers.parallel_bulk(es, actions, thread_count=threads, chunk_size=chunk_size, raise_on_error=False):
+            if ok:
+                sent += 1
+            else:
+                failed += 1
+                print(f"Failed to index document: {item}")
+
+            if (sent + failed) % PROGRESS_EVERY == 0:
+                elapsed = time.time() - start_time
+                print(f"Progress: {sent + failed} documents, {(sent + failed) / elapsed:.0f} docs/s")
+    finally:
+        if toggle_refresh:
+            restore_refresh(es, index, previous_refresh)
+
+    elapsed = time.time() - start_time
+    rate = (sent + failed) / elapsed if elapsed else 0
+    print(f"Indexed {sent} documents into {index} ({failed} failed) in {elapsed:.2f} seconds, {rate:.0f} docs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CSV or NDJSON file into an Elasticsearch index.")
+    parser.add_argument('path', help="CSV (first row is skipped as a header) or NDJSON file to ship")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help=f"Target index (default: {DEFAULT_INDEX})")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Input format, detected from the extension by default")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Documents per bulk request")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="Parallel bulk worker threads")
+    parser.add_argument('--columns', help="Comma-separated CSV field names, in column order (default: tld)")
+    parser.add_argument('--use-header', action='store_true', help="Name CSV fields after the header row instead of --columns")
+    parser.add_argument('--id-field', help="Record field to use as the document _id")
+    parser.add_argument('--keep-refresh', action='store_true', help="Leave index refresh enabled during the load")
+    args = parser.parse_args()
+
+    # Connect to Elastic Cloud
+    es = Elasticsearch(
+        cloud_id=elastic_cloud_id,
+        http_auth=(username, password)
+    )
+
+    ship(
+        es,
+        args.path,
+        args.index,
+        args.format or detect_format(args.path),
+        args.chunk_size,
+        args.threads,
+        id_field=args.id_field,
+        columns=args.columns.split(',') if args.columns else None,
+        use_header=args.use_header,
+        toggle_refresh=not args.keep_refresh
+    )
+
+
+if __name__ == '__main__':
+    main()
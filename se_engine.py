@@ -4,73 +4,126 @@ from elasticsearch import Elasticsearch, helpers, exceptions
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 import json
+import os
+import sys
+
+# The flattener is shared with the bot (slack_bot/utils); a standalone deployment
+# copies flatten_utils.py next to this script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slack_bot', 'utils'))
+from flatten_utils import flatten, ELASTIC_STYLE
+
+
+SE_ENGINE_ALIAS = 'se_engine'
+SE_ENGINE_TEMPLATE = 'se_engine'
+SE_ENGINE_ILM_POLICY = 'se_engine_rollover'
+# Backing indices keep the se_engine_YYYY.MM.DD prefix of the old hand-made daily
+# indices (plus the -00000N rollover counter), so se_engine_* patterns still match
+SE_ENGINE_INDEX_PREFIX = 'se_engine_'
+# Set to an ILM age such as '90d' to delete a backing index that long after it
+# rolls over. None (the default) keeps every index, as the daily indices were kept
+SE_ENGINE_RETENTION = None
+# Existing documents are looked up in this many of the newest backing indices
+# (today's and yesterday's after a daily rollover, the window ingest always checked)
+SE_ENGINE_LOOKUP_INDICES = 2
+
+def create_es_client():
+    return Elasticsearch(
+        cloud_id='elastic-id',
+        basic_auth=('user', 'password'),
+        request_timeout=30
+    )
+
+def setup_elasticsearch(es, mapping_file="se_engine_map.json"):
+    """
+    One-time provisioning for se_engine: an ILM policy that rolls the write index
+    over daily (and deletes it SE_ENGINE_RETENTION later, if that is set), a
+    composable index template carrying the mapping, and the first backing index
+    behind the se_engine alias. Safe to re-run.
+
+    The hand-made daily indices (se_engine_YYYY.MM.DD) from before the alias are
+    left as they are: still matched by se_engine_*, not members of the alias and
+    not managed by ILM. Retire one by deleting it once its data is not needed.
+    """
+    phases = {
+        "hot": {
+            "actions": {
+                "rollover": {"max_age": "1d", "max_primary_shard_size": "50gb"}
+            }
+        }
+    }
+    if SE_ENGINE_RETENTION:
+        phases["delete"] = {"min_age": SE_ENGINE_RETENTION, "actions": {"delete": {}}}
+    es.ilm.put_lifecycle(name=SE_ENGINE_ILM_POLICY, policy={"phases": phases})
+    print(f"ILM policy {SE_ENGINE_ILM_POLICY} created.")
+
+    with open(mapping_file, "r") as f:
+        mapping = json.load(f)
+
+    # A day of se_engine results fits comfortably in a single primary shard
+    es.indices.put_index_template(
+        name=SE_ENGINE_TEMPLATE,
+        index_patterns=[f"{SE_ENGINE_INDEX_PREFIX}*"],
+        priority=100,
+        template={
+            "settings": {
+                "number_of_shards": 1,
+                "number_of_replicas": 1,
+                "refresh_interval": "30s",
+                "index.lifecycle.name": SE_ENGINE_ILM_POLICY,
+                "index.lifecycle.rollover_alias": SE_ENGINE_ALIAS
+            },
+            "mappings": mapping
+        }
+    )
+    print(f"Index template {SE_ENGINE_TEMPLATE} created with predefined mapping.")
 
+    if es.indices.exists_alias(name=SE_ENGINE_ALIAS):
+        print(f"Alias {SE_ENGINE_ALIAS} already exists, skipping bootstrap index.")
+        return
 
-def batch_check_documents_exist(es, index_names, ids):
+    # Date math keeps the daily naming, e.g. se_engine_2024.03.20-000001
+    bootstrap_index = f"<{SE_ENGINE_INDEX_PREFIX}{{now/d{{yyyy.MM.dd}}}}-000001>"
+    es.indices.create(
+        index=bootstrap_index,
+        aliases={SE_ENGINE_ALIAS: {"is_write_index": True}}
+    )
+    print(f"Bootstrap index created behind alias {SE_ENGINE_ALIAS}.")
+
+def newest_backing_indices(es, count=SE_ENGINE_LOOKUP_INDICES):
+    """Names of the se_engine alias's backing indices, newest first by creation date."""
+    settings = es.indices.get_settings(index=SE_ENGINE_ALIAS, name='index.creation_date')
+    creation_dates = {
+        name: int(index_settings['settings']['index']['creation_date'])
+        for name, index_settings in settings.items()
+    }
+    return sorted(creation_dates, key=creation_dates.get, reverse=True)[:count]
+
+def find_owning_indices(es, ids, indices, chunk_size=1000):
     """
-    Check existence of multiple documents in given indices.
-    Returns a dictionary mapping each id to a boolean value indicating its existence.
+    Map each id that already has a document in one of indices (newest first) to
+    the index holding it, with one ids query per chunk_size ids. If an id is in
+    more than one, the newest index wins.
     """
-    body = []
-    for index_name in index_names:
-        for doc_id in ids:
-            body.append({"index": index_name})
-            body.append({"query": {"terms": {"_id": [doc_id]}}})
-    
-        responses = es.msearch(body=body)
-        existence_map = {}
-        for i, doc_id in enumerate(ids):
-            response = responses["responses"][i * len(index_names)]
-            
-            # Check if "hits" field exists in the response
-            if "hits" in response and "hits" in response["hits"] and response["hits"]["total"]["value"] > 0:
-                hits = response["hits"]["hits"]
-                existence_map[doc_id] = bool(hits)
-            else:
-                existence_map[doc_id] = False
-        else:
-            print(f"Unexpected response format for doc_id: {doc_id}.")
-            existence_map[doc_id] = False
-
-    
-    existence_map = {}
-    for i, doc_id in enumerate(ids):
-        hits = responses["responses"][i * len(index_names)]["hits"]["hits"]
-        existence_map[doc_id] = bool(hits)
-    return existence_map
-def get_index_name(base_name, offset_days=0):
-    """Return the index name with a specific date appended."""
-    date_str = (datetime.datetime.utcnow() - datetime.timedelta(days=offset_days)).strftime('%Y.%m.%d')
-    return f"{base_name}_{date_str}"
+    rank = {name: position for position, name in enumerate(indices)}
+    owners = {}
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        response = es.search(
+            index=','.join(indices),
+            query={"ids": {"values": chunk}},
+            source=False,
+            size=len(chunk) * len(indices)
+        )
+        for hit in response["hits"]["hits"]:
+            owner = owners.get(hit["_id"])
+            if owner is None or rank[hit["_index"]] < rank[owner]:
+                owners[hit["_id"]] = hit["_index"]
+    return owners
 
 def document_exists_in_index(es, index_name, document_id):
     """Check if a document with a specific ID exists in the given index."""
     return es.exists(index=index_name, id=document_id)
 
-def flatten_list_fields(data, parent_key=''):
-    """
-    Recursively flatten dictionary fields that have list values.
-    Example:
-        data = {"domain_risk": {"components": [{"name": "proximity"}, {"name": "threat_profile"}]}}
-        => {"domain_risk.components.name1": "proximity", "domain_risk.components.name2": "threat_profile"}
-    """
-    items = {}
-    for k, v in data.items():
-        new_key = f"{parent_key}.{k}" if parent_key else k
-        if isinstance(v, list):
-            for idx, item in enumerate(v, start=1):
-                if idx > 5:  # Only enumerate fields up to 5
-                    break
-                if isinstance(item, dict):
-                    items.update(flatten_list_fields(item, f"{new_key}{idx}"))
-                else:
-                    items[f"{new_key}{idx}"] = item
-        elif isinstance(v, dict):
-            items.update(flatten_list_fields(v, new_key))
-        else:
-            items[new_key] = v
-    return items
-
 def main(data, context):
     def iris_investigate_api(initial_hashes):
         api_key = 'dt_api'
@@ -133,15 +186,6 @@ def main(data, context):
         return results_list  # Return the overall results after processing all hashes
 
 
-    def remove_empty_or_none(d):
-        """Recursively remove dictionary entries where value is empty or None"""
-        if not isinstance(d, (dict, list)):
-            return d
-        if isinstance(d, list):
-            return [v for v in (remove_empty_or_none(v) for v in d) if v]
-        return {k: v for k, v in ((k, remove_empty_or_none(v)) for k, v in d.items()) if v}
-
-    
     initial_hashes = [ 'U2FsdGVkX181UzqXoY9jQx90iyvdOXFxVZCKgQ+9/kLQ1q2dXWUytrGSOGXvYjcpiE9FutyRTg0HTqZoW055YuG2Iyec+dHS/lLPXUcxvQ9BC83aXMkXx63qHrJPBI5I1VwyugJCqU3XexlHhon3fypDU3OlHqLhK/QhxyuI1XfBHoHF09vbRQ0ENgY7WG7S2jC/GaOGemdTiQ+qft2TTdhmlq363oSB7b8PZxb88ryd4ByZfjvkTLqkz06tA9RIKOin0062OvQbxy7jbrChVTzP0hZiy+sP/aeM567wGsse3IBRl3QrWCMR2+n+vePR', #90
                 'U2FsdGVkX1/8HaCfjMnv7+rwyMJWp2VN6Y4JTyWQCu2a56xqddQsil6puYNZ2LpS/VCXc2COmVnzdbLOjfMbqvimVSO2sEnrH324BXGHmDx1AGUCCUfYO3AOVP4xktCuWU2ATF/K3+lMZg6maDw6+QC0CstJ7/b5za1JbTnKzEcXkhgCAhKRMO/o+Vo4iUdGGhbJrqdamfAvyHWIokTGVXT5TusG2YPtbXoMpsQfuMYM2cmSZSr/FTVS4ZRVAL1/cUJwZAxKpA8X4OgzSrihLTViwLY+MxIdYkL7x1/MoLJ0nhCRIGjGqAnMFeCp2N4x', #91
                 'U2FsdGVkX1/djUIxM7Ncp0fbZbjOg/lMAMWQxHeIOQZSL+RXwx5opRa4nQlN9LWGFUKcM1cqJoN3YITwI0hJoYBTE1RHv6T4iXSFWChZzwOLcigc6Yfe5oapVs6qXYBaiPKq6pB0ZiadWRYDg2SDuKFskqnh/5fmoNw1yH9iQ9CA8GFl4NBqg9rZgAAj2ty9oRZM/kCGUAsMLeyPkAt4HjgrYoipNOno8k1ML/dnSRaM/ctCXhx6qZRs/ckealCAeQiF4SppANrDsr51PTC/gMThhDTWe/5EEHRcDs3xc6dNu9aN5DoLHhKW42uoW8s3', #92
@@ -187,27 +231,13 @@ def main(data, context):
 
     start_time = time.time()
 
-    index_name_today = get_index_name('se_engine')
-    index_name_yesterday = get_index_name('se_engine', offset_days=1)
-
-    es = Elasticsearch(
-        cloud_id='elastic-id',
-        basic_auth=('user', 'password'),
-        request_timeout=30
-    )
-
-
+    # Index creation, mapping and daily rollover are handled by `python se_engine.py setup`
+    es = create_es_client()
 
     def post_to_elasticsearch(results):
         if not results:  
             print("No results to post to Elasticsearch.")
             return
-        index_name_today = get_index_name('se_engine')
-        if not es.indices.exists(index=index_name_today):
-            with open("se_engine_map.json", "r") as f:
-                mapping = json.load(f)
-            es.indices.create(index=index_name_today, body={"mappings": mapping})
-            print(f"Index {index_name_today} created with predefined mapping.")
 
         unique_results = {}
         for result in results:
@@ -216,42 +246,35 @@ def main(data, context):
                 # This will ensure that for each domain, only the last document is kept
                 unique_results[domain] = result
 
-        actions = []
-        all_domains = list(unique_results.keys())
-
-        # Batch check for document existence in both today's and yesterday's index
-        existence_map_today = batch_check_documents_exist(es, [index_name_today], all_domains)
-        existence_map_yesterday = batch_check_documents_exist(es, [index_name_yesterday], all_domains)
+        # Bulk updates through the alias only reach the write index, so a domain
+        # already stored today or yesterday is updated in the index that holds it
+        owners = find_owning_indices(es, list(unique_results), newest_backing_indices(es))
 
+        actions = []
         for domain, result in unique_results.items():
-            cleaned_result = remove_empty_or_none(result)
-            flattened_result = flatten_list_fields(cleaned_result)
-            
-            # Check the existence maps to decide where to insert/update the document
-            if existence_map_today.get(domain):
-                actions.append({
-                    "_op_type": "update",
-                    "_index": index_name_today,
-                    "_id": domain,
-                    "doc": flattened_result
-                })
-            elif existence_map_yesterday.get(domain):
+            # Prune empty values and flatten to a.b1 keys in a single pass
+            flattened_result = flatten(result, ELASTIC_STYLE)
+
+            if domain in owners:
                 actions.append({
                     "_op_type": "update",
-                    "_index": index_name_yesterday,
+                    "_index": owners[domain],
                     "_id": domain,
-                    "doc": flattened_result
+                    "doc": flattened_result,
+                    "retry_on_conflict": 3
                 })
             else:
-                flattened_result['pulled'] = 'no' # Only set 'pulled' field for new documents
+                # New domains go to the write index; 'pulled' is only set on new documents
                 actions.append({
-                    "_op_type": "index",
-                    "_index": index_name_today,
+                    "_op_type": "update",
+                    "_index": SE_ENGINE_ALIAS,
                     "_id": domain,
-                    "_source": flattened_result
+                    "doc": flattened_result,
+                    "upsert": {**flattened_result, "pulled": "no"},
+                    "retry_on_conflict": 3
                 })
 
-        response, failed = helpers.bulk(es, actions)
+        response, failed = helpers.bulk(es, actions, raise_on_error=False)
         print(response)
         success = len(actions) - len(failed)
         print(f"Successfully indexed {success} documents. Failed to index {len(failed)} documents.")
@@ -267,5 +290,8 @@ def main(data, context):
     print(f"Script execution time: {end_time - start_time:.2f} seconds")
 
 if __name__ == '__main__':
-    main(None, None)
+    if len(sys.argv) > 1 and sys.argv[1] == 'setup':
+        setup_elasticsearch(create_es_client())
+    else:
+        main(None, None)
 
@@ -1,6 +1,13 @@
 import csv
+import os
+import sys
 
-#This is a simple tld and compound tld parser, should only be used on apex domains, will not work on fqdn. Used to parse tld's from NOD. 
+# The Public Suffix List trie and snapshot are shared with the bot (slack_bot/utils); a
+# standalone deployment copies public_suffix.py and public_suffix_list.dat next to this script
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slack_bot', 'utils'))
+from public_suffix import load_public_suffixes
+
+#This is a simple tld and compound tld parser, works on fqdns and compound tld apex domains using the bundled public suffix list (names with a single dot are skipped). Used to parse tld's from NOD. 
 
 def dissect_domains(filename):
     with open(filename, 'r') as file:
@@ -8,13 +15,14 @@ def dissect_domains(filename):
         next(reader)  # Skip the header
         domains = [row[0] for row in reader]  # Assumes domain is the first column
 
+    public_suffixes = load_public_suffixes()
     dissected_domains = []
     for domain in domains:
-        period_count = domain.count('.')
-        if period_count == 2:
-            dissected_domains.append(domain.split('.', 1)[1])
-        elif period_count >= 3:
-            dissected_domains.append(domain.split('.', 2)[2])
+        if domain.count('.') < 2:
+            continue
+        suffix = public_suffixes.public_suffix(domain)
+        if suffix:
+            dissected_domains.append(suffix)
 
     with open('dissected_domains.csv', 'w', newline='') as file:
         writer = csv.writer(file)
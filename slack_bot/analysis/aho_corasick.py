@@ -0,0 +1,190 @@
+# analysis/aho_corasick.py
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+class AhoCorasick:
+    """
+    Multi-term substring matcher. The automaton is compiled once per term set into
+    a full transition table (goto plus failure links folded in), so scanning a
+    string is a single dict lookup per character no matter how many terms there are.
+    """
+    __slots__ = ('terms', '_delta', '_out', '_fail', '_depth')
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: FrozenSet[str] = frozenset(terms)
+
+        # Trie of the terms
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[str, ...]] = [()]
+        depth = [0]
+        for term in sorted(self.terms):
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                    depth.append(depth[state] + 1)
+                state = nxt
+            out[state] = out[state] + (term,)
+
+        # Breadth-first pass: resolve failure links and fold them into the
+        # transition table, so scanning never has to walk fail chains
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+            out[state] = out[state] + tuple(t for t in out[f] if t not in out[state])
+            transitions = dict(delta[f])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[f].get(ch, 0)
+                transitions[ch] = nxt
+                queue.append(nxt)
+            delta[state] = transitions
+
+        self._delta = delta
+        self._out = out
+        self._fail = fail
+        self._depth = depth
+
+    def __len__(self):
+        return len(self.terms)
+
+    def with_terms(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> 'AhoCorasick':
+        """
+        Copy of the automaton with terms added and removed, recomputing only the
+        transitions and outputs the change touches. Rows are shared with this
+        automaton until they are modified, so it stays valid for anyone still
+        scanning with it. Removed terms leave their (now silent) states behind.
+        """
+        added = frozenset(added) - self.terms
+        removed = frozenset(removed) & self.terms
+
+        new = object.__new__(AhoCorasick)
+        new.terms = (self.terms - removed) | added
+        new._delta = list(self._delta)
+        new._out = list(self._out)
+        new._fail = list(self._fail)
+        new._depth = list(self._depth)
+        if added or removed:
+            new._update(sorted(added), removed)
+        return new
+
+    def _update(self, added: List[str], removed: FrozenSet[str]):
+        delta, out, fail, depth = self._delta, self._out, self._fail, self._depth
+        shared = len(delta)
+        owned = set()
+
+        # Failure tree: the states under s are exactly those whose string ends with s's
+        fail_children: List[List[int]] = [[] for _ in fail]
+        for state in range(1, len(fail)):
+            fail_children[fail[state]].append(state)
+
+        def fail_subtree(state):
+            states = []
+            stack = [state]
+            while stack:
+                state = stack.pop()
+                states.append(state)
+                stack.extend(fail_children[state])
+            return states
+
+        def row(state):
+            if state < shared and state not in owned:
+                delta[state] = dict(delta[state])
+                owned.add(state)
+            return delta[state]
+
+        for term in removed:
+            for state in fail_subtree(self._walk(term)):
+                out[state] = tuple(t for t in out[state] if t != term)
+
+        for term in added:
+            # Follow the part of the term already in the trie
+            state = 0
+            i = 0
+            while i < len(term):
+                nxt = delta[state].get(term[i], 0)
+                if depth[nxt] != depth[state] + 1:
+                    break
+                state = nxt
+                i += 1
+
+            for ch in term[i:]:
+                parent = state
+                state = len(delta)
+                length = depth[parent] + 1
+                f = delta[fail[parent]].get(ch, 0) if parent else 0
+                delta.append(dict(delta[f]))
+                out.append(out[f])
+                fail.append(f)
+                depth.append(length)
+                fail_children.append([])
+                fail_children[f].append(state)
+
+                # Every state ending with the parent's string now reaches the new
+                # state on ch, unless it already reaches something longer. Trie
+                # children reached that way get the new state as their failure link.
+                for s in fail_subtree(parent):
+                    target = delta[s].get(ch, 0)
+                    if depth[target] < length:
+                        row(s)[ch] = state
+                    elif target != state and depth[target] == depth[s] + 1 and depth[fail[target]] < length:
+                        fail_children[fail[target]].remove(target)
+                        fail[target] = state
+                        fail_children[state].append(target)
+
+            # Outputs stay ordered longest term first, as a fresh build orders them
+            for s in fail_subtree(state):
+                out[s] = tuple(sorted(out[s] + (term,), key=len, reverse=True))
+
+    def _walk(self, term: str) -> int:
+        """State reached by following term through the trie."""
+        delta = self._delta
+        state = 0
+        for ch in term:
+            state = delta[state][ch]
+        return state
+
+    def __contains__(self, term):
+        return term in self.terms
+
+    def find_all(self, text: str) -> List[str]:
+        """Every term that occurs in text, once each, in order of first occurrence."""
+        delta = self._delta
+        out = self._out
+        found = list(out[0])
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for term in out[state]:
+                    if term not in found:
+                        found.append(term)
+        return found
+
+    def search(self, text: str) -> bool:
+        """True if any term occurs in text, stopping at the first hit."""
+        delta = self._delta
+        out = self._out
+        if out[0]:
+            return True
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                return True
+        return False
+
+
+@lru_cache(maxsize=16)
+def build_matcher(terms: FrozenSet[str]) -> AhoCorasick:
+    """Compile (or reuse) the automaton for a term set."""
+    return AhoCorasick(terms)
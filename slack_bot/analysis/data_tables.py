@@ -0,0 +1,111 @@
+# analysis/data_tables.py
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+from analysis.aho_corasick import AhoCorasick
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+BRANDS_FILE = DATA_DIR / 'brands.csv'
+SUBSTITUTIONS_FILE = DATA_DIR / 'character_substitutions.txt'
+KNOWN_GOOD_LABELS_FILE = DATA_DIR / 'known_good_labels.txt'
+DATA_FILES = (BRANDS_FILE.name, SUBSTITUTIONS_FILE.name, KNOWN_GOOD_LABELS_FILE.name)
+
+DEFAULT_SUBSTITUTIONS = {
+    'a': {'4', '@'},
+    'i': {'1', '!'},
+    'o': {'0'},
+    'l': {'1', '|'},
+    's': {'5', '$'}
+}
+
+
+def load_terms(path) -> FrozenSet[str]:
+    """One lowercased term per line (brands.csv, known_good_labels.txt)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return frozenset(line.strip().lower() for line in f if line.strip())
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return frozenset()
+
+
+def load_substitutions(path=SUBSTITUTIONS_FILE) -> Dict[str, Set[str]]:
+    """Character -> lookalike substitutes, as written in character_substitutions.txt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {k: set(v) for k, v in json.load(f).items()}
+    except Exception as e:
+        print(f"Warning: Could not load substitutions file: {e}")
+        return {k: set(v) for k, v in DEFAULT_SUBSTITUTIONS.items()}
+
+
+class DataTables:
+    """
+    One consistent snapshot of the data directory, with the brand list already
+    compiled into an automaton. Snapshots are never modified: a reload builds a new
+    one, so a handler holding a snapshot sees the same tables until it is done.
+    """
+    __slots__ = ('brands', 'brand_matcher', 'substitutions', 'known_good_labels', 'version')
+
+    def __init__(self, brands: FrozenSet[str], brand_matcher: AhoCorasick, substitutions: Dict[str, Set[str]],
+                 known_good_labels: FrozenSet[str], version: Tuple):
+        self.brands = brands
+        self.brand_matcher = brand_matcher
+        self.substitutions = substitutions
+        self.known_good_labels = known_good_labels
+        self.version = version
+
+
+class DataDirectory:
+    """
+    Watched data directory. refresh() checks the files' modification times and
+    reloads only those that changed; added and removed brands are patched into the
+    existing automaton rather than recompiling it. The new snapshot replaces
+    .tables in a single assignment, so readers never see a half-updated set.
+    """
+
+    def __init__(self, path=DATA_DIR):
+        self.path = Path(path)
+        self.tables: Optional[DataTables] = None
+        self.refresh()
+
+    def _stamp(self, name: str):
+        try:
+            st = os.stat(self.path / name)
+            return name, st.st_mtime_ns, st.st_size
+        except OSError:
+            return name, None, None
+
+    def refresh(self) -> bool:
+        """Reload changed files; True if a new snapshot was installed."""
+        version = tuple(self._stamp(name) for name in DATA_FILES)
+        old = self.tables
+        if old is not None and old.version == version:
+            return False
+        changed = [stamp[0] for i, stamp in enumerate(version) if old is None or old.version[i] != stamp]
+
+        if old is None:
+            brands = load_terms(self.path / BRANDS_FILE.name)
+            brand_matcher = AhoCorasick(brands)
+        elif BRANDS_FILE.name in changed:
+            brands = load_terms(self.path / BRANDS_FILE.name)
+            brand_matcher = old.brand_matcher.with_terms(brands - old.brands, old.brands - brands)
+        else:
+            brands, brand_matcher = old.brands, old.brand_matcher
+
+        if old is None or SUBSTITUTIONS_FILE.name in changed:
+            substitutions = load_substitutions(self.path / SUBSTITUTIONS_FILE.name)
+        else:
+            substitutions = old.substitutions
+
+        if old is None or KNOWN_GOOD_LABELS_FILE.name in changed:
+            known_good_labels = load_terms(self.path / KNOWN_GOOD_LABELS_FILE.name)
+        else:
+            known_good_labels = old.known_good_labels
+
+        self.tables = DataTables(brands, brand_matcher, substitutions, known_good_labels, version)
+        if old is not None:
+            print(f"Reloaded {', '.join(changed)} from {self.path} ({len(brands)} brands)")
+        return True
@@ -1,32 +1,18 @@
 # analysis/detections.py
 
-import json
 from typing import List, Tuple, Dict, Set
-from pathlib import Path
 from functools import lru_cache
 import jellyfish
 import unicodedata
 import idna
+from analysis.aho_corasick import AhoCorasick
+from analysis.data_tables import SUBSTITUTIONS_FILE, load_substitutions
 
 class DetectionMethods:
-    def _initialize_substitutions(self) -> Dict[str, Set[str]]:
+    def _initialize_substitutions(self, basic_subs: Dict[str, Set[str]] = None) -> Dict[str, Set[str]]:
         """Initialize character substitution mappings from file without using confusables."""
-        try:
-            script_dir = Path(__file__).parent
-            subs_file = script_dir / 'character_substitutions.txt'
-            
-            with open(subs_file, 'r', encoding='utf-8') as f:
-                basic_subs = json.load(f)
-            basic_subs = {k: set(v) for k, v in basic_subs.items()}
-        except Exception as e:
-            print(f"Warning: Could not load substitutions file: {e}")
-            basic_subs = {
-                'a': {'4', '@'},
-                'i': {'1', '!'},
-                'o': {'0'},
-                'l': {'1', '|'},
-                's': {'5', '$'}
-            }
+        if basic_subs is None:
+            basic_subs = load_substitutions(SUBSTITUTIONS_FILE)
         
         complete_subs = {}
         for char, substitutes in basic_subs.items():
@@ -54,84 +40,207 @@ class DetectionMethods:
         except Exception:
             return text.lower()
 
-    def generate_variants(self, text: str) -> frozenset:
-        """Generate variants using selective substitution."""
-        substitutions = self.substitutions
+    def _build_skeleton_table(self, substitutions: Dict[str, Set[str]]) -> Dict[int, str]:
+        """
+        str.translate table for finding substitution candidates. Characters linked by
+        any chain of substitutes fall in one group skeletonized to its lowest letter; a
+        multi-character substitute (w -> vv) becomes the skeleton of its whole group.
+        The groups are transitive (m/u/y through μ and у), so equal skeletons only make
+        a candidate: _read_as decides whether it is a substitution.
+        """
+        parent = {}
 
-        @lru_cache(maxsize=1024)
-        def _generate_variants_cached(text: str) -> frozenset:
-            if not text:
-                return frozenset([''])
-            char = text[0]
-            rest_variants = _generate_variants_cached(text[1:])
+        def find(char):
+            while char in parent:
+                char = parent[char]
+            return char
 
-            if len(rest_variants) > 1000:
-                return frozenset(char + variant for variant in rest_variants)
+        expansions = {}
+        for char, substitutes in substitutions.items():
+            for sub in substitutes:
+                if len(char) == 1 and len(sub) == 1:
+                    root, other = find(char), find(sub)
+                    if root != other:
+                        parent[other] = root
+                elif len(char) == 1:
+                    expansions.setdefault(char, sub)
+                elif len(sub) == 1:
+                    expansions.setdefault(sub, char)
 
-            if char not in substitutions:
-                return frozenset(char + variant for variant in rest_variants)
+        groups = {}
+        for char in {c for key, subs in substitutions.items() for c in (key, *subs) if len(c) == 1}:
+            groups.setdefault(find(char), []).append(char)
 
-            return frozenset(
-                sub + rest
-                for sub in substitutions[char] | {char}
-                for rest in rest_variants
-                if len(sub + rest) <= len(text) + 3
-            )
+        table = {}
+        for members in groups.values():
+            base = min(members, key=lambda c: (not 'a' <= c <= 'z', c))
+            for char in members:
+                table[ord(char)] = base
 
-        return _generate_variants_cached(text)
+        for char, sub in expansions.items():
+            expanded = sub.translate(table)
+            base = table.get(ord(char), char)
+            for code in [code for code, skeleton in table.items() if skeleton == base] or [ord(char)]:
+                table[code] = expanded
+
+        return table
+
+    def _build_confusables(self, basic_subs: Dict[str, Set[str]], substitutions: Dict[str, Set[str]]):
+        """
+        Per-character tables for _read_as, from the basic (file) and complete substitutions:
+        character pairs that share a variant, which is what intersecting variant sets matched
+        on (no chains: m and u share μ, m and y share nothing); (substitute, base) pairs as
+        listed in the file; and the multi-character substitutes of each character.
+        """
+        by_variant = {}
+        for char, subs in substitutions.items():
+            if len(char) == 1:
+                for variant in subs | {char}:
+                    by_variant.setdefault(variant, set()).add(char)
+        compatible = frozenset(
+            (a, b) for members in by_variant.values() for a in members for b in members if a != b
+        )
+        substituted = frozenset(
+            (sub, base) for base, subs in basic_subs.items() if len(base) == 1 for sub in subs if sub
+        )
+        expansions = {
+            char: tuple(sorted(sub for sub in subs if len(sub) > 1))
+            for char, subs in substitutions.items()
+            if len(char) == 1 and any(len(sub) > 1 for sub in subs)
+        }
+        return compatible, substituted, expansions
+
+    def _build_target_skeletons(self) -> Dict[str, List[str]]:
+        """Target terms by skeleton, in target_terms order."""
+        target_skeletons = {}
+        for target in self.target_terms:
+            target_skeletons.setdefault(target.translate(self.skeleton_table), []).append(target)
+        return target_skeletons
 
     def check_substitutions(self, labels: List[str]) -> List[Tuple[str, str, float]]:
-        """Optimized substitution checking."""
+        """
+        Substitution matching on skeletons: one lookup for a label that is a
+        substituted target, else one automaton pass for a substituted target inside it.
+        """
         results = []
-        normalized_labels = [self.normalize_text(label) for label in labels]
+        for label in labels:
+            results.extend(self.match_substitution(label, self.normalize_text(label)))
+        return results
 
-        for i, label in enumerate(normalized_labels):
-            label_variants = self.generate_variants(label)
+    def match_substitution(self, label: str, normalized: str) -> List[Tuple[str, str, float]]:
+        """check_substitutions for one label, given its normalize_text form."""
+        target_skeletons = self.target_skeletons
+        skeleton = normalized.translate(self.skeleton_table)
+        for target in target_skeletons.get(skeleton, ()):
+            if self._read_as(normalized, target) is not None:
+                return [(target, f"Character substitution match in label: {label} ↔ {target}", 0.9)]
 
-            for target, target_variants in self.target_variants.items():
-                if label_variants & target_variants:
-                    results.append((
-                        target,
-                        f"Character substitution match in label: {labels[i]} ↔ {target}",
-                        0.9
-                    ))
-                    break
+        # A target inside a longer label only counts with a real substitute in it:
+        # authorize holds "autho", which is auth0 spelled straight, not a lookalike.
+        # Targets present verbatim are already reported by check_direct_match.
+        for hit in self.skeleton_matcher.find_all(skeleton):
+            for target in target_skeletons[hit]:
+                if target not in normalized and any(
+                    self._read_as(normalized, target, start, whole=False) for start in range(len(normalized))
+                ):
+                    return [(target, f"Character substitution match in label: {label} ↔ {target}", 0.9)]
+        return []
 
-        return results
+    def _read_as(self, label: str, target: str, start: int = 0, whole: bool = True):
+        """
+        Whether label from start (to its end if whole) reads as target, aligning one
+        target character with one label character that shares a variant with it, or
+        with the label characters spelling one of its multi-character substitutes (and
+        the other way round). None if it doesn't, else whether some reading has a
+        substitute listed for the target character on the label side.
+        """
+        substitutions = self.substitutions
+        compatible = self.compatible_chars
+        substituted = self.substituted_chars
+        expansions = self.expansions
 
-    def check_direct_match(self, labels: List[str]) -> List[Tuple[str, str, float]]:
-        """Optimized direct matching."""
-        results = []
-        normalized_labels = [self.normalize_text(label) for label in labels]
+        def spells(text, at, sub):
+            return all(c == s or s in substitutions.get(c, ()) for c, s in zip(text[at:at + len(sub)], sub))
+
+        n, m = len(label), len(target)
+        found = None
+        seen = set()
+        stack = [(start, 0, False)]
+        while stack:
+            state = stack.pop()
+            if state in seen:
+                continue
+            seen.add(state)
+            i, j, sub = state
+            if j == m:
+                if i == n or not whole:
+                    if sub:
+                        return True
+                    found = False
+                continue
+            t = target[j]
+            if i < n:
+                c = label[i]
+                if c == t:
+                    stack.append((i + 1, j + 1, sub))
+                elif (c, t) in compatible:
+                    stack.append((i + 1, j + 1, sub or (c, t) in substituted))
+                for expanded in expansions.get(c, ()):
+                    if j + len(expanded) <= m and spells(target, j, expanded):
+                        stack.append((i + 1, j + len(expanded), sub))
+            for expanded in expansions.get(t, ()):
+                if i + len(expanded) <= n and spells(label, i, expanded):
+                    stack.append((i + len(expanded), j + 1, sub or (label[i:i + len(expanded)], t) in substituted))
+        return found
 
-        for i, label in enumerate(normalized_labels):
-            for target in self.target_terms:
-                if target in label:
-                    results.append((target, f"Direct match in label: {labels[i]}", 1.0))
+    def get_target_matcher(self) -> AhoCorasick:
+        """Aho-Corasick automaton over target_terms, compiled once per target set."""
+        matcher = getattr(self, 'target_matcher', None)
+        if matcher is None or matcher.terms != self.target_terms:
+            matcher = self.target_matcher = AhoCorasick(self.target_terms)
+            # Report matches in target_terms order, as the per-term loop did
+            self.target_order = {target: i for i, target in enumerate(self.target_terms)}
+        return matcher
 
+    def check_direct_match(self, labels: List[str]) -> List[Tuple[str, str, float]]:
+        """Direct matching, all target terms per label in one automaton pass."""
+        results = []
+        for label in labels:
+            results.extend(self.match_direct(label, self.normalize_text(label)))
         return results
 
-    @lru_cache(maxsize=1024)
-    def levenshtein_distance(self, s1: str, s2: str) -> int:
+    def match_direct(self, label: str, normalized: str) -> List[Tuple[str, str, float]]:
+        """check_direct_match for one label, given its normalize_text form."""
+        matches = self.get_target_matcher().find_all(normalized)
+        if len(matches) > 1:
+            matches.sort(key=self.target_order.__getitem__)
+        return [(target, f"Direct match in label: {label}", 1.0) for target in matches]
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def levenshtein_distance(s1: str, s2: str) -> int:
         """Cached Levenshtein distance calculation."""
         return jellyfish.levenshtein_distance(s1, s2)
 
     def check_levenshtein_distance(self, labels: List[str]) -> List[Tuple[str, str, float]]:
-        """Optimized Levenshtein distance checking."""
+        """Levenshtein matching, only against the targets the deletion index can't rule out."""
         results = []
-        normalized_labels = [self.normalize_text(label) for label in labels]
-
-        for i, label in enumerate(normalized_labels):
-            for target in self.target_terms:
-                distance = self.levenshtein_distance(label, target)
-                if distance <= self.max_levenshtein_distance:
-                    similarity = 1 - (distance / max(len(label), len(target)))
-                    results.append((
-                        target,
-                        f"Similar to {labels[i]} (Levenshtein distance: {distance})",
-                        similarity
-                    ))
+        for label in labels:
+            results.extend(self.match_levenshtein(label, self.normalize_text(label)))
+        return results
 
+    def match_levenshtein(self, label: str, normalized: str) -> List[Tuple[str, str, float]]:
+        """check_levenshtein_distance for one label, given its normalize_text form."""
+        results = []
+        for target in self.fuzzy_index.candidates(normalized):
+            distance = self.levenshtein_distance(normalized, target)
+            if distance <= self.max_levenshtein_distance:
+                similarity = 1 - (distance / max(len(normalized), len(target)))
+                results.append((
+                    target,
+                    f"Similar to {label} (Levenshtein distance: {distance})",
+                    similarity
+                ))
         return results
 
     def check_neighboring_labels(self, labels: List[str]) -> List[Tuple[str, str, float]]:
@@ -0,0 +1,202 @@
+# analysis/dga_inference.py
+
+import asyncio
+import hashlib
+import importlib.metadata
+import importlib.util
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import AbstractSet, Iterable, List, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = 500
+DEFAULT_MAX_DELAY = 0.05
+MAX_LABEL_LENGTH = 82
+
+MODEL_FILE = 'domain_classifier_model.h5'
+
+# 'numpy' runs the exported weights (analysis/dga_model.npz) without TensorFlow;
+# 'tensorflow' runs dgaintel itself
+BACKENDS = ('numpy', 'tensorflow')
+DEFAULT_BACKEND = 'numpy'
+
+@lru_cache(maxsize=2)
+def model_version(backend: str = DEFAULT_BACKEND) -> str:
+    """dgaintel release plus a digest of its bundled model, without importing it (and TensorFlow)."""
+    try:
+        if backend == 'numpy':
+            from analysis.dga_numpy import read_metadata
+            return read_metadata()['model_version']
+        version = importlib.metadata.version('dgaintel')
+        spec = importlib.util.find_spec('dgaintel')
+        with open(os.path.join(spec.submodule_search_locations[0], MODEL_FILE), 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        return f"dgaintel-{version}-{digest}"
+    except Exception as e:
+        print(f"Could not determine the DGA model version: {e}")
+        return 'dgaintel-unknown'
+
+def normalize_label(label: str) -> str:
+    """Form of a DNS label compared against known good labels (DNS names are case-insensitive)."""
+    return label.strip().lower()
+
+def subdomain_labels(domain: str, known_good_labels: AbstractSet[str] = frozenset()) -> List[str]:
+    """
+    Labels of a domain worth scoring: left of the registered name, not _service labels
+    or known good. They keep their case, as the model input: dgaintel does not lower-case
+    and scores upper-case letters differently, so the cache keys them as given too.
+    """
+    labels = []
+    for label in domain.rstrip('.').split('.')[:-2]:
+        normalized = normalize_label(label)
+        if (normalized and not label.startswith('_') and
+                len(label) <= MAX_LABEL_LENGTH and
+                normalized not in known_good_labels):
+            labels.append(label)
+    return labels
+
+# Worker side. Each worker loads the model once, in the initializer: the NumPy
+# weights, or dgaintel, which loads its TensorFlow model when it is imported.
+
+_model = None
+
+def _init_worker(backend: str = DEFAULT_BACKEND):
+    global _model
+    # Ctrl-C and shutdown are handled by the bot process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if backend == 'numpy':
+        from analysis.dga_numpy import NumpyDGAModel
+        _model = NumpyDGAModel()
+    else:
+        import dgaintel  # noqa: F401
+
+def _predict(labels: List[str]) -> Tuple[List[float], float]:
+    start = time.perf_counter()
+    if _model is not None:
+        probabilities = _model.predict(labels).tolist()
+    else:
+        from dgaintel import get_prob
+        probabilities = [float(probability) for _, probability in get_prob(labels, internal=True)]
+    return probabilities, time.perf_counter() - start
+
+
+class DGAInferenceService:
+    """
+    DGA model inference in dedicated worker processes. Labels from concurrent
+    requests are queued and sent to the model together: a micro-batch goes out
+    when it reaches max_batch_size or when its oldest label has waited max_delay
+    seconds, and while every worker is busy the next batch keeps filling up.
+    """
+
+    def __init__(self, max_workers: int = 1, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_delay: float = DEFAULT_MAX_DELAY,
+                 backend: str = DEFAULT_BACKEND):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown DGA backend '{backend}', expected one of {', '.join(BACKENDS)}")
+        self.max_workers = max_workers
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._executor = None
+        self._batcher = None
+        self._queue = deque()  # (label, future, enqueued at)
+        self._arrived = None
+        self._slots = None
+        self._inflight = set()
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.backend,)
+            )
+        if self._batcher is None:
+            self._arrived = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._batcher = asyncio.get_running_loop().create_task(self._run())
+
+    async def warm_up(self):
+        """Load the model in every worker now, so the first /dga doesn't wait for it."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _predict, ['warmup']) for _ in range(self.max_workers)))
+        print(f"DGA inference ready with {self.max_workers} {self.backend} workers")
+
+    async def score(self, labels: Iterable[str]) -> List[Tuple[str, float]]:
+        """(label, probability) for each label, in order."""
+        self.start()
+        labels = list(labels)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        futures = []
+        for label in labels:
+            future = loop.create_future()
+            self._queue.append((label, future, now))
+            futures.append(future)
+        self._arrived.set()
+        probabilities = await asyncio.gather(*futures)
+        return list(zip(labels, probabilities))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            await self._slots.acquire()
+            while not queue:
+                self._arrived.clear()
+                await self._arrived.wait()
+
+            # Give concurrent requests until the oldest label's deadline to join in
+            deadline = queue[0][2] + self.max_delay
+            while len(queue) < self.max_batch_size and loop.time() < deadline:
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+
+            batch = {}
+            oldest = queue[0][2]
+            while queue and len(batch) < self.max_batch_size:
+                label, future, _ = queue.popleft()
+                if not future.cancelled():
+                    # The same label from several requests is scored once
+                    batch.setdefault(label, []).append(future)
+
+            if not batch:
+                self._slots.release()
+                continue
+            task = loop.create_task(self._dispatch(batch, loop.time() - oldest))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch, queue_time):
+        try:
+            labels = list(batch)
+            loop = asyncio.get_running_loop()
+            probabilities, inference_time = await loop.run_in_executor(self._executor, _predict, labels)
+            print(f"DGA batch: {len(labels)} labels, queued {queue_time * 1000:.1f} ms, inference {inference_time * 1000:.1f} ms")
+            for label, probability in zip(labels, probabilities):
+                for future in batch[label]:
+                    if not future.done():
+                        future.set_result(probability)
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,198 @@
+# analysis/dga_numpy.py
+#
+# NumPy forward pass for the dgaintel model (embedding, Conv1D, max-pool, LSTM,
+# dense), so /dga can score labels without importing TensorFlow. The weights are
+# exported once from dgaintel's Keras model into dga_model.npz:
+#
+#   python -m analysis.dga_numpy --export    # needs dgaintel and TensorFlow
+#
+# dgaintel is MIT licensed (https://github.com/sudo-rushil/dgaintel).
+
+import argparse
+import hashlib
+import importlib.metadata
+import json
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import numpy as np
+
+WEIGHTS_FILE = Path(__file__).parent / 'dga_model.npz'
+
+# dgaintel's CHAR2IDX; anything else maps to '.', and labels are zero-padded
+# (which is also '-') to the model's fixed input length
+ALPHABET = '-.0123456789_abcdefghijklmnopqrstuvwxyz'
+INPUT_LENGTH = 82
+STEPS = INPUT_LENGTH // 2  # LSTM steps after the pooling
+DEFAULT_CHUNK_SIZE = 512
+
+_CODES = np.full(256, ALPHABET.index('.'), dtype=np.intp)
+for _i, _c in enumerate(ALPHABET):
+    _CODES[ord(_c)] = _i
+
+
+def vectorize(labels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(symbol codes, one zero-padded row of INPUT_LENGTH per label as dgaintel.get_prob builds them, label lengths)."""
+    codes = np.zeros((len(labels), INPUT_LENGTH), dtype=np.intp)
+    lengths = np.zeros(len(labels), dtype=np.intp)
+    for i, label in enumerate(labels):
+        raw = np.frombuffer(label[:INPUT_LENGTH].encode('ascii', 'replace'), dtype=np.uint8)
+        codes[i, :len(raw)] = _CODES[raw]
+        lengths[i] = len(raw)
+    return codes, lengths
+
+
+def read_metadata(path=WEIGHTS_FILE) -> dict:
+    """The export's metadata (source model, version) without loading the weights."""
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data['metadata']))
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+class NumpyDGAModel:
+    """
+    dgaintel's classifier evaluated with NumPy in float32.
+
+    Two shortcuts keep it cheap on CPU. The embedding and the convolution are
+    folded together at load time: with a discrete input, each kernel tap is just
+    a (symbols x filters) lookup table. And past the end of a label the padding
+    makes every LSTM input step identical, so those steps' inputs are computed
+    once at load time; labels are batched by length so that only the steps that
+    cover characters go through the convolution.
+    """
+
+    def __init__(self, path=WEIGHTS_FILE, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        with np.load(path, allow_pickle=False) as data:
+            self.metadata = json.loads(str(data['metadata']))
+            embeddings = data['embeddings']
+            conv_kernel = data['conv_kernel']
+            self.conv_bias = data['conv_bias']
+            self.lstm_kernel = data['lstm_kernel']
+            self.lstm_recurrent = data['lstm_recurrent']
+            self.lstm_bias = data['lstm_bias']
+            self.dense_kernel = data['dense_kernel']
+            self.dense_bias = data['dense_bias']
+        self.chunk_size = chunk_size
+        # taps[k][symbol] = embeddings[symbol] @ conv_kernel[k]
+        self.taps = np.einsum('se,kef->ksf', embeddings, conv_kernel).astype(np.float32)
+        self.units = self.lstm_recurrent.shape[0]
+
+        # LSTM inputs of an all-padding step, inside the sequence and at its end
+        # (where the convolution reads the zero 'same' padding instead)
+        padding = self._lstm_inputs(np.zeros((1, INPUT_LENGTH), dtype=np.intp))[0]
+        self.padding_step, self.final_padding_step = padding[STEPS // 2], padding[STEPS - 1]
+
+    @property
+    def version(self) -> str:
+        return self.metadata['model_version']
+
+    def _lstm_inputs(self, codes: np.ndarray) -> np.ndarray:
+        """Projected LSTM inputs for the first codes.shape[1] // 2 steps; codes may be a left slice of the full rows."""
+        width = codes.shape[1] - (codes.shape[1] < INPUT_LENGTH)
+        batch = len(codes)
+
+        # Conv1D, kernel 3, 'same' padding: the taps left and right of the edges read zeros
+        conv = self.taps[1][codes[:, :width]]
+        conv[:, 1:] += self.taps[0][codes[:, :width - 1]]
+        conv[:, :-1] += self.taps[2][codes[:, 1:width]]
+        if width < codes.shape[1]:
+            conv[:, -1] += self.taps[2][codes[:, width]]
+
+        # MaxPooling1D, pool 2; the bias and ReLU commute with the max, so they are
+        # applied to half as many values
+        pooled = np.maximum(conv[:, 0::2], conv[:, 1::2])
+        pooled += self.conv_bias
+        np.maximum(pooled, 0, out=pooled)
+
+        # The LSTM's input projection for every step in one product
+        projected = pooled.reshape(-1, pooled.shape[2]) @ self.lstm_kernel
+        projected += self.lstm_bias
+        return projected.reshape(batch, width // 2, -1)
+
+    def _predict_chunk(self, codes: np.ndarray, max_length: int) -> np.ndarray:
+        # Steps after length // 2 see only padding; the last step is special-cased
+        exact = min(max_length // 2 + 1, STEPS)
+        if exact >= STEPS - 1:
+            exact = STEPS
+        projected = self._lstm_inputs(codes[:, :min(2 * exact + 1, INPUT_LENGTH)])
+
+        # LSTM with Keras' gate order (input, forget, cell, output)
+        n = self.units
+        h = np.zeros((len(codes), n), dtype=np.float32)
+        c = np.zeros((len(codes), n), dtype=np.float32)
+        for t in range(STEPS):
+            if t < exact:
+                x = projected[:, t]
+            else:
+                x = self.padding_step if t < STEPS - 1 else self.final_padding_step
+            z = h @ self.lstm_recurrent
+            z += x
+            gates = _sigmoid(z)
+            g = np.tanh(z[:, 2 * n:3 * n])
+            c = gates[:, n:2 * n] * c + gates[:, :n] * g
+            h = gates[:, 3 * n:] * np.tanh(c)
+
+        # Dropout is inactive at inference
+        return _sigmoid(h @ self.dense_kernel + self.dense_bias)[:, 0]
+
+    def predict(self, labels: Sequence[str]) -> np.ndarray:
+        """DGA probability per label, in input order."""
+        codes, lengths = vectorize(labels)
+        probabilities = np.zeros(len(labels), dtype=np.float32)
+        order = np.argsort(lengths, kind='stable')
+        for i in range(0, len(order), self.chunk_size):
+            rows = order[i:i + self.chunk_size]
+            probabilities[rows] = self._predict_chunk(codes[rows], int(lengths[rows].max()))
+        return probabilities
+
+
+def export_weights(path=WEIGHTS_FILE):
+    """Write dgaintel's Keras weights to path. Imports dgaintel, and so TensorFlow."""
+    from dgaintel.predict import MODEL, SAVED_MODEL_PATH
+    layers = {layer.__class__.__name__: layer for layer in MODEL.layers}
+    embeddings, = layers['Embedding'].get_weights()
+    conv_kernel, conv_bias = layers['Conv1D'].get_weights()
+    lstm_kernel, lstm_recurrent, lstm_bias = layers['LSTM'].get_weights()
+    dense_kernel, dense_bias = layers['Dense'].get_weights()
+
+    with open(SAVED_MODEL_PATH, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    metadata = {
+        'source': 'dgaintel',
+        'source_version': importlib.metadata.version('dgaintel'),
+        # Same form as dga_inference.model_version(), so both backends share cache entries
+        'model_version': f"dgaintel-{importlib.metadata.version('dgaintel')}-{digest}",
+        'alphabet': ALPHABET,
+        'input_length': INPUT_LENGTH,
+    }
+    np.savez_compressed(
+        path,
+        metadata=np.array(json.dumps(metadata)),
+        embeddings=embeddings, conv_kernel=conv_kernel, conv_bias=conv_bias,
+        lstm_kernel=lstm_kernel, lstm_recurrent=lstm_recurrent, lstm_bias=lstm_bias,
+        dense_kernel=dense_kernel, dense_bias=dense_bias,
+    )
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy backend for the dgaintel model.")
+    parser.add_argument('--export', action='store_true', help="Export dgaintel's weights to --weights")
+    parser.add_argument('--weights', default=str(WEIGHTS_FILE))
+    parser.add_argument('labels', nargs='*', help="Labels to score")
+    args = parser.parse_args()
+
+    if args.export:
+        metadata = export_weights(args.weights)
+        print(f"Exported {metadata['model_version']} to {args.weights}")
+    if args.labels:
+        model = NumpyDGAModel(args.weights)
+        for label, probability in zip(args.labels, model.predict(args.labels)):
+            print(f"{label}\t{probability:.4f}")
+
+
+if __name__ == '__main__':
+    main()
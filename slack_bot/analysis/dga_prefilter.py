@@ -0,0 +1,153 @@
+# analysis/dga_prefilter.py
+#
+# Cheap lexical screen run ahead of the DGA model: labels that read like words or
+# ordinary host names are dropped, everything else goes on to dgaintel. Features
+# are computed for a whole batch at once with NumPy.
+#
+#   python -m analysis.dga_prefilter --train-bigrams    # rebuild label_bigrams.json
+
+import argparse
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from analysis.data_tables import BRANDS_FILE, KNOWN_GOOD_LABELS_FILE, load_terms
+
+BIGRAM_FILE = Path(__file__).parent / 'label_bigrams.json'
+
+# dgaintel's input vocabulary; anything else is read as '.', as the model does
+ALPHABET = '-.0123456789_abcdefghijklmnopqrstuvwxyz'
+BOUNDARY = len(ALPHABET)  # start/end of label in the bigram table
+SYMBOLS = BOUNDARY + 1
+
+FEATURES = ('entropy', 'vowel_consonant_ratio', 'digit_ratio', 'bigram_log_likelihood')
+
+# Logistic weights over FEATURES and the score threshold, calibrated with
+# benchmarks/dga_prefilter_report.py --calibrate. A label is sent to the model
+# when its score reaches the threshold.
+DEFAULT_WEIGHTS = (5.3727, -0.8528, -2.8759, -2.4944)
+DEFAULT_BIAS = -27.7055
+DEFAULT_THRESHOLD = -4.6174
+
+_CODES = np.full(256, ALPHABET.index('.'), dtype=np.intp)
+for _i, _c in enumerate(ALPHABET):
+    _CODES[ord(_c)] = _CODES[ord(_c.upper())] = _i
+
+def _char_mask(chars: str) -> np.ndarray:
+    mask = np.zeros(SYMBOLS)
+    mask[[ALPHABET.index(c) for c in chars]] = 1
+    return mask
+
+_VOWELS = _char_mask('aeiou')
+_CONSONANTS = _char_mask('bcdfghjklmnpqrstvwxyz')
+_DIGITS = _char_mask('0123456789')
+
+
+def encode(labels: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(symbol codes of all labels concatenated, label lengths, row of each code)."""
+    lengths = np.fromiter(map(len, labels), dtype=np.intp, count=len(labels))
+    raw = np.frombuffer(''.join(labels).encode('ascii', 'replace'), dtype=np.uint8)
+    return _CODES[raw], lengths, np.repeat(np.arange(len(labels)), lengths)
+
+
+def train_bigrams(words: Iterable[str], smoothing: float = 0.5) -> np.ndarray:
+    """Log P(next symbol | symbol), with label start/end as an extra symbol."""
+    counts = np.full((SYMBOLS, SYMBOLS), smoothing)
+    for word in words:
+        codes = _CODES[np.frombuffer(word.encode('ascii', 'replace'), dtype=np.uint8)]
+        sequence = np.concatenate(([BOUNDARY], codes, [BOUNDARY]))
+        np.add.at(counts, (sequence[:-1], sequence[1:]), 1)
+    return np.log(counts / counts.sum(axis=1, keepdims=True))
+
+
+@lru_cache(maxsize=4)
+def load_bigrams(path=BIGRAM_FILE) -> np.ndarray:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data['alphabet'] != ALPHABET:
+        raise ValueError(f"{path} was trained for a different alphabet")
+    return np.array(data['log_probabilities'])
+
+
+def label_features(labels: Sequence[str], bigrams: np.ndarray) -> np.ndarray:
+    """One row per label, one column per FEATURES entry."""
+    n = len(labels)
+    if not n:
+        return np.zeros((0, len(FEATURES)))
+    codes, lengths, rows = encode(labels)
+    counts = np.bincount(rows * SYMBOLS + codes, minlength=n * SYMBOLS).reshape(n, SYMBOLS)
+    size = np.maximum(lengths, 1)
+
+    p = counts / size[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+
+    vowel_consonant_ratio = (counts @ _VOWELS) / np.maximum(counts @ _CONSONANTS, 1)
+    digit_ratio = (counts @ _DIGITS) / size
+
+    # Mean transition log-probability, counting the label's start and end
+    same_label = rows[1:] == rows[:-1]
+    inner = np.bincount(rows[:-1], weights=bigrams[codes[:-1], codes[1:]] * same_label, minlength=n)
+    starts = np.cumsum(lengths) - lengths
+    present = lengths > 0
+    edges = np.zeros(n)
+    edges[present] = (bigrams[BOUNDARY, codes[starts[present]]] +
+                      bigrams[codes[starts[present] + lengths[present] - 1], BOUNDARY])
+    bigram_log_likelihood = (inner + edges) / (lengths + 1)
+
+    return np.column_stack((entropy, vowel_consonant_ratio, digit_ratio, bigram_log_likelihood))
+
+
+class LabelPreFilter:
+    """Logistic score over label_features; labels scoring below threshold skip the model."""
+
+    def __init__(self, weights: Sequence[float] = DEFAULT_WEIGHTS, bias: float = DEFAULT_BIAS,
+                 threshold: float = DEFAULT_THRESHOLD, bigrams: np.ndarray = None):
+        self.weights = np.asarray(weights, dtype=float)
+        self.bias = bias
+        self.threshold = threshold
+        self.bigrams = bigrams if bigrams is not None else load_bigrams()
+
+    def scores(self, labels: Sequence[str]) -> np.ndarray:
+        return label_features(labels, self.bigrams) @ self.weights + self.bias
+
+    def split(self, labels: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """(labels for the model, labels filtered out), each in input order."""
+        labels = list(labels)
+        keep = self.scores(labels) >= self.threshold
+        return [l for l, k in zip(labels, keep) if k], [l for l, k in zip(labels, keep) if not k]
+
+
+def training_words() -> List[str]:
+    """English prose from the Python docs bundled with the interpreter, plus the brand and known good lists."""
+    import pydoc_data.topics
+    text = ' '.join(pydoc_data.topics.topics.values())
+    words = [word.lower() for word in re.findall(r'[A-Za-z]{2,}', text)]
+    return words + sorted(load_terms(BRANDS_FILE)) + sorted(load_terms(KNOWN_GOOD_LABELS_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DGA pre-filter utilities.")
+    parser.add_argument('--train-bigrams', action='store_true', help=f"Rebuild {BIGRAM_FILE.name}")
+    parser.add_argument('--smoothing', type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.train_bigrams:
+        words = training_words()
+        table = train_bigrams(words, args.smoothing)
+        with open(BIGRAM_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'alphabet': ALPHABET,
+                'smoothing': args.smoothing,
+                'words': len(words),
+                'log_probabilities': [[round(float(v), 4) for v in row] for row in table],
+            }, f, separators=(',', ':'))
+        print(f"Wrote {BIGRAM_FILE} from {len(words)} words")
+
+
+if __name__ == '__main__':
+    main()
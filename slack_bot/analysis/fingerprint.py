@@ -5,6 +5,7 @@ import re
 from collections import defaultdict
 from docx import Document
 from utils.api_utils import query_iris_api
+from models.iris_investigate_models import IrisInvestigateResult
 
 def analyze_data(domains, limit_percentage=10, include_empty=False):
     total_domains = len(domains)
@@ -12,7 +13,7 @@ def analyze_data(domains, limit_percentage=10, include_empty=False):
     potential_dedicated_ips = set()
 
     for domain in domains:
-        domain_name = domain.get('domain', '')
+        domain_name = domain.domain or ''
         analyze_domain(
             domain,
             attribute_counts,
@@ -46,37 +47,32 @@ def analyze_domain(
 ):
     excluded_fields = {'count', 'alexa', 'popularity_rank'}
 
-    for attr, value in domain.items():
-        if any(excluded in attr for excluded in excluded_fields):
+    # Every Iris {"value": ..., "count": ...} attribute of the result
+    for base_attr, value, count_value in domain.attribute_values():
+        if any(excluded in base_attr for excluded in excluded_fields):
             continue
-        # Process only keys that end with '_value'
-        if attr.endswith('_value'):
-            # Get the base attribute name
-            base_attr = attr[:-6]  # Remove '_value'
-            # Normalize attribute to remove enumeration indices
-            base_attr = normalize_attribute(base_attr)
-            count_key = base_attr + '_count'
-            count_value = domain.get(count_key, '')
-            # Convert value to string for comparison
-            value_str = str(value) if value is not None else ''
-            # Skip empty values unless include_empty is True
-            if not include_empty and (not value_str or value_str.lower() == 'empty'):
-                continue
-            # Replace underscores with spaces in context key for readability
-            context_key = f"{base_attr.replace('_', ' ')}: {value_str}"
-            # Store the count value
-            try:
-                count_value = int(count_value) if count_value else 0
-            except ValueError:
-                count_value = 0
-
-            # Update attribute counts
-            attribute_counts[base_attr][context_key] += 1
-
-            # Collect potential dedicated IPs
-            if base_attr == 'ip address':
-                if 0 <= count_value <= 20:
-                    potential_dedicated_ips.add(value_str)
+        # Normalize attribute to remove enumeration indices
+        base_attr = normalize_attribute(base_attr)
+        # Convert value to string for comparison
+        value_str = str(value) if value is not None else ''
+        # Skip empty values unless include_empty is True
+        if not include_empty and (not value_str or value_str.lower() == 'empty'):
+            continue
+        # Replace underscores with spaces in context key for readability
+        context_key = f"{base_attr.replace('_', ' ')}: {value_str}"
+        # Store the count value
+        try:
+            count_value = int(count_value) if count_value else 0
+        except ValueError:
+            count_value = 0
+
+        # Update attribute counts
+        attribute_counts[base_attr][context_key] += 1
+
+        # Collect potential dedicated IPs
+        if base_attr == 'ip address':
+            if 0 <= count_value <= 20:
+                potential_dedicated_ips.add(value_str)
 
 def get_high_correlation(attribute_counts, total_domains, limit_percentage):
     high_correlation = {}
@@ -132,9 +128,11 @@ def generate_report(high_correlation, potential_dedicated_ips):
 def run_analysis(search_hash, limit_percentage, iris_key, iris_user, include_empty=False):
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    domains = loop.run_until_complete(
-        query_iris_api(iris_key, iris_user, search_hash)
+    raw_results = loop.run_until_complete(
+        query_iris_api(iris_key, iris_user, search_hash, flatten=False)
     )
+    # The raw results are kept for attribute_values; nothing is flattened
+    domains = [IrisInvestigateResult(raw, keep_raw=True) for raw in raw_results]
     high_correlation, potential_dedicated_ips = analyze_data(
         domains,
         limit_percentage,
@@ -0,0 +1,62 @@
+# analysis/fuzzy_index.py
+
+from typing import Dict, Iterable, List, Set
+
+
+def deletions(word: str, max_distance: int) -> Set[str]:
+    """word plus every string reachable from it by deleting up to max_distance characters."""
+    found = {word}
+    level = {word}
+    for _ in range(max_distance):
+        level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))} - found
+        if not level:
+            break
+        found |= level
+    return found
+
+
+class DeletionIndex:
+    """
+    SymSpell-style deletion dictionary over a fixed term list. Two strings within
+    Levenshtein distance k always share a string reachable from each by at most k
+    deletions, so lookup only has to verify the terms that share one with the word
+    instead of every term.
+    """
+    __slots__ = ('terms', 'max_distance', '_deletes', '_rank', '_min_len', '_max_len')
+
+    def __init__(self, terms: Iterable[str], max_distance: int):
+        self.terms = tuple(terms)
+        self.max_distance = max_distance
+        self._rank = {term: i for i, term in enumerate(self.terms)}
+        self._deletes: Dict[str, List[str]] = {}
+        for term in self.terms:
+            for deleted in deletions(term, max_distance):
+                self._deletes.setdefault(deleted, []).append(term)
+        lengths = [len(term) for term in self.terms] or [0]
+        self._min_len = min(lengths)
+        self._max_len = max(lengths)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def candidates(self, word: str) -> List[str]:
+        """
+        Terms that may be within max_distance of word, in term order. A superset of
+        the real matches, so callers still compute the distance for each one.
+        """
+        k = self.max_distance
+        length = len(word)
+        if length > self._max_len + k or length < self._min_len - k:
+            return []
+
+        deletes = self._deletes
+        found = set()
+        for deleted in deletions(word, k):
+            terms = deletes.get(deleted)
+            if terms:
+                found.update(terms)
+
+        return sorted(
+            (term for term in found if abs(len(term) - length) <= k),
+            key=self._rank.__getitem__
+        )
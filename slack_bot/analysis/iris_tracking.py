@@ -76,10 +76,12 @@ async def check_for_updates(client: AsyncWebClient):
 def compare_data(old_data, new_data):
     # Implement comparison logic
     # Return a string describing the changes, or None if no changes
+    old_results = IrisInvestigateResponse.from_dict(old_data).by_domain()
+    new_results = IrisInvestigateResponse.from_dict(new_data).by_domain()
 
     # Compare domains
-    old_domains = set(result['domain'] for result in old_data['response']['results'])
-    new_domains = set(result['domain'] for result in new_data['response']['results'])
+    old_domains = set(old_results)
+    new_domains = set(new_results)
 
     added_domains = new_domains - old_domains
     removed_domains = old_domains - new_domains
@@ -91,9 +93,6 @@ def compare_data(old_data, new_data):
         changes.append(f"*Domains removed:* {', '.join(removed_domains)}")
 
     # Compare details for each domain
-    old_results = {result['domain']: result for result in old_data['response']['results']}
-    new_results = {result['domain']: result for result in new_data['response']['results']}
-
     for domain in new_domains & old_domains:
         old_result = old_results[domain]
         new_result = new_results[domain]
@@ -108,8 +107,8 @@ def compare_domain_data(old_result, new_result):
     changes = []
 
     # Compare IP addresses
-    old_ips = set(ip['address']['value'] for ip in old_result.get('ip', []))
-    new_ips = set(ip['address']['value'] for ip in new_result.get('ip', []))
+    old_ips = set(old_result.ip_addresses)
+    new_ips = set(new_result.ip_addresses)
 
     added_ips = new_ips - old_ips
     removed_ips = old_ips - new_ips
@@ -120,15 +119,15 @@ def compare_domain_data(old_result, new_result):
         changes.append(f"  - IPs removed: {', '.join(removed_ips)}")
 
     # Compare registrant name
-    old_registrant = old_result.get('registrant_name', {}).get('value', '')
-    new_registrant = new_result.get('registrant_name', {}).get('value', '')
+    old_registrant = old_result.registrant_name or ''
+    new_registrant = new_result.registrant_name or ''
 
     if old_registrant != new_registrant:
         changes.append(f"  - Registrant name changed from `{old_registrant}` to `{new_registrant}`")
 
     # Handle lists where order doesn't matter (e.g., name servers)
-    old_ns = set(ns['host']['value'] for ns in old_result.get('name_server', []))
-    new_ns = set(ns['host']['value'] for ns in new_result.get('name_server', []))
+    old_ns = set(old_result.name_server_hosts)
+    new_ns = set(new_result.name_server_hosts)
 
     added_ns = new_ns - old_ns
     removed_ns = old_ns - new_ns
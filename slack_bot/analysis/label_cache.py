@@ -0,0 +1,77 @@
+# analysis/label_cache.py
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+from cachetools import LRUCache
+
+DEFAULT_MEMORY_SIZE = 100000
+_QUERY_CHUNK = 500  # stays under SQLite's bound-parameter limit
+
+
+class LabelProbabilityCache:
+    """
+    DGA probability per label, kept in SQLite across restarts with an in-memory
+    LRU in front. Entries are keyed by the exact label that was scored and the
+    model version, so a new model never sees the old model's scores. The model is
+    case-sensitive, so labels that differ only in case are cached separately.
+    """
+
+    def __init__(self, path: str, model_version: str, memory_size: int = DEFAULT_MEMORY_SIZE):
+        self.path = path
+        self.model_version = model_version
+        self._memory = LRUCache(maxsize=memory_size)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS label_probability ('
+                'label TEXT NOT NULL, model_version TEXT NOT NULL, probability REAL NOT NULL, '
+                'PRIMARY KEY (label, model_version)) WITHOUT ROWID'
+            )
+            self._db.commit()
+
+    def get_many(self, labels: Iterable[str]) -> Tuple[Dict[str, float], List[str]]:
+        """(probabilities found, labels not cached), both keyed by the labels as given."""
+        found = {}
+        missing = []
+        with self._lock:
+            for label in labels:
+                probability = self._memory.get(label)
+                if probability is None:
+                    missing.append(label)
+                else:
+                    found[label] = probability
+
+            still_missing = []
+            for i in range(0, len(missing), _QUERY_CHUNK):
+                chunk = missing[i:i + _QUERY_CHUNK]
+                rows = dict(self._db.execute(
+                    f"SELECT label, probability FROM label_probability "
+                    f"WHERE model_version = ? AND label IN ({','.join('?' * len(chunk))})",
+                    [self.model_version, *chunk]
+                ).fetchall())
+                for label in chunk:
+                    probability = rows.get(label)
+                    if probability is None:
+                        still_missing.append(label)
+                    else:
+                        found[label] = probability
+                        self._memory[label] = probability
+        return found, still_missing
+
+    def put_many(self, probabilities: Iterable[Tuple[str, float]]):
+        probabilities = list(probabilities)
+        with self._lock:
+            for label, probability in probabilities:
+                self._memory[label] = probability
+            self._db.executemany(
+                'INSERT OR REPLACE INTO label_probability (label, model_version, probability) VALUES (?, ?, ?)',
+                [(label, self.model_version, probability) for label, probability in probabilities]
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,158 @@
+# analysis/label_trie.py
+
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Children are scanned in a list up to this many, then indexed by label; rdata
+# likewise goes from a tuple to a set
+FANOUT_THRESHOLD = 8
+
+
+class LabelNode:
+    """
+    One DNS label in a LabelTrie. A node is five slots. Children are None for a
+    leaf, the child node itself when there is only one (the usual case deep in a
+    name), a list while there are a few, and a dict keyed by label once the
+    fan-out passes FANOUT_THRESHOLD (wildcard-heavy zones). rdata is None, a
+    tuple of distinct values, or a set once there are more than FANOUT_THRESHOLD.
+    """
+    __slots__ = ('label', 'count', 'time_last', 'rdata', '_children')
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.time_last = 0
+        self.rdata = None
+        self._children = None
+
+    @property
+    def is_leaf(self) -> bool:
+        return self._children is None
+
+    def __len__(self):
+        children = self._children
+        if children is None:
+            return 0
+        return 1 if isinstance(children, LabelNode) else len(children)
+
+    def children(self) -> Iterable['LabelNode']:
+        """Child nodes in insertion order."""
+        children = self._children
+        if children is None:
+            return ()
+        if isinstance(children, LabelNode):
+            return (children,)
+        return children.values() if isinstance(children, dict) else children
+
+    def get(self, label: str) -> Optional['LabelNode']:
+        children = self._children
+        if children is None:
+            return None
+        if isinstance(children, LabelNode):
+            return children if children.label == label else None
+        if isinstance(children, dict):
+            return children.get(label)
+        for child in children:
+            if child.label == label:
+                return child
+        return None
+
+    def child(self, label: str) -> 'LabelNode':
+        """The child for label, created if missing."""
+        children = self._children
+        if children is None:
+            node = self._children = LabelNode(label)
+            return node
+        if isinstance(children, LabelNode):
+            if children.label == label:
+                return children
+            node = LabelNode(label)
+            self._children = [children, node]
+            return node
+        if isinstance(children, dict):
+            node = children.get(label)
+            if node is None:
+                node = children[label] = LabelNode(label)
+            return node
+        for node in children:
+            if node.label == label:
+                return node
+        node = LabelNode(label)
+        children.append(node)
+        if len(children) > FANOUT_THRESHOLD:
+            self._children = {child.label: child for child in children}
+        return node
+
+
+class LabelTrie:
+    """
+    Passive DNS names as one trie per root (the queried or registered domain),
+    with labels from the root down. Each node aggregates the count of every name
+    at or below it; rdata and time_last are kept on the node the name ends at.
+    Labels and rdata strings are interned per trie, so a label repeated across
+    parents (www, mail, _dmarc) or an address shared by many names is stored once.
+    """
+    __slots__ = ('roots', '_strings')
+
+    def __init__(self):
+        self.roots: Dict[str, LabelNode] = {}
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __contains__(self, root: str):
+        return root in self.roots
+
+    def __getitem__(self, root: str) -> LabelNode:
+        return self.roots[root]
+
+    def intern(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def root(self, name: str) -> LabelNode:
+        node = self.roots.get(name)
+        if node is None:
+            node = self.roots[name] = LabelNode(self.intern(name))
+        return node
+
+    def insert(self, root: str, labels: Sequence[str], count: int = 0, rdata: Iterable[str] = (), time_last: int = 0) -> LabelNode:
+        """
+        Add a name given as its root and the labels below it, left to right as
+        they appear in the name (['www', 'eu'] for www.eu.<root>). Returns the
+        name's node.
+        """
+        node = self.root(root)
+        node.count += count
+        for label in reversed(labels):
+            node = node.child(self.intern(label))
+            node.count += count
+        if rdata:
+            current = node.rdata
+            if isinstance(current, set):
+                current.update(map(self.intern, rdata))
+            else:
+                merged = dict.fromkeys(current or ())
+                merged.update(dict.fromkeys(map(self.intern, rdata)))
+                node.rdata = tuple(merged) if len(merged) <= FANOUT_THRESHOLD else set(merged)
+        if time_last > node.time_last:
+            node.time_last = time_last
+        return node
+
+    def insert_name(self, name: str, public_suffixes) -> LabelNode:
+        """Add a bare name under its registered domain, so a public suffix (com, co.uk) doesn't get levels of its own."""
+        labels = name.split('.')
+        suffix_length = public_suffixes.suffix_length(name.lower().split('.'))
+        return self.insert('.'.join(labels[-suffix_length - 1:]), labels[:-suffix_length - 1])
+
+    def walk(self) -> Iterator[Tuple[int, str, LabelNode]]:
+        """
+        (depth, fqdn, node) for every node, roots first in insertion order and
+        parents before children. Iterative, so deep names can't hit the recursion
+        limit.
+        """
+        stack = [(0, root_node.label, root_node) for root_node in reversed(list(self.roots.values()))]
+        while stack:
+            depth, fqdn, node = stack.pop()
+            yield depth, fqdn, node
+            if not node.is_leaf:
+                stack.extend((depth + 1, f"{child_node.label}.{fqdn}", child_node) for child_node in reversed(list(node.children())))
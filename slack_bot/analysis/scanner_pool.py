@@ -0,0 +1,98 @@
+# analysis/scanner_pool.py
+
+import asyncio
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple
+from analysis.data_tables import DATA_DIR
+
+DEFAULT_CHUNK_SIZE = 500
+SCANNERS_PER_WORKER = 16
+
+# Worker side. These run in the pool processes, which keep their scanners, data
+# tables and the PSL trie between requests.
+
+_data = None
+
+def _init_worker(data_path):
+    global _data
+    # Ctrl-C and shutdown are handled by the bot process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from utils.public_suffix import load_public_suffixes
+    from analysis.data_tables import DataDirectory
+    load_public_suffixes()
+    _data = DataDirectory(data_path)
+
+@lru_cache(maxsize=SCANNERS_PER_WORKER)
+def _get_scanner(target_terms: FrozenSet[str], data_version):
+    from commands.rtuf import DomainScanner
+    if data_version is not None and _data.tables.version != data_version:
+        _data.refresh()
+    return DomainScanner(set(target_terms), substitutions=_data.tables.substitutions)
+
+def _scan_chunk(target_terms: FrozenSet[str], data_version, domains: List[str]):
+    columns = _get_scanner(target_terms, data_version).scan_many(domains)
+    return columns.compact(domains), columns
+
+def _warm_up():
+    from commands import rtuf  # noqa: F401
+    return os.getpid()
+
+
+class ScannerPool:
+    """
+    Long-lived DomainScanner worker processes, created once at app startup and
+    shared by every request. Workers are spawned (not forked from the running
+    event loop) and keep a few compiled scanners warm, keyed by target terms.
+    """
+
+    def __init__(self, max_workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, data_path=None):
+        self.max_workers = max_workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.data_path = data_path
+        self._executor = None
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.data_path or DATA_DIR,)
+            )
+
+    async def warm_up(self):
+        """Start every worker now, so the first request doesn't pay for process startup."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.max_workers)))
+        print(f"Scanner pool ready with {self.max_workers} workers")
+
+    async def scan(self, domains: Iterable[str], target_terms: Iterable[str], data_version=None) -> List[Tuple[str, List[Tuple[str, str, float]]]]:
+        """
+        (domain, matches) for every domain with a match, matches as scan_domain
+        returns them. data_version is the caller's DataTables.version; workers
+        reload their substitution table when it differs from theirs.
+        """
+        self.start()
+        terms = frozenset(term.lower() for term in target_terms)
+        domains = list(domains)
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._executor, _scan_chunk, terms, data_version, domains[i:i + self.chunk_size])
+            for i in range(0, len(domains), self.chunk_size)
+        ]
+
+        results = []
+        for matched_domains, columns in await asyncio.gather(*futures):
+            for index, matches in columns.by_domain():
+                results.append((matched_domains[index], matches))
+        return results
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -4,22 +4,14 @@ import asyncio
 import aiohttp
 import json
 import time
-from collections import defaultdict
+from html import escape
+from analysis.label_trie import LabelTrie
 
 API_URL = 'https://api.dnsdb.info/dnsdb/v2/lookup/rrset/name/*.{domain}/ANY?limit=100000&time_last_after={time_last_after}'
 
 # Semaphore to limit concurrency to 10 requests
 sem = asyncio.Semaphore(10)
 
-class Node:
-    def __init__(self, name):
-        self.name = name
-        self.children = {}
-        self.rdata = set()
-        self.count = 0  # Initialize count
-        self.is_leaf = True  # Assume node is a leaf until it has children
-        self.time_last = 0  # Initialize time_last
-
 def get_subdomain_labels(domain, rrname):
     # Remove trailing dots
     domain = domain.rstrip('.')
@@ -52,47 +44,32 @@ def process_response(domain, text, tree):
             time_last = obj.get('time_last', 0)
             labels = get_subdomain_labels(domain, rrname)
             if labels is not None:
-                # Build the tree
-                current_node = tree[domain]
-                node_path = [current_node]  # Keep track of nodes from root to leaf
-                # Process labels in reverse order to build correct hierarchy
-                for label in reversed(labels):
-                    current_node.is_leaf = False  # Node has children, so it's not a leaf
-                    if label not in current_node.children:
-                        current_node.children[label] = Node(label)
-                    current_node = current_node.children[label]
-                    node_path.append(current_node)
-                # Only collect rdata if rrtype is not 'TXT'
-                if rrtype != 'TXT':
-                    current_node.rdata.update(rdata)
-                # Add count to all nodes in the path
-                for node in node_path:
-                    node.count += count
-                # Update time_last
-                if time_last > current_node.time_last:
-                    current_node.time_last = time_last
-
-def collect_fqdns_from_tree(tree, domains):
-    fqdns = {}
+                # Only collect rdata if rrtype is not 'TXT'; the count still goes to every node on the path
+                tree.insert(domain, labels, count, rdata if rrtype != 'TXT' else (), time_last)
+
+def iter_fqdns(tree, domains):
+    """
+    (fqdn, node) for every name below the given roots, parents before children.
+    Iterative, so deep names can't hit the recursion limit, and each FQDN is built
+    from its parent's by prepending one label.
+    """
     for domain in domains:
         root_node = tree[domain]
-        fqdns.update(collect_fqdns(root_node, [root_node.name]))
-    return fqdns  # fqdns is a dict of fqdn -> time_last
-
-def collect_fqdns(node, domain_path):
-    fqdns = {}
-    child_nodes = list(node.children.values())
-    for child_node in child_nodes:
-        child_name = child_node.name
-        domain_path.append(child_name)
-        fqdn = '.'.join(reversed(domain_path))
-        # Collect the fqdn and time_last
-        fqdns[fqdn] = child_node.time_last
-        # Recursively collect from children
-        child_fqdns = collect_fqdns(child_node, domain_path)
-        fqdns.update(child_fqdns)
-        domain_path.pop()
-    return fqdns
+        stack = [(child_node, root_node.label) for child_node in reversed(list(root_node.children()))]
+        while stack:
+            node, suffix = stack.pop()
+            fqdn = f"{node.label}.{suffix}"
+            yield fqdn, node
+            if not node.is_leaf:
+                stack.extend((child_node, fqdn) for child_node in reversed(list(node.children())))
+
+def write_fqdns(tree, domains, out):
+    """Stream one 'fqdn<TAB>count<TAB>time_last' line per name to a text file. Returns the number written."""
+    written = 0
+    for fqdn, node in iter_fqdns(tree, domains):
+        out.write(f"{fqdn}\t{node.count}\t{node.time_last}\n")
+        written += 1
+    return written
 
 async def fetch_domain(domain, session, time_last_after, api_key):
     url = API_URL.format(domain=domain, time_last_after=time_last_after)
@@ -116,73 +93,70 @@ async def run_subdomain_finder(domains, api_key, time_last_after=None):
         thirty_days = 30 * 24 * 60 * 60
         time_last_after = current_time - thirty_days
 
-    tree = {}
+    tree = LabelTrie()
     async with aiohttp.ClientSession() as session:
         tasks = []
         for domain in domains:
-            tree[domain] = Node(domain)
+            tree.root(domain)
             tasks.append(fetch_domain(domain, session, time_last_after, api_key))
         responses = await asyncio.gather(*tasks)
         for domain, text in responses:
             if text:
                 process_response(domain, text, tree)
-    # Collect FQDNs
-    fqdns = collect_fqdns_from_tree(tree, domains)
-    # Generate HTML report
-    html_report = generate_html_report(tree, domains)
-    return tree, fqdns
-
-def generate_html_report(tree, domains):
-    html_parts = []
-    html_parts.append('<!DOCTYPE html>')
-    html_parts.append('<html lang="en">')
-    html_parts.append('<head>')
-    html_parts.append('<meta charset="UTF-8">')
-    html_parts.append('<meta name="viewport" content="width=device-width, initial-scale=1.0">')
-    html_parts.append('<title>DNSDB Passive DNS Report</title>')
-    html_parts.append('<style>')
-    html_parts.append('body { font-family: Arial, sans-serif; }')
-    html_parts.append('details { margin-left: 20px; }')
-    html_parts.append('summary { font-weight: bold; cursor: pointer; }')
-    html_parts.append('p { margin-left: 20px; }')
-    html_parts.append('</style>')
-    html_parts.append('</head>')
-    html_parts.append('<body>')
-    html_parts.append('<h1>DNSDB Passive DNS Report</h1>')
-
+    # FQDN lists and the HTML report are produced from the tree on request
+    return tree
+
+HTML_HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>DNSDB Passive DNS Report</title>
+<style>
+body { font-family: Arial, sans-serif; }
+details { margin-left: 20px; }
+summary { font-weight: bold; cursor: pointer; }
+p { margin-left: 20px; }
+</style>
+</head>
+<body>
+<h1>DNSDB Passive DNS Report</h1>
+"""
+
+def write_html_report(tree, domains, out):
+    """
+    Stream the collapsible passive DNS report to a text file, a line at a time.
+    Each level is sorted by count; the walk is iterative and carries the FQDN down.
+    """
+    out.write(HTML_HEADER)
     for domain in domains:
         root_node = tree[domain]
-        summary_text = f"{root_node.name} (count: {root_node.count})"
-        html_parts.append(f'<details closed>')
-        html_parts.append(f'<summary>{summary_text}</summary>')
-        html_parts.extend(generate_html_tree(root_node, [root_node.name]))
-        html_parts.append(f'</details>')
-
-    html_parts.append('</body>')
-    html_parts.append('</html>')
-    return '\n'.join(html_parts)
-
-def generate_html_tree(node, domain_path):
-    html_parts = []
-    child_nodes = list(node.children.values())
-    child_nodes.sort(key=lambda x: x.count, reverse=True)
-    for child_node in child_nodes:
-        child_name = child_node.name
-        domain_path.append(child_name)
-        fqdn = '.'.join(reversed(domain_path))
-        summary_text = f"{fqdn} (count: {child_node.count})"
-        if child_node.rdata:
-            rdata_text = limit_rdata(child_node.rdata)
-            summary_text += f' : {rdata_text}'
-        if child_node.children:
-            html_parts.append('<details closed>')
-            html_parts.append(f'<summary>{summary_text}</summary>')
-            html_parts.extend(generate_html_tree(child_node, domain_path))
-            html_parts.append('</details>')
-        else:
-            html_parts.append(f'<p>{summary_text}</p>')
-        domain_path.pop()
-    return html_parts
+        out.write(f'<details closed>\n<summary>{escape(root_node.label)} (count: {root_node.count})</summary>\n')
+        # Entries are (node, parent fqdn), or None to close a <details>
+        stack = [None]
+        stack.extend((child_node, root_node.label) for child_node in _by_count_reversed(root_node))
+        while stack:
+            entry = stack.pop()
+            if entry is None:
+                out.write('</details>\n')
+                continue
+            node, suffix = entry
+            fqdn = f"{node.label}.{suffix}"
+            summary_text = f"{fqdn} (count: {node.count})"
+            if node.rdata:
+                summary_text += f' : {limit_rdata(node.rdata)}'
+            summary_text = escape(summary_text)
+            if node.is_leaf:
+                out.write(f'<p>{summary_text}</p>\n')
+            else:
+                out.write(f'<details closed>\n<summary>{summary_text}</summary>\n')
+                stack.append(None)
+                stack.extend((child_node, fqdn) for child_node in _by_count_reversed(node))
+    out.write('</body>\n</html>\n')
+
+def _by_count_reversed(node):
+    # Highest count first once popped off the stack; ties keep insertion order
+    return reversed(sorted(node.children(), key=lambda x: x.count, reverse=True))
 
 def limit_rdata(rdata_set):
     rdata_list = sorted(rdata_set)
@@ -5,16 +5,33 @@ from slack_bolt.async_app import AsyncApp
 from slack_bolt.adapter.socket_mode.aiohttp import AsyncSocketModeHandler
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from config import SLACK_BOT_TOKEN, SLACK_APP_TOKEN
+from apscheduler.triggers.interval import IntervalTrigger
+from config import (
+    SLACK_BOT_TOKEN, SLACK_APP_TOKEN, DATA_DIR, DATA_RELOAD_SECONDS,
+    DGA_WORKERS, DGA_MAX_BATCH_SIZE, DGA_MAX_DELAY_MS, DGA_BACKEND, DGA_CACHE_FILE, DGA_CACHE_MEMORY_SIZE,
+    DGA_PREFILTER, DGA_PREFILTER_THRESHOLD
+)
 from commands.slack_commands import register_commands
 from tasks.scheduled_tasks import daily_refresh_task
 from utils.logging_utils import setup_logging
+from analysis.scanner_pool import ScannerPool
+from analysis.data_tables import DataDirectory
+from analysis.dga_inference import DGAInferenceService, model_version
+from analysis.label_cache import LabelProbabilityCache
+from analysis.dga_prefilter import LabelPreFilter, DEFAULT_THRESHOLD
 from cachetools import TTLCache
 setup_logging()
 
 app = AsyncApp(token=SLACK_BOT_TOKEN)
 register_commands(app)
 app.cache = TTLCache(maxsize=1000, ttl=3600)  # Adjust maxsize and ttl as needed
+app.data_tables = DataDirectory(DATA_DIR)  # Brands, substitutions and known good labels, see main()
+app.scanner_pool = ScannerPool(data_path=DATA_DIR)  # Shared by /brandscan, started in main()
+app.dga_service = DGAInferenceService(DGA_WORKERS, DGA_MAX_BATCH_SIZE, DGA_MAX_DELAY_MS / 1000, DGA_BACKEND)  # Shared by /dga
+app.dga_cache = LabelProbabilityCache(DGA_CACHE_FILE, model_version(DGA_BACKEND), DGA_CACHE_MEMORY_SIZE)
+app.dga_prefilter = None  # Every uncached label goes to the model
+if DGA_PREFILTER:
+    app.dga_prefilter = LabelPreFilter(threshold=DEFAULT_THRESHOLD if DGA_PREFILTER_THRESHOLD is None else DGA_PREFILTER_THRESHOLD)
 
 async def main():
     # Start the Slack app
@@ -27,10 +44,24 @@ async def main():
         CronTrigger(hour=21, minute=3, timezone='UTC'),
         args=[app]  # Pass the app instance to the scheduled task
     )
+    # Pick up edits to the data directory without a restart
+    scheduler.add_job(
+        app.data_tables.refresh,
+        IntervalTrigger(seconds=DATA_RELOAD_SECONDS)
+    )
     scheduler.start()
 
+    # Start the scanner and DGA model workers before taking requests
+    await app.scanner_pool.warm_up()
+    await app.dga_service.warm_up()
+
     # Start the handler
-    await handler.start_async()
+    try:
+        await handler.start_async()
+    finally:
+        app.scanner_pool.shutdown()
+        app.dga_service.shutdown()
+        app.dga_cache.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
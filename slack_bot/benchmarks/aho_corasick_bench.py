@@ -0,0 +1,132 @@
+# benchmarks/aho_corasick_bench.py
+#
+# The per-term substring loops in check_direct_match and supplychain's
+# find_brands_in_subdomains against one Aho-Corasick pass per string, on synthetic
+# FQDNs built from brands.csv. Run from the slack_bot directory:
+#
+#   python -m benchmarks.aho_corasick_bench --fqdns 1000000
+
+import argparse
+import random
+import string
+import sys
+import time
+
+sys.path.append('.')
+from analysis.aho_corasick import AhoCorasick, build_matcher
+from analysis.data_tables import BRANDS_FILE
+
+TLDS = ('com', 'net', 'org', 'io', 'co.uk', 'de')
+
+
+def read_brands(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip()}
+
+
+def synthetic_fqdns(brands, count, hit_rate, seed):
+    """Random FQDNs, roughly hit_rate of them carrying a brand in some label."""
+    rng = random.Random(seed)
+    brands = sorted(brands)
+    alphabet = string.ascii_lowercase + string.digits + '-'
+
+    def word():
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 14))).strip('-') or 'x'
+
+    fqdns = {}
+    while len(fqdns) < count:
+        labels = [word() for _ in range(rng.randint(1, 4))]
+        if rng.random() < hit_rate:
+            i = rng.randrange(len(labels))
+            labels[i] = rng.choice(('', 'my', 'login-', 'secure')) + rng.choice(brands) + rng.choice(('', '-portal', 'app', '2'))
+        fqdns['.'.join(labels) + '.' + rng.choice(TLDS)] = rng.randint(1_600_000_000, 1_700_000_000)
+    return fqdns
+
+
+def legacy_direct_match(labels, target_terms):
+    results = []
+    for label in labels:
+        for target in target_terms:
+            if target in label:
+                results.append((target, label))
+    return results
+
+
+def automaton_direct_match(labels, matcher, order):
+    results = []
+    for label in labels:
+        matches = matcher.find_all(label)
+        if len(matches) > 1:
+            matches.sort(key=order.__getitem__)
+        for target in matches:
+            results.append((target, label))
+    return results
+
+
+def legacy_find_brands(subdomains, brands):
+    brand_matches = {}
+    for fqdn, time_last in subdomains.items():
+        lower_fqdn = fqdn.lower()
+        for brand in brands:
+            if brand.lower() in lower_fqdn:
+                if brand not in brand_matches or time_last > brand_matches[brand]['time_last']:
+                    brand_matches[brand] = {'fqdn': fqdn, 'time_last': time_last}
+    return brand_matches
+
+
+def automaton_find_brands(subdomains, brands):
+    brand_matches = {}
+    matcher = build_matcher(frozenset(brand.lower() for brand in brands))
+    for fqdn, time_last in subdomains.items():
+        for brand in matcher.find_all(fqdn.lower()):
+            if brand not in brand_matches or time_last > brand_matches[brand]['time_last']:
+                brand_matches[brand] = {'fqdn': fqdn, 'time_last': time_last}
+    return brand_matches
+
+
+def timed(name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<44} {elapsed:8.3f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-term substring matching.")
+    parser.add_argument('--fqdns', type=int, default=1_000_000)
+    parser.add_argument('--brands', default=BRANDS_FILE)
+    parser.add_argument('--hit-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    brands = read_brands(args.brands)
+    subdomains = synthetic_fqdns(brands, args.fqdns, args.hit_rate, args.seed)
+    print(f"{len(subdomains)} FQDNs, {len(brands)} brands\n")
+
+    start = time.perf_counter()
+    matcher = AhoCorasick(brands)
+    print(f"{'compile automaton':<44} {time.perf_counter() - start:8.3f}s\n")
+
+    # check_direct_match sees the labels left of the suffix, one scan per FQDN
+    target_terms = list(brands)
+    order = {target: i for i, target in enumerate(target_terms)}
+    labels = [fqdn.rsplit('.', 1)[0].split('.') for fqdn in subdomains]
+
+    def run_legacy():
+        return [legacy_direct_match(l, target_terms) for l in labels]
+
+    def run_automaton():
+        return [automaton_direct_match(l, matcher, order) for l in labels]
+
+    old, old_time = timed("check_direct_match, per-term loop", run_legacy)
+    new, new_time = timed("check_direct_match, automaton", run_automaton)
+    print(f"  speedup {old_time / new_time:.1f}x, identical output: {old == new}\n")
+
+    old, old_time = timed("find_brands_in_subdomains, per-brand loop", legacy_find_brands, subdomains, brands)
+    new, new_time = timed("find_brands_in_subdomains, automaton", automaton_find_brands, subdomains, brands)
+    print(f"  speedup {old_time / new_time:.1f}x, identical output: {old == new}")
+
+
+if __name__ == '__main__':
+    main()
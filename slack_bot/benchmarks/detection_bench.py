@@ -0,0 +1,285 @@
+# benchmarks/detection_bench.py
+#
+# Throughput, memory and accuracy of the typosquat detection engine
+# (analysis/detections.DetectionMethods via commands/rtuf.DomainScanner).
+#
+# A synthetic corpus is generated from the phishing names in domains-ng.csv (each
+# one becomes a template with the brand cut out) and the brands in brands.csv,
+# with typos, homoglyphs, hyphenation and punycode mixed in. The corpus is seeded,
+# so the same arguments always give the same domains. Run from the slack_bot
+# directory:
+#
+#   python -m benchmarks.detection_bench                    # timings + golden check
+#   python -m benchmarks.detection_bench --domains 50000    # bigger timing corpus
+#   python -m benchmarks.detection_bench --accept-changes   # after an intended change
+#
+# The golden check compares match sets (domain, target, method, score), not order,
+# and exits non-zero when they differ. detection_golden.jsonl is the output of the
+# original engine (commit 611f51e, before the automaton and skeleton rewrites) on
+# the golden corpus and is never regenerated. Intended behaviour changes since then
+# are listed per domain in detection_changes.jsonl: --accept-changes rewrites that
+# file from the current engine, and its diff is what gets reviewed.
+
+import argparse
+import csv
+import json
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.append('.')
+from analysis.data_tables import BRANDS_FILE, SUBSTITUTIONS_FILE
+from commands.rtuf import DomainScanner, METHODS
+
+DOMAINS_CSV = os.path.join('..', 'domains-ng.csv')
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), 'detection_golden.jsonl')
+CHANGES_FILE = os.path.join(os.path.dirname(__file__), 'detection_changes.jsonl')
+# The golden corpus is generate_corpus(brands, templates, homoglyphs, GOLDEN_DOMAINS, GOLDEN_SEED)
+GOLDEN_DOMAINS = 2000
+GOLDEN_SEED = 0
+
+TLDS = ('com', 'net', 'org', 'de', 'co.uk', 'info', 'top', 'com.br', 'io')
+FILLER = ('login', 'secure', 'account', 'verify', 'support', 'mail', 'online', 'app', 'my', 'id')
+MUTATIONS = ('clean', 'typo', 'homoglyph', 'punycode', 'hyphenation', 'negative')
+
+
+def read_brands(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return sorted({line.strip().lower() for line in f if line.strip()})
+
+
+def read_templates(path, anchor='paypal'):
+    """domains-ng.csv names with the brand cut out, e.g. payment-{brand}.de"""
+    templates = []
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if row and anchor in row[0]:
+                template = row[0].lower().replace('{', '').replace('}', '').replace(anchor, '{brand}', 1)
+                if '.' in template:
+                    templates.append(template.rsplit('.', 1)[0])
+    return templates
+
+
+def read_homoglyphs(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        subs = json.load(f)
+    return {char: sorted(s for s in subs[char] if len(s) == 1) for char in sorted(subs)}
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    kind = rng.choice(('insert', 'delete', 'replace', 'transpose'))
+    if kind == 'insert':
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if kind == 'delete' and len(word) > 3:
+        return word[:i] + word[i + 1:]
+    if kind == 'transpose' and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def homoglyph(word, homoglyphs, rng, ascii_only):
+    """Swap one or two characters for lookalikes: digits (valid in a hostname) or, for punycode, non-ASCII ones."""
+    def usable(sub):
+        return sub.isascii() and sub.isalnum() if ascii_only else not sub.isascii()
+
+    chars = list(word)
+    options = {i: [s for s in homoglyphs.get(c, ()) if usable(s)] for i, c in enumerate(chars)}
+    positions = [i for i in options if options[i]]
+    for i in rng.sample(positions, min(len(positions), rng.randint(1, 2))):
+        chars[i] = rng.choice(options[i])
+    return ''.join(chars)
+
+
+def punycode(label):
+    try:
+        return label.encode('idna').decode('ascii')
+    except UnicodeError:
+        return label
+
+
+def hyphenate(word, rng):
+    if len(word) < 4:
+        return f"{word}-{rng.choice(FILLER)}"
+    i = rng.randint(2, len(word) - 2)
+    return word[:i] + rng.choice(('-', '.')) + word[i:]
+
+
+def generate_corpus(brands, templates, homoglyphs, count, seed):
+    """Deterministic list of (domain, mutation) pairs."""
+    rng = random.Random(seed)
+    corpus = {}
+    while len(corpus) < count:
+        mutation = rng.choice(MUTATIONS)
+        brand = rng.choice(brands)
+        if mutation == 'typo':
+            brand = typo(brand, rng)
+        elif mutation == 'homoglyph':
+            brand = homoglyph(brand, homoglyphs, rng, ascii_only=True)
+        elif mutation == 'punycode':
+            brand = punycode(homoglyph(brand, homoglyphs, rng, ascii_only=False))
+        elif mutation == 'hyphenation':
+            brand = hyphenate(brand, rng)
+        elif mutation == 'negative':
+            brand = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+
+        if rng.random() < 0.5 and templates:
+            name = rng.choice(templates).format(brand=brand)
+        else:
+            name = rng.choice((f"{brand}", f"{brand}-{rng.choice(FILLER)}", f"{rng.choice(FILLER)}.{brand}"))
+        corpus.setdefault(f"{name}.{rng.choice(TLDS)}", mutation)
+    return list(corpus.items())
+
+
+def match_sets(scanner, domains):
+    """domain -> set of (target, method, score) from one scan_many pass."""
+    columns = scanner.scan_many(domains)
+    matches = {domain: set() for domain in domains}
+    for index, target, method, score in zip(columns.domain_index, columns.target, columns.method, columns.score):
+        matches[domains[index]].add((target, METHODS[method], round(score, 4)))
+    return matches
+
+
+def read_golden(path):
+    golden = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            golden[record['domain']] = {tuple(match) for match in record['matches']}
+    return golden
+
+
+def read_changes(path):
+    """domain -> (added, removed) match sets accepted on top of the golden output."""
+    changes = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                changes[record['domain']] = (
+                    {tuple(match) for match in record['added']},
+                    {tuple(match) for match in record['removed']}
+                )
+    return changes
+
+
+def write_changes(path, golden, current):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for domain in sorted(golden):
+            added, removed = current[domain] - golden[domain], golden[domain] - current[domain]
+            if added or removed:
+                record = {'domain': domain, 'added': sorted(added), 'removed': sorted(removed)}
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                count += 1
+    return count
+
+
+def expected_matches(golden, changes):
+    expected = {}
+    for domain, matches in golden.items():
+        added, removed = changes.get(domain, (set(), set()))
+        expected[domain] = (matches - removed) | added
+    return expected
+
+
+def check_golden(scanner, golden_path, changes_path):
+    golden = read_golden(golden_path)
+    expected = expected_matches(golden, read_changes(changes_path))
+    current = match_sets(scanner, list(golden))
+    changed = [domain for domain in golden if expected[domain] != current[domain]]
+    print(f"Golden check: {len(golden) - len(changed)}/{len(golden)} domains as expected")
+    for domain in changed[:20]:
+        print(f"  {domain}")
+        for match in sorted(expected[domain] - current[domain]):
+            print(f"    - {match}")
+        for match in sorted(current[domain] - expected[domain]):
+            print(f"    + {match}")
+    if len(changed) > 20:
+        print(f"  ... and {len(changed) - 20} more")
+    if changed:
+        print("If the change is intended, record it with --accept-changes and review the diff")
+    return not changed
+
+
+def measure(name, func, items):
+    start = time.perf_counter()
+    hits = sum(1 for item in items if func(item))
+    elapsed = time.perf_counter() - start
+
+    # Memory on a separate pass so tracing doesn't skew the timings
+    tracemalloc.start()
+    for item in items:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rate = len(items) / elapsed if elapsed else 0
+    print(f"{name:<24} {elapsed:8.3f}s {rate:10.0f} domains/s  {hits:7d} hits  peak {peak / 1024 / 1024:7.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and accuracy-check the detection engine.")
+    parser.add_argument('--domains', type=int, default=20000, help="Timing corpus size")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--brands', default=BRANDS_FILE)
+    parser.add_argument('--templates', default=DOMAINS_CSV)
+    parser.add_argument('--golden', default=GOLDEN_FILE)
+    parser.add_argument('--changes', default=CHANGES_FILE)
+    parser.add_argument('--accept-changes', action='store_true',
+                        help="Rewrite the accepted changes from the current engine's difference to the golden output")
+    parser.add_argument('--skip-timings', action='store_true')
+    args = parser.parse_args()
+
+    brands = read_brands(args.brands)
+    templates = read_templates(args.templates)
+    homoglyphs = read_homoglyphs(SUBSTITUTIONS_FILE)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    scanner = DomainScanner(set(brands))
+    build = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Scanner for {len(brands)} brands: built in {build:.3f}s, {retained / 1024 / 1024:.2f} MB\n")
+
+    if args.accept_changes:
+        golden = read_golden(args.golden)
+        count = write_changes(args.changes, golden, match_sets(scanner, list(golden)))
+        print(f"Wrote {count} changed domains to {args.changes}")
+        return
+
+    if not args.skip_timings:
+        corpus = generate_corpus(brands, templates, homoglyphs, args.domains, args.seed)
+        domains = [domain for domain, _ in corpus]
+        counts = {mutation: sum(1 for _, m in corpus if m == mutation) for mutation in MUTATIONS}
+        print(f"{len(domains)} domains: " + ', '.join(f"{m} {n}" for m, n in counts.items()) + '\n')
+
+        parts = [scanner.extract_domain_parts(domain)[0] for domain in domains]
+        parts = [p for p in parts if p]
+        # Each method on every domain, without scan_domain's fallback precedence
+        measure("direct", scanner.check_direct_match, parts)
+        measure("substitution", scanner.check_substitutions, parts)
+        measure("neighbor", scanner.check_neighboring_labels, parts)
+        measure("levenshtein", scanner.check_levenshtein_distance, parts)
+        measure("scan_domain", scanner.scan_domain, domains)
+
+        start = time.perf_counter()
+        columns = scanner.scan_many(domains)
+        elapsed = time.perf_counter() - start
+        print(f"{'scan_many':<24} {elapsed:8.3f}s {len(domains) / elapsed:10.0f} domains/s  {len(columns):7d} rows\n")
+
+    if not os.path.exists(args.golden):
+        print(f"No golden output at {args.golden}")
+        sys.exit(1)
+    if not check_golden(scanner, args.golden, args.changes):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
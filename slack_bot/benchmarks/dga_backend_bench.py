@@ -0,0 +1,128 @@
+# benchmarks/dga_backend_bench.py
+#
+# Parity and cost of the DGA model backends (analysis/dga_inference.py BACKENDS).
+# Parity compares the NumPy backend against the dgaintel probabilities recorded in
+# dga_prefilter_fixtures.tsv and, when dgaintel is installed, against TensorFlow
+# live on the fixtures plus random labels of every length. The benchmark loads each
+# backend in a fresh interpreter and reports model load time (NumPy itself is
+# already imported), latency per batch size and peak RSS. Run from the slack_bot
+# directory:
+#
+#   python -m benchmarks.dga_backend_bench               # parity, exits 1 on a mismatch
+#   python -m benchmarks.dga_backend_bench --bench       # plus latency and memory per backend
+
+import argparse
+import importlib.util
+import json
+import random
+import resource
+import string
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+from analysis.dga_inference import BACKENDS
+from benchmarks.dga_prefilter_report import FIXTURES, MODEL_CUTOFF, read_fixtures
+
+LIVE_TOLERANCE = 1e-5
+# The fixtures hold probabilities rounded to 4 places
+FIXTURE_TOLERANCE = 5e-5 + LIVE_TOLERANCE
+BATCH_SIZES = (1, 100, 500, 5000)
+
+
+def random_labels(count, seed=0):
+    rng = random.Random(seed)
+    symbols = string.ascii_lowercase + string.digits + '-_.' + 'AZé'
+    return [''.join(rng.choice(symbols) for _ in range(rng.randint(0, 82))) for _ in range(count)]
+
+
+def compare(name, expected, actual, tolerance):
+    difference = np.abs(np.asarray(expected) - np.asarray(actual))
+    flips = int(((np.asarray(expected) >= MODEL_CUTOFF) != (np.asarray(actual) >= MODEL_CUTOFF)).sum())
+    ok = difference.max() <= tolerance and not flips
+    print(f"{name:<36} {len(difference):6d} labels  max |diff| {difference.max():.2e}  "
+          f"mean {difference.mean():.2e}  flips at {MODEL_CUTOFF}: {flips}  {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def parity():
+    from analysis.dga_numpy import NumpyDGAModel
+    model = NumpyDGAModel()
+    rows = read_fixtures(FIXTURES)
+    labels = [row[0] for row in rows]
+    recorded = np.array([row[3] for row in rows])
+    ok = compare("numpy vs recorded dgaintel", recorded, model.predict(labels), FIXTURE_TOLERANCE)
+
+    if importlib.util.find_spec('dgaintel') is None:
+        print("dgaintel not installed, skipping the live TensorFlow comparison")
+        return ok
+    from dgaintel import get_prob
+    labels = labels + random_labels(3000) + ['a' * n for n in range(83)]
+    expected = [probability for _, probability in get_prob(labels, internal=True)]
+    return compare("numpy vs tensorflow (live)", expected, model.predict(labels), LIVE_TOLERANCE) and ok
+
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss would include the parent's peak from before it
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend):
+    """Runs in a fresh interpreter: load the backend, time each batch size, report peak RSS as JSON."""
+    from analysis import dga_inference
+    start = time.perf_counter()
+    dga_inference._init_worker(backend)
+    dga_inference._predict(['warmup'])
+    result = {'backend': backend, 'load': time.perf_counter() - start, 'latency': {}}
+    labels = random_labels(max(BATCH_SIZES), seed=1)
+    for size in BATCH_SIZES:
+        runs = max(1, 2000 // size)
+        start = time.perf_counter()
+        for _ in range(runs):
+            dga_inference._predict(labels[:size])
+        result['latency'][size] = (time.perf_counter() - start) / runs
+    result['max_rss_mb'] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def bench():
+    print(f"\n{'backend':<12} {'load':>8} " + ' '.join(f"{f'batch {size}':>12}" for size in BATCH_SIZES) + f" {'peak RSS':>10}")
+    for backend in BACKENDS:
+        if backend == 'tensorflow' and importlib.util.find_spec('dgaintel') is None:
+            print(f"{backend:<12} skipped, dgaintel not installed")
+            continue
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.dga_backend_bench', '--measure', backend],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        latencies = ' '.join(f"{result['latency'][str(size)] * 1000:10.1f}ms" for size in BATCH_SIZES)
+        print(f"{backend:<12} {result['load']:7.2f}s {latencies} {result['max_rss_mb']:7.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity and benchmark of the DGA model backends.")
+    parser.add_argument('--bench', action='store_true', help="Also measure load time, latency and memory per backend")
+    parser.add_argument('--measure', choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure)
+        return
+    ok = parity()
+    if args.bench:
+        bench()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
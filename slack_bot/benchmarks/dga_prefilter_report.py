@@ -0,0 +1,124 @@
+# benchmarks/dga_prefilter_report.py
+#
+# Recall of the DGA pre-filter (analysis/dga_prefilter.py) on the labeled fixture
+# set: which labels it would keep from the model, per family, and whether any label
+# the model flags (probability >= 0.97, the /dga cut-off) is dropped. Run from the
+# slack_bot directory:
+#
+#   python -m benchmarks.dga_prefilter_report                 # recall report, exits 1 below --min-recall
+#   python -m benchmarks.dga_prefilter_report --calibrate     # refit weights and threshold
+#
+# Calibration fits the logistic weights on half of the fixtures (split by label
+# hash) and reports recall on the other half.
+
+import argparse
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+sys.path.append('.')
+from analysis.dga_prefilter import FEATURES, LabelPreFilter, label_features, load_bigrams
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'dga_prefilter_fixtures.tsv')
+MODEL_CUTOFF = 0.97
+CALIBRATION_MARGIN = 0.5
+
+
+def read_fixtures(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or line.startswith('label\t'):
+                continue
+            label, family, is_dga, probability = line.rstrip('\n').split('\t')
+            rows.append((label, family, is_dga == '1', float(probability)))
+    return rows
+
+
+def recall(kept, mask):
+    return kept[mask].mean() if mask.any() else 1.0
+
+
+def report(rows, prefilter):
+    labels = [row[0] for row in rows]
+    families = np.array([row[1] for row in rows])
+    is_dga = np.array([row[2] for row in rows])
+    flagged = np.array([row[3] >= MODEL_CUTOFF for row in rows])
+    kept = prefilter.scores(labels) >= prefilter.threshold
+
+    print(f"{'family':<20} {'labels':>7} {'kept':>7} {'model flags':>12} {'flags kept':>11}")
+    for family in dict.fromkeys(families):
+        m = families == family
+        flags_kept = f"{recall(kept, m & flagged):.1%}" if (m & flagged).any() else '-'
+        print(f"{family:<20} {m.sum():7d} {kept[m].mean():7.1%} {flagged[m].sum():12d} {flags_kept:>11}")
+
+    model_recall = recall(kept, flagged)
+    print(f"\nRecall on model-flagged labels: {model_recall:.2%} ({(kept & flagged).sum()}/{flagged.sum()})")
+    print(f"Recall on labeled DGAs:         {recall(kept, is_dga):.2%}")
+    print(f"Benign labels filtered out:     {1 - kept[~is_dga].mean():.1%}")
+    print(f"Labels sent to the model:       {kept.mean():.1%}")
+    for label in [l for l, k, f in zip(labels, kept, flagged) if f and not k][:20]:
+        print(f"  dropped: {label}")
+    return model_recall
+
+
+def calibrate(rows, bigrams, steps=5000, rate=0.1):
+    labels = [row[0] for row in rows]
+    X = label_features(labels, bigrams)
+    y = np.array([row[3] >= MODEL_CUTOFF for row in rows], dtype=float)
+    fit = np.array([zlib.crc32(label.encode('utf-8')) % 2 == 0 for label in labels])
+
+    # Logistic regression on standardized features, then folded back to raw units
+    mean, std = X[fit].mean(axis=0), X[fit].std(axis=0)
+    Z = (X[fit] - mean) / std
+    w = np.zeros(X.shape[1])
+    b = 0.0
+    for _ in range(steps):
+        p = 1 / (1 + np.exp(-(Z @ w + b)))
+        gradient = p - y[fit]
+        w -= rate * (Z.T @ gradient / len(Z) + 0.001 * w)
+        b -= rate * gradient.mean()
+    weights = w / std
+    bias = b - (mean * weights).sum()
+
+    scores = X @ weights + bias
+    threshold = scores[fit & (y == 1)].min() - CALIBRATION_MARGIN
+    print("Fitted on half of the fixtures:")
+    print(f"  DEFAULT_WEIGHTS = ({', '.join(f'{v:.4f}' for v in weights)})  # {', '.join(FEATURES)}")
+    print(f"  DEFAULT_BIAS = {bias:.4f}")
+    print(f"  DEFAULT_THRESHOLD = {threshold:.4f}")
+    held_out = ~fit & (y == 1)
+    print(f"  held-out recall on model-flagged labels: {(scores[held_out] >= threshold).mean():.2%}\n")
+    return LabelPreFilter(weights, bias, threshold, bigrams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall report for the DGA pre-filter.")
+    parser.add_argument('--fixtures', default=FIXTURES)
+    parser.add_argument('--calibrate', action='store_true', help="Refit weights and threshold on the fixtures")
+    parser.add_argument('--min-recall', type=float, default=1.0, help="Fail below this recall on model-flagged labels")
+    parser.add_argument('--timing', type=int, default=200000, help="Labels for the throughput run (0 to skip)")
+    args = parser.parse_args()
+
+    rows = read_fixtures(args.fixtures)
+    bigrams = load_bigrams()
+    prefilter = calibrate(rows, bigrams) if args.calibrate else LabelPreFilter(bigrams=bigrams)
+
+    model_recall = report(rows, prefilter)
+
+    if args.timing:
+        labels = [rows[i % len(rows)][0] for i in range(args.timing)]
+        start = time.perf_counter()
+        prefilter.split(labels)
+        elapsed = time.perf_counter() - start
+        print(f"\nFiltered {len(labels)} labels in {elapsed:.3f}s ({len(labels) / elapsed:.0f} labels/s)")
+
+    if model_recall < args.min_recall:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
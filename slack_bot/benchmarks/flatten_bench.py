@@ -0,0 +1,117 @@
+# benchmarks/flatten_bench.py
+#
+# Compares utils.flatten_utils.flatten against the recursive flatteners it replaced,
+# on saved Iris Investigate responses. Run from the slack_bot directory:
+#
+#   python -m benchmarks.flatten_bench iris_response.json [more.json ...] --repeat 20
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.append('.')
+from utils.flatten_utils import flatten, IRIS_STYLE, ELASTIC_STYLE
+
+
+def legacy_flatten_json(y, prefix='', max_list_elements=10):
+    out = {}
+
+    def _flatten(x, name=''):
+        if isinstance(x, dict):
+            for key in x:
+                _flatten(x[key], f"{name}{key}_")
+        elif isinstance(x, list):
+            for i, item in enumerate(x[:max_list_elements]):
+                _flatten(item, f"{name}{i}_")
+        else:
+            out[name[:-1]] = x
+
+    _flatten(y, prefix)
+    return out
+
+
+def legacy_remove_empty_or_none(d):
+    if not isinstance(d, (dict, list)):
+        return d
+    if isinstance(d, list):
+        return [v for v in (legacy_remove_empty_or_none(v) for v in d) if v]
+    return {k: v for k, v in ((k, legacy_remove_empty_or_none(v)) for k, v in d.items()) if v}
+
+
+def legacy_flatten_list_fields(data, parent_key=''):
+    items = {}
+    for k, v in data.items():
+        new_key = f"{parent_key}.{k}" if parent_key else k
+        if isinstance(v, list):
+            for idx, item in enumerate(v, start=1):
+                if idx > 5:
+                    break
+                if isinstance(item, dict):
+                    items.update(legacy_flatten_list_fields(item, f"{new_key}{idx}"))
+                else:
+                    items[f"{new_key}{idx}"] = item
+        elif isinstance(v, dict):
+            items.update(legacy_flatten_list_fields(v, new_key))
+        else:
+            items[new_key] = v
+    return items
+
+
+def load_results(paths):
+    """Accepts raw Iris API responses, JSON lists of results, or NDJSON of results."""
+    results = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            results.extend(json.loads(line) for line in text.splitlines() if line.strip())
+            continue
+        if isinstance(data, dict):
+            data = data.get('response', data).get('results', [data])
+        results.extend(data)
+    return results
+
+
+def measure(name, func, results, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        flattened = [func(result) for result in results]
+    elapsed = time.perf_counter() - start
+
+    # Memory is measured on a separate pass so tracing doesn't skew the timings
+    del flattened
+    tracemalloc.start()
+    flattened = [func(result) for result in results]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_sec = len(results) * repeat / elapsed if elapsed else 0
+    print(f"{name:<42} {elapsed:8.3f}s {per_sec:10.0f} results/s  "
+          f"retained {retained / 1024 / 1024:7.2f} MB  peak {peak / 1024 / 1024:7.2f} MB")
+    return flattened
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Iris result flatteners.")
+    parser.add_argument('payloads', nargs='+', help="Saved Iris Investigate responses")
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    results = load_results(args.payloads)
+    print(f"Loaded {len(results)} Iris results, {args.repeat} passes each\n")
+
+    old = measure("legacy flatten_json (a_0_b)", legacy_flatten_json, results, args.repeat)
+    new = measure("flatten IRIS_STYLE", lambda r: flatten(r, IRIS_STYLE), results, args.repeat)
+    print(f"  identical output: {old == new}\n")
+
+    old = measure("legacy remove_empty + flatten_list_fields", lambda r: legacy_flatten_list_fields(legacy_remove_empty_or_none(r)), results, args.repeat)
+    new = measure("flatten ELASTIC_STYLE (a.b1)", lambda r: flatten(r, ELASTIC_STYLE), results, args.repeat)
+    print(f"  identical output: {old == new}")
+
+
+if __name__ == '__main__':
+    main()
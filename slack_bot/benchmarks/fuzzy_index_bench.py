@@ -0,0 +1,106 @@
+# benchmarks/fuzzy_index_bench.py
+#
+# check_levenshtein_distance's full label x target scan against the deletion index,
+# for growing target sets (brands.csv padded with synthetic brand-like terms).
+# Run from the slack_bot directory:
+#
+#   python -m benchmarks.fuzzy_index_bench --labels 20000 --terms 200 1000 5000
+
+import argparse
+import random
+import string
+import sys
+import time
+
+import jellyfish
+
+sys.path.append('.')
+from analysis.fuzzy_index import DeletionIndex
+from analysis.data_tables import BRANDS_FILE
+
+
+
+def read_brands(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+
+def synthetic_terms(brands, count, rng):
+    terms = list(dict.fromkeys(brands))[:count]
+    while len(terms) < count:
+        term = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def synthetic_labels(terms, count, rng):
+    """Mostly random labels, some of them one or two edits away from a term."""
+    labels = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            label = list(rng.choice(terms))
+            for _ in range(rng.randint(1, 2)):
+                i = rng.randrange(len(label))
+                label[i] = rng.choice(string.ascii_lowercase)
+            labels.append(''.join(label))
+        else:
+            labels.append(''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(rng.randint(2, 16))))
+    return labels
+
+
+def legacy_scan(labels, terms, max_distance):
+    results = []
+    for label in labels:
+        for target in terms:
+            distance = jellyfish.levenshtein_distance(label, target)
+            if distance <= max_distance:
+                results.append((target, label, 1 - distance / max(len(label), len(target))))
+    return results
+
+
+def indexed_scan(labels, index, max_distance):
+    results = []
+    for label in labels:
+        for target in index.candidates(label):
+            distance = jellyfish.levenshtein_distance(label, target)
+            if distance <= max_distance:
+                results.append((target, label, 1 - distance / max(len(label), len(target))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Levenshtein deletion index.")
+    parser.add_argument('--labels', type=int, default=20000)
+    parser.add_argument('--terms', type=int, nargs='+', default=[200, 1000, 5000])
+    parser.add_argument('--max-distance', type=int, default=2)
+    parser.add_argument('--brands', default=BRANDS_FILE)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    brands = read_brands(args.brands)
+
+    for count in args.terms:
+        terms = synthetic_terms(brands, count, rng)
+        labels = synthetic_labels(terms, args.labels, rng)
+
+        start = time.perf_counter()
+        index = DeletionIndex(terms, args.max_distance)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        old = legacy_scan(labels, terms, args.max_distance)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = indexed_scan(labels, index, args.max_distance)
+        new_time = time.perf_counter() - start
+
+        print(f"{count:>6} terms x {len(labels)} labels: full scan {old_time:7.3f}s  "
+              f"index {new_time:7.3f}s (+{build:.3f}s build)  "
+              f"speedup {old_time / new_time:5.1f}x  identical output: {old == new}")
+
+
+if __name__ == '__main__':
+    main()
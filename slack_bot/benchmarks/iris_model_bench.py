@@ -0,0 +1,56 @@
+# benchmarks/iris_model_bench.py
+#
+# Memory and projection cost of the lazy Iris model against the flattened dicts the
+# bot used to keep per domain. Run from the slack_bot directory:
+#
+#   python -m benchmarks.iris_model_bench iris_response.json [more.json ...]
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+sys.path.append('.')
+from benchmarks.flatten_bench import load_results
+from models.iris_investigate_models import IrisInvestigateResponse
+from utils.flatten_utils import flatten_json
+
+
+def measure(name, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<36} {elapsed:8.3f}s  retained {retained / 1024 / 1024:8.2f} MB")
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lazy Iris result model.")
+    parser.add_argument('payloads', nargs='+', help="Saved Iris Investigate responses")
+    args = parser.parse_args()
+
+    # Decode from JSON text each time so the raw dicts are counted against each layout
+    raw_text = json.dumps(load_results(args.payloads))
+    print(f"{len(json.loads(raw_text))} Iris results\n")
+
+    flattened = measure("flattened dicts (flatten_json)", lambda: [flatten_json(r) for r in json.loads(raw_text)])
+    model = measure("IrisInvestigateResponse (lazy)", lambda: IrisInvestigateResponse.from_dict({'results': json.loads(raw_text)}))
+
+    start = time.perf_counter()
+    flat_scores = {r.get('domain'): r.get('domain_risk_risk_score') for r in flattened}
+    flat_ips = {r.get('domain'): [v for k, v in r.items() if k.startswith('ip_') and k.endswith('_address_value')] for r in flattened}
+    print(f"\nflattened projections   {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    model_scores = model.risk_scores()
+    model_ips = model.ip_addresses()
+    print(f"model projections       {time.perf_counter() - start:8.3f}s")
+    print(f"identical projections: {flat_scores == model_scores and flat_ips == model_ips}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/label_trie_bench.py
+#
+# Memory and build time of analysis/label_trie.LabelTrie against the two subdomain
+# trees it replaced: subdomain_finder's Node (a __dict__, a children dict and an
+# rdata set per label) and /subdomains' nested plain dicts. The names are synthetic
+# passive DNS records with the shape of real zones: a long tail of small domains,
+# common labels (www, mail, _dmarc) repeated under many parents, a few wildcard-
+# heavy zones with huge fan-out, and addresses shared between names. Run from the
+# slack_bot directory:
+#
+#   python -m benchmarks.label_trie_bench                  # 1M names
+#   python -m benchmarks.label_trie_bench --names 200000
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.append('.')
+from analysis.label_trie import LabelTrie
+
+COMMON_LABELS = ['www', 'mail', 'api', 'cdn', 'm', 'dev', 'staging', 'test', 'vpn', 'remote', 'autodiscover',
+                 '_dmarc', '_domainkey', 'selector1', 'smtp', 'ns1', 'ns2', 'app', 'static', 'img', 'eu', 'us']
+
+
+def generate_lines(count, seed=0):
+    """DNSDB-style NDJSON lines: (queried domain, line)."""
+    rng = random.Random(seed)
+    domains = [f"{''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))}.com" for _ in range(2000)]
+    wildcard_zones = domains[:3]
+    addresses = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}" for _ in range(50000)]
+    lines = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            # Wildcard zone: one random label per name
+            domain = rng.choice(wildcard_zones)
+            labels = [''.join(rng.choice('0123456789abcdef') for _ in range(12))]
+        else:
+            domain = domains[min(int(rng.paretovariate(1.2)) - 1, len(domains) - 1)]
+            labels = [rng.choice(COMMON_LABELS) if rng.random() < 0.5 else
+                      ''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(rng.randint(3, 15)))
+                      for _ in range(rng.choice((1, 1, 2, 2, 3, 4)))]
+        obj = {
+            'rrname': '.'.join(labels + [domain]) + '.',
+            'rrtype': 'A',
+            'rdata': [rng.choice(addresses) for _ in range(rng.choice((1, 1, 2)))],
+            'count': rng.randint(1, 1000),
+            'time_last': rng.randint(1_600_000_000, 1_700_000_000),
+        }
+        lines.append((domain, json.dumps({'obj': obj})))
+    return lines
+
+
+def parse(lines):
+    """Decoded the way process_response does, so every tree holds freshly parsed strings."""
+    for domain, line in lines:
+        obj = json.loads(line)['obj']
+        labels = obj['rrname'].rstrip('.')[:-(len(domain) + 1)].split('.')
+        yield domain, labels, obj['count'], obj['rdata'], obj['time_last']
+
+
+class LegacyNode:
+    """analysis/subdomain_finder.Node before LabelTrie."""
+    def __init__(self, name):
+        self.name = name
+        self.children = {}
+        self.rdata = set()
+        self.count = 0
+        self.is_leaf = True
+        self.time_last = 0
+
+
+def build_legacy_nodes(lines):
+    tree = {}
+    for domain, labels, count, rdata, time_last in parse(lines):
+        current_node = tree.get(domain) or tree.setdefault(domain, LegacyNode(domain))
+        node_path = [current_node]
+        for label in reversed(labels):
+            current_node.is_leaf = False
+            if label not in current_node.children:
+                current_node.children[label] = LegacyNode(label)
+            current_node = current_node.children[label]
+            node_path.append(current_node)
+        current_node.rdata.update(rdata)
+        for node in node_path:
+            node.count += count
+        if time_last > current_node.time_last:
+            current_node.time_last = time_last
+    return tree
+
+
+def build_legacy_dicts(lines):
+    """commands/subdomains.build_subdomain_tree before LabelTrie (names only)."""
+    tree = {}
+    for domain, labels, _, _, _ in parse(lines):
+        node = tree
+        for label in reversed(labels + [domain]):
+            if label not in node:
+                node[label] = {}
+            node = node[label]
+    return tree
+
+
+def build_trie(lines):
+    trie = LabelTrie()
+    for domain, labels, count, rdata, time_last in parse(lines):
+        trie.insert(domain, labels, count, rdata, time_last)
+    return trie
+
+
+def build_trie_names(lines):
+    trie = LabelTrie()
+    for domain, labels, _, _, _ in parse(lines):
+        trie.insert(domain, labels)
+    return trie
+
+
+def measure(name, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<40} {elapsed:8.2f}s  retained {retained / 1024 / 1024:8.1f} MB")
+    return built
+
+
+def count_nodes(nodes, children):
+    total = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(children(node))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LabelTrie against the legacy subdomain trees.")
+    parser.add_argument('--names', type=int, default=1_000_000, help="Passive DNS records to insert")
+    args = parser.parse_args()
+
+    lines = generate_lines(args.names)
+    print(f"{len(lines)} records\n")
+
+    legacy = measure("Node tree (subdomain_finder, full)", lambda: build_legacy_nodes(lines))
+    legacy_nodes = count_nodes(legacy.values(), lambda node: node.children.values())
+    del legacy
+    trie = measure("LabelTrie (full)", lambda: build_trie(lines))
+    trie_nodes = count_nodes(trie.roots.values(), lambda node: node.children())
+    del trie
+
+    legacy = measure("nested dicts (/subdomains, names)", lambda: build_legacy_dicts(lines))
+    dict_nodes = count_nodes(legacy.values(), lambda node: node.values())
+    del legacy
+    trie = measure("LabelTrie (names)", lambda: build_trie_names(lines))
+    del trie
+
+    print(f"\n{trie_nodes} nodes")
+    if not legacy_nodes == trie_nodes == dict_nodes:
+        print(f"Node counts differ: Node tree {legacy_nodes}, nested dicts {dict_nodes}, LabelTrie {trie_nodes}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/public_suffix_report.py
+#
+# Correctness and speed of the Public Suffix List trie (utils/public_suffix.py).
+# Checks PublicSuffixTrie.split against the fixtures, including the malformed names
+# (empty labels) that show up in raw feeds, then times split over a file of names.
+# Run from the slack_bot directory:
+#
+#   python -m benchmarks.public_suffix_report                  # fixture check, exits 1 on a mismatch
+#   python -m benchmarks.public_suffix_report --names feed.txt # plus split timings, one name per line
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append('.')
+from utils.public_suffix import load_public_suffixes
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'public_suffix_fixtures.tsv')
+
+
+def read_fixtures(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or line.startswith('name\t'):
+                continue
+            name, include_private, subdomain, domain, suffix = line.rstrip('\n').split('\t')
+            rows.append((name, include_private == '1', (subdomain, domain, suffix)))
+    return rows
+
+
+def check_fixtures(trie, rows):
+    failures = 0
+    for name, include_private, expected in rows:
+        try:
+            got = tuple(trie.split(name, include_private))
+        except Exception as e:
+            got = f"{type(e).__name__}: {e}"
+        if got != expected:
+            failures += 1
+            print(f"  {name!r} (include_private={include_private}): expected {expected}, got {got}")
+    print(f"Fixture check: {len(rows) - failures}/{len(rows)} names split as expected")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the Public Suffix List trie.")
+    parser.add_argument('--fixtures', default=FIXTURES)
+    parser.add_argument('--names', help="File with one name per line to time split over")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trie = load_public_suffixes()
+    print(f"PSL {trie.version}: {len(trie)} rules loaded in {time.perf_counter() - start:.3f}s\n")
+
+    ok = check_fixtures(trie, read_fixtures(args.fixtures))
+
+    if args.names:
+        with open(args.names, 'r', encoding='utf-8') as f:
+            names = [line.strip() for line in f if line.strip()]
+        start = time.perf_counter()
+        for name in names:
+            trie.split(name)
+        elapsed = time.perf_counter() - start
+        print(f"\nsplit: {len(names)} names in {elapsed:.3f}s, {len(names) / elapsed if elapsed else 0:.0f} names/s")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+# commands/brandscan.py
+
+from slack_sdk.errors import SlackApiError
+from slack_bolt.async_app import AsyncApp
+from utils.validation_utils import is_valid_domain
+from utils.api_utils import query_dnsdb_flex_rrnames
+from utils.public_suffix import load_public_suffixes
+import aiohttp
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+MAX_CANDIDATES = 100000
+LABEL_CHAR = '[a-z0-9]'  # any one character of a hyphen-split label
+SUMMARY_LIMIT = 20
+
+def register_brandscan_command(app: AsyncApp):
+
+    @app.command("/brandscan")
+    async def handle_brandscan_command(ack, say, command, client, logger):
+        await ack()
+
+        channel_id = command['channel_id']
+
+        # Try to join the channel if not already in it
+        if not await ensure_bot_in_channel(client, channel_id, say):
+            return
+
+        text = command['text'].strip().lower()
+
+        if not text:
+            await say("Please provide a domain or brand term. Usage: /brandscan <domain-or-term>")
+            return
+
+        if not is_valid_domain(text):
+            await say(f"'{text}' is not a valid domain or term.")
+            return
+
+        # A domain is scanned for lookalikes of its registrable label (paypal.co.uk -> paypal)
+        own_domain = None
+        term = text
+        if '.' in text:
+            parts = load_public_suffixes().split(text, include_private=False)
+            if not parts.domain:
+                await say(f"'{text}' is a public suffix, not a registrable domain.")
+                return
+            term, own_domain = parts.domain, parts.registered_domain
+
+        if len(term) < 3:
+            await say(f"The term '{term}' is too short to scan for.")
+            return
+
+        try:
+            from config import BRANDSCAN_NOD_FILE
+            tables = app.data_tables.tables
+            if BRANDSCAN_NOD_FILE:
+                loop = asyncio.get_running_loop()
+                candidates = await loop.run_in_executor(None, read_nod_file, BRANDSCAN_NOD_FILE)
+                source = os.path.basename(BRANDSCAN_NOD_FILE)
+            else:
+                candidates = await get_dnsdb_candidates(term, tables.substitutions)
+                source = 'DNSDB'
+
+            candidates = [name for name in candidates if not is_own_name(name, own_domain)]
+            if not candidates:
+                await say(f"No candidate names found in {source} for '{term}'.")
+                return
+
+            results = await app.scanner_pool.scan(candidates, [term], tables.version)
+
+            if not results:
+                await say(f"Scanned {len(candidates)} names from {source}: no lookalikes of '{term}' found.")
+                return
+
+            results.sort(key=lambda result: result[1][0][2], reverse=True)
+            lines = [format_result(domain, matches) for domain, matches in results]
+
+            summary = f"*Found {len(results)} lookalikes of '{term}' in {len(candidates)} names from {source}.*\n"
+            summary += "```" + "\n".join(lines[:SUMMARY_LIMIT]) + "```"
+            await say(summary)
+
+            # Full list as a file when it doesn't fit the message
+            if len(lines) > SUMMARY_LIMIT:
+                fd, path = tempfile.mkstemp(suffix='.txt')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        f.write("\n".join(lines) + "\n")
+                    with open(path, 'rb') as file_content:
+                        await client.files_upload_v2(
+                            channels=channel_id,
+                            file=file_content,
+                            filename=f"brandscan_{term}.txt",
+                            title=f"Brandscan results for {term}",
+                            initial_comment=f"All {len(results)} lookalikes of '{term}':"
+                        )
+                finally:
+                    os.remove(path)
+
+        except Exception as e:
+            logger.error(f"Error in /brandscan command: {e}")
+            await say(f"An error occurred during the brand scan: {str(e)}")
+
+    async def ensure_bot_in_channel(client, channel_id, say):
+        try:
+            await client.chat_postMessage(channel=channel_id, text="Processing your request. This may take a few moments...")
+            return True
+        except SlackApiError as e:
+            if e.response['error'] == 'not_in_channel':
+                if await join_channel(client, channel_id):
+                    await client.chat_postMessage(channel=channel_id, text="I've joined the channel. Processing your request. This may take a few moments...")
+                    return True
+                else:
+                    await say("I couldn't join the channel. Please add me to this channel and try again.")
+                    return False
+            else:
+                await say(f"An error occurred: {str(e)}")
+                return False
+
+    async def join_channel(client, channel_id):
+        try:
+            await client.conversations_join(channel=channel_id)
+            return True
+        except SlackApiError as e:
+            print(f"Error joining channel: {e}")
+            return False
+
+    async def get_dnsdb_candidates(term, substitutions):
+        """
+        Names seen in DNSDB in the last 30 days containing the term (any character
+        may be one of its ASCII lookalikes), or with a label one edit from it.
+        """
+        from config import DNSDB_API_KEY
+
+        time_last_after = int(time.time()) - 30 * 24 * 60 * 60
+
+        async with aiohttp.ClientSession() as session:
+            records = await query_dnsdb_flex_rrnames(
+                session,
+                DNSDB_API_KEY,
+                lookalike_regex(term, substitutions),
+                limit=MAX_CANDIDATES,
+                time_last_after=time_last_after
+            )
+        return list(dict.fromkeys(record.rrname for record in records if record.rrname))
+
+    def read_nod_file(path):
+        """Newly observed domains, one per line as a bare name or an NDJSON object."""
+        names = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('{'):
+                    record = json.loads(line)
+                    line = record.get('domain') or record.get('rrname') or ''
+                line = line.rstrip('.').lower()
+                if line:
+                    names.append(line)
+                if len(names) >= MAX_CANDIDATES:
+                    break
+        return list(dict.fromkeys(names))
+
+    def is_own_name(name, own_domain):
+        return own_domain is not None and (name == own_domain or name.endswith('.' + own_domain))
+
+    def format_result(domain, matches):
+        target, description, score = matches[0]
+        return f"{domain}  {score:.2f}  {description}"
+
+
+def lookalike_regex(term, substitutions):
+    """
+    DNSDB regex for names worth scanning for the term:
+    - the term anywhere, with any letter swapped for one of its ASCII lookalikes:
+      paypal -> [p][a4][y][p][a4][l1]
+    - a whole label one edit away (a letter replaced, inserted, deleted, or two
+      neighbours transposed), so the Levenshtein check has candidates:
+      pypal, paypa1l, paypla
+    Labels are delimited by dots and hyphens, as the scanner splits them.
+    """
+    classes = []
+    for char in term:
+        options = [char] + sorted(s for s in substitutions.get(char, ()) if len(s) == 1 and s.isascii() and s.isalnum() and s != char)
+        classes.append('[' + ''.join(options) + ']')
+
+    edits = []
+    for i in range(len(classes) + 1):
+        edits.append(classes[:i] + [LABEL_CHAR] + classes[i:])  # inserted
+    for i in range(len(classes)):
+        edits.append(classes[:i] + [LABEL_CHAR] + classes[i + 1:])  # replaced
+        edits.append(classes[:i] + classes[i + 1:])  # deleted
+        if i + 1 < len(classes):
+            edits.append(classes[:i] + [classes[i + 1], classes[i]] + classes[i + 2:])  # transposed
+    edit_alternatives = '|'.join(dict.fromkeys(''.join(edit) for edit in edits))
+    return f"{''.join(classes)}|(^|[.-])({edit_alternatives})[.-]"
@@ -4,6 +4,7 @@ from slack_sdk.errors import SlackApiError
 from slack_bolt.async_app import AsyncApp
 from utils.validation_utils import is_valid_domain
 from utils.api_utils import query_dnsdb_rrset_name
+from analysis.dga_inference import subdomain_labels
 from models.dnsdb_models import DnsdbRecord
 import aiohttp
 import time
@@ -14,11 +15,9 @@ from slack_sdk.models.blocks import (
     DividerBlock,
 )
 from slack_sdk.models.views import View
-from dgaintel import get_prob 
 import os
 import asyncio
 import aiofiles
-from functools import lru_cache
 def register_dga_command(app: AsyncApp):
 
     @app.command("/dga")
@@ -144,77 +143,46 @@ def register_dga_command(app: AsyncApp):
 
             return list(rrnames)
     async def analyze_domains_with_dgaintel(domains):
-        MAX_LABEL_LENGTH = 82  # Limit label length to 82 characters
-
-        # Load and cache known good labels
-        known_good_labels = load_known_good_labels()
+        # Known good labels from the watched data directory
+        known_good_labels = app.data_tables.tables.known_good_labels
 
         labels_to_analyze = set()
         domain_label_map = {}  # Map labels back to their domains
 
         for domain in domains:
-            labels = domain.split('.')
-            subdomain_labels = labels[:-2] if len(labels) >= 2 else []
-
-            for label in subdomain_labels:
-                label_lower = label.lower()
-                if (not label.startswith('_') and
-                    len(label) <= MAX_LABEL_LENGTH and
-                    label_lower not in known_good_labels):
-                    labels_to_analyze.add(label)
-                    domain_label_map.setdefault(label, set()).add(domain)
+            for label in subdomain_labels(domain, known_good_labels):
+                labels_to_analyze.add(label)
+                domain_label_map.setdefault(label, set()).add(domain)
 
         labels_to_analyze = list(labels_to_analyze)
 
-        # Prepare log entries
-        log_entries = ['Label\tProbability\tDomains\n']
-
-        batch_size = 500
-        batches = [labels_to_analyze[i:i + batch_size] for i in range(0, len(labels_to_analyze), batch_size)]
+        # Labels scored on an earlier run come from the cache; only new ones go to the model
+        loop = asyncio.get_running_loop()
+        cached, unseen = await loop.run_in_executor(None, app.dga_cache.get_many, labels_to_analyze)
 
-        # Use asyncio to process batches concurrently
-        tasks = [process_batch(batch, domain_label_map) for batch in batches]
-        batch_results = await asyncio.gather(*tasks)
+        # Labels that read like words or ordinary host names skip the model
+        filtered = []
+        if app.dga_prefilter is not None:
+            unseen, filtered = app.dga_prefilter.split(unseen)
 
-        suspected_dgas = []
-        for batch_dgas, batch_logs in batch_results:
-            suspected_dgas.extend(batch_dgas)
-            log_entries.extend(batch_logs)
+        # Score on the shared inference workers, batched with any concurrent /dga requests
+        scored = await app.dga_service.score(unseen)
+        if scored:
+            await loop.run_in_executor(None, app.dga_cache.put_many, scored)
+        results = list(cached.items()) + scored
 
-        # Write all log entries at once
-        async with aiofiles.open('prob_log.txt', 'w') as f:
-            await f.writelines(log_entries)
-
-        return suspected_dgas
+        # Prepare log entries
+        total = len(labels_to_analyze)
+        hit_ratio = len(cached) / total if total else 0.0
+        log_entries = [
+            f"# Cache hits: {len(cached)}/{total} ({hit_ratio:.1%}), pre-filtered: {len(filtered)}, scored: {len(scored)}, model: {app.dga_cache.model_version}\n",
+            'Label\tProbability\tDomains\n'
+        ]
 
-    async def process_batch(batch, domain_label_map):
         suspected_dgas = []
-        log_entries = []
-
-        # Run get_prob in a thread to avoid blocking the event loop
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(None, get_prob, batch)
-
-        if isinstance(results, list):
-            for label, probability in results:
-                probability = float(probability)
-                domains = ', '.join(domain_label_map.get(label, []))
-                log_entries.append(f"{label}\t{probability:.4f}\t{domains}\n")
-
-                if probability >= 0.97:
-                    dga_type = classify_dga_type(probability)
-                    for domain in domain_label_map.get(label, []):
-                        suspected_dgas.append({
-                            'domain': domain,
-                            'label': label,
-                            'probability': round(probability, 4),
-                            'dga_type': dga_type
-                        })
-        else:
-            label = batch[0]
-            probability = float(results)
-            domains = ', '.join(domain_label_map.get(label, []))
-            log_entries.append(f"{label}\t{probability:.4f}\t{domains}\n")
+        for label, probability in results:
+            label_domains = ', '.join(domain_label_map.get(label, []))
+            log_entries.append(f"{label}\t{probability:.4f}\t{label_domains}\n")
 
             if probability >= 0.97:
                 dga_type = classify_dga_type(probability)
@@ -226,21 +194,15 @@ def register_dga_command(app: AsyncApp):
                         'dga_type': dga_type
                     })
 
-        return suspected_dgas, log_entries
+        for label in filtered:
+            label_domains = ', '.join(domain_label_map.get(label, []))
+            log_entries.append(f"{label}\t-\t{label_domains}\n")
 
-    @lru_cache(maxsize=1)
-    def load_known_good_labels():
-        """
-        Loads known good labels from the 'known_good_labels.txt' file.
-        Returns a set of labels.
-        """
-        try:
-            with open('known_good_labels.txt', 'r') as file:
-                labels = {label.strip().lower() for label in file if label.strip()}
-                return labels
-        except Exception as e:
-            print(f"Error loading known good labels: {e}")
-            return set()
+        # Write all log entries at once
+        async with aiofiles.open('prob_log.txt', 'w') as f:
+            await f.writelines(log_entries)
+
+        return suspected_dgas
 
     def classify_dga_type(probability):
         """
@@ -0,0 +1,151 @@
+# commands/dga_bulk.py
+#
+# Offline DGA scoring for NDJSON domain feeds, for volumes too large for /dga.
+# Subdomain labels are extracted the same way /dga does, deduplicated across the
+# whole feed and scored in large batches on worker processes that each load the
+# DGA model once. One JSONL record per distinct label is written as its batch
+# completes:
+#
+#   {"label": "qw7xrt92p", "probability": 0.9945, "domain": "qw7xrt92p.example.com", "cached": false}
+#
+# where domain is the first domain the label was seen in.
+#
+#   python dga_bulk.py feed.ndjson -o dga_scores.jsonl --workers 4
+#   python dga_bulk.py - --cache dga_label_cache.sqlite3 --min-probability 0.97 < feed.ndjson
+
+import sys
+sys.path.append('..')
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Tuple
+from tqdm import tqdm
+from analysis.data_tables import KNOWN_GOOD_LABELS_FILE, load_terms
+from analysis.dga_inference import BACKENDS, DEFAULT_BACKEND, _init_worker, _predict, model_version, subdomain_labels
+
+DEFAULT_OUTPUT = 'dga_scores.jsonl'
+DEFAULT_BATCH_SIZE = 10000
+
+def read_lines(path):
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        yield from f
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def iter_label_batches(lines, batch_size: int, known_good_labels, stats: Dict[str, int]) -> Iterator[Dict[str, str]]:
+    """
+    Batches of labels not seen earlier in the feed, as {label: first domain}. Only
+    the labels themselves are remembered across batches, so memory grows with the
+    number of distinct labels rather than with the feed.
+    """
+    seen = set()
+    batch = {}
+    for line in lines:
+        try:
+            domain = json.loads(line).get('domain')
+        except (json.JSONDecodeError, AttributeError):
+            print(f"Skipping malformed line: {line.strip()[:200]}", file=sys.stderr)
+            continue
+        if not domain:
+            continue
+        stats['domains'] += 1
+        for label in subdomain_labels(domain, known_good_labels):
+            if label not in seen:
+                seen.add(label)
+                batch[label] = domain
+        if len(batch) >= batch_size:
+            yield batch
+            batch = {}
+    if batch:
+        yield batch
+
+def write_scores(outfile, batch: Dict[str, str], scores: List[Tuple[str, float]], min_probability: float, cached: bool) -> int:
+    written = 0
+    for label, probability in scores:
+        if probability < min_probability:
+            continue
+        record = {'label': label, 'probability': round(probability, 4), 'domain': batch[label], 'cached': cached}
+        outfile.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        written += 1
+    return written
+
+def score_feed(args):
+    known_good_labels = load_terms(KNOWN_GOOD_LABELS_FILE)
+    stats = {'domains': 0, 'labels': 0, 'cached': 0, 'prefiltered': 0, 'scored': 0, 'written': 0}
+
+    cache = prefilter = None
+    if args.cache:
+        from analysis.label_cache import LabelProbabilityCache
+        cache = LabelProbabilityCache(args.cache, model_version(args.backend))
+    if args.prefilter:
+        from analysis.dga_prefilter import LabelPreFilter
+        prefilter = LabelPreFilter()
+
+    batches = iter_label_batches(read_lines(args.input), args.batch_size, known_good_labels, stats)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    inflight = {}  # future -> batch
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(args.backend,)) as executor, \
+                tqdm(desc='Scoring labels', unit=' labels', file=sys.stderr) as pbar:
+
+            def collect(return_when):
+                done, _ = wait(inflight, return_when=return_when)
+                for future in done:
+                    batch_labels, batch = inflight.pop(future)
+                    probabilities, _ = future.result()
+                    scores = list(zip(batch_labels, probabilities))
+                    if cache is not None:
+                        cache.put_many(scores)
+                    stats['scored'] += len(scores)
+                    stats['written'] += write_scores(outfile, batch, scores, args.min_probability, cached=False)
+                    pbar.update(len(scores))
+
+            for batch in batches:
+                stats['labels'] += len(batch)
+                labels = list(batch)
+                if cache is not None:
+                    found, labels = cache.get_many(labels)
+                    stats['cached'] += len(found)
+                    stats['written'] += write_scores(outfile, batch, found.items(), args.min_probability, cached=True)
+                    pbar.update(len(found))
+                if prefilter is not None:
+                    labels, filtered = prefilter.split(labels)
+                    stats['prefiltered'] += len(filtered)
+                    pbar.update(len(filtered))
+                if labels:
+                    # Bounded read-ahead: wait for a batch to finish before queueing more
+                    while len(inflight) >= 2 * args.workers:
+                        collect(FIRST_COMPLETED)
+                    inflight[executor.submit(_predict, labels)] = (labels, batch)
+            while inflight:
+                collect(FIRST_COMPLETED)
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+        if cache is not None:
+            cache.close()
+    print(f"Read {stats['domains']} domains, {stats['labels']} distinct labels: {stats['cached']} cached, "
+          f"{stats['prefiltered']} pre-filtered, {stats['scored']} scored, {stats['written']} written", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the subdomain labels of an NDJSON domain feed with the DGA model, writing JSONL.")
+    parser.add_argument('input', help="NDJSON file with a 'domain' field per line, '-' for stdin")
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT, help=f"JSONL file for label scores, '-' for stdout (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Model worker processes")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help="Model runtime (tensorflow needs dgaintel installed)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Distinct labels per model call")
+    parser.add_argument('--min-probability', type=float, default=0.0, help="Only write labels scoring at least this (the /dga cut-off is 0.97)")
+    parser.add_argument('--cache', help="Label probability cache (SQLite) to read and fill, e.g. the bot's dga_label_cache.sqlite3")
+    parser.add_argument('--prefilter', action='store_true', help="Skip labels the lexical pre-filter rules out; they are not written")
+    args = parser.parse_args()
+    score_feed(args)
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,100 @@
 
 import sys
 sys.path.append('..')
-import requests
+import argparse
+import gc
+import hashlib
 import json
 import os
+import pickle
+import struct
+import tempfile
+import signal
+import threading
+import time
+from array import array
 from typing import List, Set, Tuple, Dict
-from functools import lru_cache
 from multiprocessing import Pool
 from tqdm import tqdm
-from analysis.detections import DetectionMethods
+from analysis.detections import DetectionMethods, SUBSTITUTIONS_FILE
+from analysis.data_tables import load_substitutions
+from analysis.aho_corasick import AhoCorasick
+from analysis.fuzzy_index import DeletionIndex
+from utils.public_suffix import PublicSuffixTrie, load_public_suffixes, PUBLIC_SUFFIX_FILE
+
+# Prebuilt scanner files: magic, format version, metadata length, JSON metadata,
+# then the pickled scanner state. Bump ARTIFACT_VERSION when the state changes shape.
+ARTIFACT_MAGIC = b'RTUFSCAN'
+ARTIFACT_VERSION = 4
+_ARTIFACT_HEADER = struct.Struct('<8sHI')
+
+# Match methods, as stored in ScanColumns.method
+DIRECT, SUBSTITUTION, NEIGHBOR, LEVENSHTEIN = range(4)
+METHODS = ('direct', 'substitution', 'neighbor', 'levenshtein')
+
+class ScanColumns:
+    """
+    Batch scan results as parallel columns, one row per match. domain_index points
+    into the scanned batch and method into METHODS. The numeric columns are arrays,
+    which pickle as flat buffers when results come back from pool workers.
+    """
+    __slots__ = ('domain_index', 'target', 'method', 'score', 'description')
+
+    def __init__(self):
+        self.domain_index = array('I')
+        self.target: List[str] = []
+        self.method = array('B')
+        self.score = array('d')
+        self.description: List[str] = []
+
+    def __len__(self):
+        return len(self.target)
+
+    def append(self, domain_index: int, target: str, method: int, score: float, description: str):
+        self.domain_index.append(domain_index)
+        self.target.append(target)
+        self.method.append(method)
+        self.score.append(score)
+        self.description.append(description)
+
+    def compact(self, domains: List[str]) -> List[str]:
+        """Renumber domain_index against only the domains with matches, and return those domains."""
+        matched = []
+        renumbered = {}
+        for i, index in enumerate(self.domain_index):
+            if index not in renumbered:
+                renumbered[index] = len(matched)
+                matched.append(domains[index])
+            self.domain_index[i] = renumbered[index]
+        return matched
+
+    def by_domain(self):
+        """(domain index, [(target, description, score), ...]) per matched domain, in scan order."""
+        rows = []
+        current = None
+        for index, target, description, score in zip(self.domain_index, self.target, self.description, self.score):
+            if index != current:
+                if rows:
+                    yield current, rows
+                current, rows = index, []
+            rows.append((target, description, score))
+        if rows:
+            yield current, rows
 
 class DomainScanner(DetectionMethods):
-    def __init__(self, target_terms: Set[str], max_levenshtein_distance: int = 2, public_suffix_list=None):
+    def __init__(self, target_terms: Set[str], max_levenshtein_distance: int = 2, public_suffixes: PublicSuffixTrie = None,
+                 substitutions: Dict[str, Set[str]] = None):
         self.target_terms = {self.normalize_text(term) for term in target_terms}
         self.max_levenshtein_distance = max_levenshtein_distance
-        if public_suffix_list is not None:
-            self.public_suffix_list = public_suffix_list
-        else:
-            self.public_suffix_list = self._get_public_suffix_list()
-        self.substitutions = self._initialize_substitutions()
-        self.target_variants = {target: self.generate_variants(target) for target in self.target_terms}
-
-    @staticmethod
-    @lru_cache(maxsize=1024)
-    def _get_public_suffix_list() -> frozenset:
-        try:
-            response = requests.get('https://publicsuffix.org/list/public_suffix_list.dat')
-            return frozenset(line.strip() for line in response.text.splitlines() if line and not line.startswith('//'))
-        except Exception as e:
-            print(f"Warning: Could not fetch public suffix list: {e}")
-            return frozenset()
+        self.public_suffixes = public_suffixes if public_suffixes is not None else load_public_suffixes()
+        basic_subs = substitutions if substitutions is not None else load_substitutions(SUBSTITUTIONS_FILE)
+        self.substitutions = self._initialize_substitutions(basic_subs)
+        self.skeleton_table = self._build_skeleton_table(self.substitutions)
+        self.compatible_chars, self.substituted_chars, self.expansions = self._build_confusables(basic_subs, self.substitutions)
+        self.target_skeletons = self._build_target_skeletons()
+        self.skeleton_matcher = AhoCorasick(self.target_skeletons)
+        self.get_target_matcher()
+        self.fuzzy_index = DeletionIndex(self.target_terms, max_levenshtein_distance)
 
     def split_domain(self, fqdn: str) -> List[str]:
         dot_parts = fqdn.split('.')
@@ -42,19 +107,11 @@ class DomainScanner(DetectionMethods):
 
     def extract_domain_parts(self, fqdn: str) -> Tuple[List[str], str]:
         dot_labels = fqdn.lower().split('.')
-        for i in range(len(dot_labels)):
-            if '.'.join(dot_labels[i:]) in self.public_suffix_list:
-                remaining_parts = dot_labels[:-len(dot_labels[i:])]
-                suffix = '.'.join(dot_labels[i:])
-                detailed_parts = []
-                for part in remaining_parts:
-                    detailed_parts.extend(part.split('-'))
-                return [part for part in detailed_parts if part], suffix
-        remaining = dot_labels[:-1]
+        suffix_length = self.public_suffixes.suffix_length(dot_labels)
         detailed_parts = []
-        for part in remaining:
+        for part in dot_labels[:-suffix_length]:
             detailed_parts.extend(part.split('-'))
-        return [part for part in detailed_parts if part], dot_labels[-1]
+        return [part for part in detailed_parts if part], '.'.join(dot_labels[-suffix_length:])
 
     def scan_domain(self, fqdn: str) -> List[Tuple[str, str, float]]:
         domain_parts, tld = self.extract_domain_parts(fqdn)
@@ -77,42 +134,274 @@ class DomainScanner(DetectionMethods):
                     results.extend(lev_matches)
         return sorted(results, key=lambda x: x[2], reverse=True)
 
-def init_worker(target_terms, public_suffix_list):
+    def scan_many(self, domains: List[str]) -> ScanColumns:
+        """
+        scan_domain over a batch, returned as columns. Every distinct label in the
+        batch is normalized and run through the per-label checks once, however
+        many domains repeat it.
+        """
+        columns = ScanColumns()
+        # label -> [normalized, direct, substitution, levenshtein (filled on demand)]
+        memo = {}
+
+        for index, fqdn in enumerate(domains):
+            domain_parts, tld = self.extract_domain_parts(fqdn)
+            if not domain_parts:
+                continue
+
+            entries = []
+            for label in domain_parts:
+                entry = memo.get(label)
+                if entry is None:
+                    normalized = self.normalize_text(label)
+                    entry = memo[label] = [
+                        normalized,
+                        self.match_direct(label, normalized),
+                        self.match_substitution(label, normalized),
+                        None
+                    ]
+                entries.append(entry)
+
+            # Same precedence as scan_domain: neighbors, then Levenshtein, only as fallbacks
+            rows = [(DIRECT, match) for entry in entries for match in entry[1]]
+            rows += [(SUBSTITUTION, match) for entry in entries for match in entry[2]]
+            if not rows:
+                rows = [(NEIGHBOR, match) for match in self.check_neighboring_labels(domain_parts)]
+            if not rows:
+                for label, entry in zip(domain_parts, entries):
+                    if entry[3] is None:
+                        entry[3] = self.match_levenshtein(label, entry[0])
+                rows = [(LEVENSHTEIN, match) for entry in entries for match in entry[3]]
+
+            rows.sort(key=lambda row: row[1][2], reverse=True)
+            for method, (target, description, score) in rows:
+                columns.append(index, target, method, score, description)
+
+        return columns
+
+    @staticmethod
+    def artifact_key(target_terms: Set[str], max_levenshtein_distance: int = 2) -> str:
+        """Fingerprint of everything a compiled scanner is built from."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([ARTIFACT_VERSION, sorted(target_terms), max_levenshtein_distance]).encode('utf-8'))
+        for path in (SUBSTITUTIONS_FILE, PUBLIC_SUFFIX_FILE):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def save_artifact(self, path: str, key: str):
+        """Write the precomputed scanner state (PSL trie, automata, skeleton and fuzzy indexes) to path."""
+        metadata = json.dumps({
+            'key': key,
+            'target_terms': sorted(self.target_terms),
+            'max_levenshtein_distance': self.max_levenshtein_distance,
+            'public_suffix_version': self.public_suffixes.version,
+        }).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(metadata)))
+            f.write(metadata)
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_artifact_metadata(path: str) -> Dict:
+        """Header metadata of a compiled scanner, or {} if the file is missing or from another format version."""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, length = _ARTIFACT_HEADER.unpack(f.read(_ARTIFACT_HEADER.size))
+                if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION:
+                    return {}
+                return json.loads(f.read(length))
+        except (OSError, struct.error, ValueError):
+            return {}
+
+    @classmethod
+    def load_artifact(cls, path: str) -> 'DomainScanner':
+        """
+        Scanner from a compiled artifact. Unpickling the state is much faster than
+        building it (PSL trie, automata, skeleton and fuzzy indexes), which is all
+        this buys: each process still ends up with its own copy of the state.
+        """
+        with open(path, 'rb') as f:
+            magic, version, length = _ARTIFACT_HEADER.unpack(f.read(_ARTIFACT_HEADER.size))
+            if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION:
+                raise ValueError(f"{path} is not a version {ARTIFACT_VERSION} scanner artifact")
+            f.seek(_ARTIFACT_HEADER.size + length)
+            # The state is hundreds of thousands of small objects and none of them
+            # are garbage yet, so the collector would only slow the load down
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                state = pickle.load(f)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        scanner = cls.__new__(cls)
+        scanner.__dict__.update(state)
+        return scanner
+
+def compile_scanner(path: str, target_terms: Set[str], max_levenshtein_distance: int = 2) -> bool:
+    """Build and save the scanner artifact unless path already holds one for these inputs. True if it was built."""
+    key = DomainScanner.artifact_key(target_terms, max_levenshtein_distance)
+    if DomainScanner.read_artifact_metadata(path).get('key') == key:
+        return False
+    DomainScanner(target_terms, max_levenshtein_distance).save_artifact(path, key)
+    return True
+
+DEFAULT_INPUT = 'noh.txt'
+DEFAULT_OUTPUT = 'rtufresults.jsonl'
+DEFAULT_CHUNK_SIZE = 100
+FOLLOW_POLL_SECONDS = 1.0
+
+def init_worker(artifact_path):
     global scanner
-    scanner = DomainScanner(target_terms, public_suffix_list=public_suffix_list)
+    # Ctrl-C is handled once, in the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    scanner = DomainScanner.load_artifact(artifact_path)
 
-def process_domain(domain):
-    results = scanner.scan_domain(domain)
-    return (domain, results)
+def process_chunk(domains):
+    """Scan a chunk of domains in one task, returning the matched domains and their match columns."""
+    columns = scanner.scan_many(domains)
+    return len(domains), columns.compact(domains), columns
 
-def main():
-    target_terms = {'bank'}
-    public_suffix_list = DomainScanner._get_public_suffix_list()
-    domains = []
-    with open('noh.txt', 'r') as f:
-        for line in f:
-            data = json.loads(line)
-            domain = data.get('domain')
+def read_lines(path, follow=False, stop=None):
+    """
+    Lines from a file or stdin ('-'). In follow mode the file is tailed like
+    tail -f until stop is set: at EOF a None is yielded (so callers can flush
+    partial work) and the file is polled for new lines, holding back a partially
+    written last line.
+    """
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        partial = ''
+        while True:
+            line = f.readline()
+            if line:
+                if line.endswith('\n'):
+                    yield partial + line
+                    partial = ''
+                else:
+                    partial += line
+                continue
+            if not follow:
+                if partial:
+                    yield partial
+                return
+            yield None
+            if stop is None:
+                time.sleep(FOLLOW_POLL_SECONDS)
+            elif stop.wait(FOLLOW_POLL_SECONDS):
+                return
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def acquire_slot(slots, stop):
+    while not slots.acquire(timeout=FOLLOW_POLL_SECONDS):
+        if stop.is_set():
+            return False
+    return not stop.is_set()
+
+def iter_domain_chunks(lines, chunk_size, slots, stop):
+    """
+    Batch the 'domain' field of NDJSON lines into chunks. Each chunk takes a slot
+    from the semaphore before it is handed to the pool, which bounds how far the
+    pool's task feeder can read ahead of the results being written. Setting stop
+    ends the iteration, so the pool can shut down while the input is still open.
+    """
+    chunk = []
+    for line in lines:
+        if line is not None:
+            try:
+                domain = json.loads(line).get('domain')
+            except (json.JSONDecodeError, AttributeError):
+                print(f"Skipping malformed line: {line.strip()[:200]}", file=sys.stderr)
+                continue
             if domain:
-                domains.append(domain)
-    num_processes = os.cpu_count()
-    chunksize = 100
-    with open('rtufresults.txt', 'w', encoding='utf-8') as outfile:
-        with Pool(processes=num_processes, initializer=init_worker, initargs=(target_terms, public_suffix_list)) as pool:
-            results_iter = pool.imap_unordered(process_domain, domains, chunksize=chunksize)
-            with tqdm(total=len(domains), desc='Scanning domains') as pbar:
-                for domain, results in results_iter:
-                    outfile.write(f"\nScanning domain: {domain}\n")
-                    outfile.write("-" * 50 + "\n")
-                    if results:
-                        outfile.write("Potential matches found:\n")
-                        for target, description, similarity in results:
-                            outfile.write(f"- Target term: {target}\n")
-                            outfile.write(f"  Description: {description}\n")
-                            outfile.write(f"  Confidence: {similarity:.2%}\n")
-                    else:
-                        outfile.write("No suspicious patterns found.\n")
-                    pbar.update(1)
+                chunk.append(domain)
+            if len(chunk) < chunk_size:
+                continue
+        # Full chunk, or the followed file is idle and a partial chunk is waiting
+        if chunk:
+            if not acquire_slot(slots, stop):
+                return
+            yield chunk
+            chunk = []
+    if chunk and acquire_slot(slots, stop):
+        yield chunk
+
+def write_match(outfile, domain, results):
+    record = {
+        'domain': domain,
+        'matches': [
+            {'target': target, 'description': description, 'confidence': round(similarity, 4)}
+            for target, description, similarity in results
+        ]
+    }
+    outfile.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+def scan(args, artifact_path, max_inflight):
+    """Run the input through a worker pool that loads the compiled scanner, writing matches as JSONL."""
+    slots = threading.BoundedSemaphore(max_inflight)
+    stop = threading.Event()
+    chunks = iter_domain_chunks(read_lines(args.input, args.follow, stop), args.chunk_size, slots, stop)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'a' if args.follow else 'w', encoding='utf-8')
+    scanned = matched = 0
+    try:
+        with Pool(processes=args.processes, initializer=init_worker, initargs=(artifact_path,)) as pool:
+            try:
+                with tqdm(desc='Scanning domains', unit=' domains') as pbar:
+                    for count, matched_domains, columns in pool.imap_unordered(process_chunk, chunks):
+                        slots.release()
+                        for index, results in columns.by_domain():
+                            write_match(outfile, matched_domains[index], results)
+                        if matched_domains and args.follow:
+                            outfile.flush()
+                        scanned += count
+                        matched += len(matched_domains)
+                        pbar.update(count)
+            finally:
+                # Unblock the pool's task feeder before the pool is torn down
+                stop.set()
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+    print(f"Scanned {scanned} domains, {matched} with matches", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan NDJSON domain feeds for target terms, writing matches as JSONL.")
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help=f"NDJSON file with a 'domain' field per line, '-' for stdin (default: {DEFAULT_INPUT})")
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT, help=f"JSONL file for matches, '-' for stdout (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--terms', default='bank', help="Comma-separated target terms")
+    parser.add_argument('--follow', '-f', action='store_true', help="Keep reading as the input file grows, like tail -f")
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Domains per worker task")
+    parser.add_argument('--max-inflight', type=int, help="Chunks read ahead of the results written (default: 4 per process)")
+    parser.add_argument('--artifact', help="Compiled scanner file, reused across runs while the terms and data files are unchanged (default: a temporary file)")
+    parser.add_argument('--compile-only', action='store_true', help="Write --artifact and exit without scanning")
+    args = parser.parse_args()
+
+    target_terms = {term.strip() for term in args.terms.split(',') if term.strip()}
+    max_inflight = args.max_inflight or 4 * args.processes
+    if args.compile_only and not args.artifact:
+        parser.error("--compile-only needs --artifact")
+
+    # The scanner is compiled once here; workers load the artifact instead of rebuilding it
+    artifact_path = args.artifact
+    if artifact_path is None:
+        fd, artifact_path = tempfile.mkstemp(suffix='.rtuf')
+        os.close(fd)
+    try:
+        built = compile_scanner(artifact_path, target_terms)
+        print(f"{'Compiled' if built else 'Reusing'} scanner artifact {artifact_path}", file=sys.stderr)
+        if not args.compile_only:
+            scan(args, artifact_path, max_inflight)
+    finally:
+        if args.artifact is None:
+            os.remove(artifact_path)
 
 if __name__ == "__main__":
     main()
@@ -14,6 +14,7 @@ def register_commands(app: AsyncApp):
     from .dnscount import register_dnscount_command
     from .timeline import register_timeline_command
     from .screenshot import register_screenshot_command
+    from .brandscan import register_brandscan_command
 
     # Register each command
     register_dns_history_command(app)
@@ -26,3 +27,4 @@ def register_commands(app: AsyncApp):
     register_timeline_command(app) 
     register_dnscount_command(app)
     register_screenshot_command(app)
+    register_brandscan_command(app)
@@ -2,9 +2,13 @@
 
 import asyncio
 import aiohttp
+import os
+import tempfile
 from slack_sdk.errors import SlackApiError
 from slack_bolt.async_app import AsyncApp
-from config import DNSDB_API_KEY
+from config import DNSDB_API_KEY, SUBDOMAINS_PAGE_DIR
+from utils.public_suffix import load_public_suffixes
+from analysis.label_trie import LabelTrie
 from slack_sdk.models.blocks import (
     SectionBlock,
     ActionsBlock,
@@ -12,6 +16,8 @@ from slack_sdk.models.blocks import (
 )
 import time
 
+ITEMS_PER_PAGE = 15
+
 def register_subdomains_command(app: AsyncApp):
 
     @app.command("/subdomains")
@@ -42,13 +48,17 @@ def register_subdomains_command(app: AsyncApp):
                 await say(f"No subdomains found for domains: {', '.join(domains)}.")
                 return
 
-            # Flatten the tree to get a list of FQDNs with indentation
-            fqdn_list = flatten_tree_with_indentation(tree)
+            # Write the report lines to disk once; each page is read back from a
+            # byte offset, so the cached state stays small however many subdomains
+            page_file, line_count = write_report_lines(tree)
+            del tree
 
             # Initialize the pagination state (starting with page 1)
             state = {
                 'current_page': 1,
-                'fqdn_list': fqdn_list,
+                'page_file': page_file,
+                'total_pages': (line_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE,
+                'offsets': {1: 0},  # page -> byte offset of its first line, for pages read so far
             }
 
             # Cache the state for the user
@@ -137,68 +147,66 @@ def register_subdomains_command(app: AsyncApp):
 
     def build_subdomain_tree(rrnames):
         """
-        Builds a tree structure from a list of rrnames.
+        Builds a LabelTrie from a list of rrnames, one root per registered domain.
         """
-        tree = {}
+        tree = LabelTrie()
+        public_suffixes = load_public_suffixes()
         for rrname in rrnames:
-            labels = rrname.split('.')
-            
-            # Skip the TLD level
-            if labels[-1] == "com":
-                labels = labels[:-1]
-
-            node = tree
-            for label in reversed(labels):
-                if label not in node:
-                    node[label] = {}
-                node = node[label]
+            tree.insert_name(rrname, public_suffixes)
         return tree
 
-    def flatten_tree_with_indentation(tree, prefix=""):
+    def write_report_lines(tree):
         """
-        Flattens the tree into a list of FQDNs with hierarchical indentation.
+        Writes the tree as FQDNs with hierarchical "|-" indentation, one per line,
+        to a new file under SUBDOMAINS_PAGE_DIR. Returns the path and line count.
         """
-        fqdn_list = []
-
-        def _flatten(node, current_path, level):
-            for label, child_node in node.items():
-                if current_path:
-                    fqdn = f"{label}.{current_path}"
-                else:
-                    fqdn = label
-
-                # Create the indentation string using "|-" characters
-                indentation = "|-" * level
-
-                # Append the formatted FQDN with the correct level of indentation
-                fqdn_list.append(f"{indentation} {fqdn}")
-
-                # Recursively flatten the child nodes
-                _flatten(child_node, fqdn, level + 1)
-
-        # Start flattening from the root of the tree
-        _flatten(tree, prefix, level=0)
-        return fqdn_list
-
+        os.makedirs(SUBDOMAINS_PAGE_DIR, exist_ok=True)
+        remove_expired_page_files()
+        fd, path = tempfile.mkstemp(prefix='subdomains_', suffix='.txt', dir=SUBDOMAINS_PAGE_DIR)
+        line_count = 0
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for depth, fqdn, _ in tree.walk():
+                f.write(f"{'|-' * depth} {fqdn}\n")
+                line_count += 1
+        return path, line_count
+
+    def remove_expired_page_files():
+        # Reports whose pagination state has left app.cache can no longer be paged
+        cutoff = time.time() - app.cache.ttl
+        for entry in os.scandir(SUBDOMAINS_PAGE_DIR):
+            if entry.name.startswith('subdomains_') and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except OSError as e:
+                    print(f"Error removing {entry.path}: {e}")
+
+    def read_page(state, page):
+        """
+        Reads one page of report lines, starting from the nearest known offset at
+        or before it, and remembers where the following page starts.
+        """
+        # Every page shown re-caches the state, restarting its TTL; move the
+        # file's mtime with it so remove_expired_page_files leaves it alone
+        os.utime(state['page_file'])
+        offsets = state['offsets']
+        start_page = max(known for known in offsets if known <= page)
+        with open(state['page_file'], 'rb') as f:
+            f.seek(offsets[start_page])
+            for _ in range((page - start_page) * ITEMS_PER_PAGE):
+                f.readline()
+            lines = [line.decode('utf-8').rstrip('\n') for line in (f.readline() for _ in range(ITEMS_PER_PAGE)) if line]
+            offsets[page + 1] = f.tell()
+        return lines
 
     async def send_subdomains_report(client, channel_id, cache_key, state):
         """
         Sends a markdown formatted report of subdomains for the given page.
         """
         current_page = state['current_page']
-        fqdn_list = state['fqdn_list']
-
-        # Determine the indices for the current page
-        items_per_page = 15
-        start_idx = (current_page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-
-        # Slice the list to get the current page's items
-        current_page_items = fqdn_list[start_idx:end_idx]
+        total_pages = state['total_pages']
 
-        # Generate the markdown report
-        report = "\n".join(current_page_items)
-        total_pages = (len(fqdn_list) + items_per_page - 1) // items_per_page
+        # Generate the markdown report for only the current page
+        report = "\n".join(read_page(state, current_page))
 
         # Create pagination buttons if applicable
         elements = []
@@ -262,12 +270,12 @@ def register_subdomains_command(app: AsyncApp):
 
         # Retrieve cached state
         state = app.cache.get(cache_key, {})
-        if not state:
+        if not state or not os.path.exists(state['page_file']):
             await client.chat_postMessage(channel=body['channel']['id'], text="Session expired. Please run the command again.")
             return
 
         # Update the current page based on the direction
-        if direction == "next":
+        if direction == "next" and state['current_page'] < state['total_pages']:
             state['current_page'] += 1
         elif direction == "prev" and state['current_page'] > 1:
             state['current_page'] -= 1
@@ -2,9 +2,10 @@
 
 import asyncio
 import os
+import tempfile
 from slack_sdk.errors import SlackApiError
 from slack_bolt.async_app import AsyncApp
-from analysis.subdomain_finder import run_subdomain_finder
+from analysis.subdomain_finder import run_subdomain_finder, iter_fqdns, write_html_report, write_fqdns
 from datetime import datetime
 from config import DNSDB_API_KEY
 
@@ -23,21 +24,23 @@ def register_supplychain_command(app: AsyncApp):
         # Extract the domains from the command text
         domains_text = command['text'].strip()
 
+        # --report also uploads the passive DNS tree (HTML) and the full FQDN list
+        export = '--report' in domains_text.split()
+        domains_text = ' '.join(word for word in domains_text.split() if word != '--report')
+
         if not domains_text:
-            await say("Please provide at least one domain. Usage: /supplychain <domain1,domain2,...>")
+            await say("Please provide at least one domain. Usage: /supplychain <domain1,domain2,...> [--report]")
             return
 
         domains = [domain.strip() for domain in domains_text.split(',') if domain.strip()]
 
         try:
-            # Run the subdomain finder and get subdomains as data
-            _, subdomains = await run_subdomain_finder(domains, DNSDB_API_KEY)
-
-            # Read the brands.csv file
-            brands = read_brands_csv()
+            # Run the subdomain finder; names are read straight off the tree
+            tree = await run_subdomain_finder(domains, DNSDB_API_KEY)
 
-            # Search for brands terms in the subdomains
-            results = find_brands_in_subdomains(subdomains, brands)
+            # Search for brands terms in the subdomains, with the current brands.csv automaton
+            subdomains = ((fqdn, node.time_last) for fqdn, node in iter_fqdns(tree, domains))
+            results = find_brands_in_subdomains(subdomains, app.data_tables.tables.brand_matcher)
 
             # Build the report
             report = generate_supplychain_report(results)
@@ -48,6 +51,10 @@ def register_supplychain_command(app: AsyncApp):
             else:
                 await say("No matching brands terms found in the subdomains.")
 
+            if export:
+                await upload_export(client, channel_id, tree, domains, write_html_report, 'supplychain_report.html', "Passive DNS report")
+                await upload_export(client, channel_id, tree, domains, write_fqdns, 'supplychain_fqdns.tsv', "FQDNs (fqdn, count, time_last)")
+
         except Exception as e:
             await say(f"An error occurred during supply chain analysis: {str(e)}")
 
@@ -75,32 +82,37 @@ def register_supplychain_command(app: AsyncApp):
             print(f"Error joining channel: {e}")
             return False
 
-    def read_brands_csv():
-        filepath = os.path.join(os.path.dirname(__file__), 'brands.csv')
-        brands = set()
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                brand = line.strip()
-                if brand:
-                    brands.add(brand.lower())
-        return brands
-
-    def find_brands_in_subdomains(subdomains, brands):
-        # subdomains is a dict of fqdn -> time_last
-        # brands is a set of brand terms
+    async def upload_export(client, channel_id, tree, domains, write, file_name, title):
+        """Stream an export of the tree to a temporary file and upload it."""
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(file_name)[1])
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                write(tree, domains, f)
+            with open(path, 'rb') as file_content:
+                await client.files_upload_v2(
+                    channels=channel_id,
+                    file=file_content,
+                    filename=file_name,
+                    title=f"{title} for {', '.join(domains)}"
+                )
+        finally:
+            os.remove(path)
+
+    def find_brands_in_subdomains(subdomains, matcher):
+        # subdomains is an iterable of (fqdn, time_last)
+        # matcher is an AhoCorasick automaton over the brand terms
         brand_matches = {}
 
-        for fqdn, time_last in subdomains.items():
-            lower_fqdn = fqdn.lower()
-            for brand in brands:
-                if brand.lower() in lower_fqdn:
-                    # Check if this is the first time we find this brand
-                    if brand not in brand_matches:
+        for fqdn, time_last in subdomains:
+            # Every brand in the fqdn from a single automaton pass
+            for brand in matcher.find_all(fqdn.lower()):
+                # Check if this is the first time we find this brand
+                if brand not in brand_matches:
+                    brand_matches[brand] = {'fqdn': fqdn, 'time_last': time_last}
+                else:
+                    # Compare time_last to keep the most recent
+                    if time_last > brand_matches[brand]['time_last']:
                         brand_matches[brand] = {'fqdn': fqdn, 'time_last': time_last}
-                    else:
-                        # Compare time_last to keep the most recent
-                        if time_last > brand_matches[brand]['time_last']:
-                            brand_matches[brand] = {'fqdn': fqdn, 'time_last': time_last}
 
         return brand_matches  # Returns a dict of brand -> {'fqdn': fqdn, 'time_last': time_last}
 
@@ -22,3 +22,27 @@ FREEIMAGE_API_KEY = config.get('freeimage', 'api_key')
 
 # Screenshot configuration
 SCREENSHOT_OUTPUT_DIR = config.get('screenshot', 'output_dir', fallback='screenshots')
+
+# /subdomains: each report's lines are written here and paged from disk, removed after the report cache TTL
+SUBDOMAINS_PAGE_DIR = config.get('subdomains', 'page_dir', fallback='subdomain_pages')
+
+# Brandscan configuration: newly observed domains file to scan instead of querying DNSDB
+BRANDSCAN_NOD_FILE = config.get('brandscan', 'nod_file', fallback=None)
+
+# Data directory (brands.csv, character_substitutions.txt, known_good_labels.txt), reloaded when files change
+DATA_DIR = config.get('data', 'dir', fallback='data')
+DATA_RELOAD_SECONDS = config.getint('data', 'reload_interval', fallback=30)
+
+# DGA model inference: worker processes (one model copy each) and micro-batching
+DGA_WORKERS = config.getint('dga', 'workers', fallback=1)
+DGA_MAX_BATCH_SIZE = config.getint('dga', 'max_batch_size', fallback=500)
+DGA_MAX_DELAY_MS = config.getint('dga', 'max_delay_ms', fallback=50)
+DGA_BACKEND = config.get('dga', 'backend', fallback='numpy')  # numpy, or tensorflow to run dgaintel itself
+
+# DGA label -> probability cache, persisted in SQLite with an in-memory LRU in front
+DGA_CACHE_FILE = config.get('dga', 'cache_file', fallback='dga_label_cache.sqlite3')
+DGA_CACHE_MEMORY_SIZE = config.getint('dga', 'cache_memory_size', fallback=100000)
+
+# Lexical pre-filter ahead of the DGA model (threshold: see analysis/dga_prefilter.py)
+DGA_PREFILTER = config.getboolean('dga', 'prefilter', fallback=True)
+DGA_PREFILTER_THRESHOLD = config.getfloat('dga', 'prefilter_threshold', fallback=None)
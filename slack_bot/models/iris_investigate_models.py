@@ -1,9 +1,20 @@
 # models/iris_investigate_models.py
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-@dataclass
+# Iris Investigate wraps most scalar attributes as {"value": ..., "count": ...}.
+# The helpers below unwrap them without building intermediate objects.
+
+def _value(attr, default=None):
+    if isinstance(attr, dict):
+        return attr.get('value', default)
+    return default if attr is None else attr
+
+def _values(attrs) -> List[Any]:
+    return [v for v in (_value(a) for a in attrs or []) if v not in (None, '')]
+
+@dataclass(slots=True)
 class Contact:
     name: Optional[str]
     org: Optional[str]
@@ -16,41 +27,236 @@ class Contact:
     fax: Optional[str]
     email: List[str] = field(default_factory=list)
 
-@dataclass
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> 'Contact':
+        return cls(
+            name=_value(raw.get('name')),
+            org=_value(raw.get('org')),
+            street=_value(raw.get('street')),
+            city=_value(raw.get('city')),
+            state=_value(raw.get('state')),
+            postal=_value(raw.get('postal')),
+            country=_value(raw.get('country')),
+            phone=_value(raw.get('phone')),
+            fax=_value(raw.get('fax')),
+            email=_values(raw.get('email'))
+        )
+
+@dataclass(slots=True)
 class IPInfo:
     address: str
     asn: List[int]
     country_code: str
     isp: str
 
-@dataclass
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> 'IPInfo':
+        return cls(
+            address=_value(raw.get('address'), ''),
+            asn=_values(raw.get('asn')),
+            country_code=_value(raw.get('country_code'), ''),
+            isp=_value(raw.get('isp'), '')
+        )
+
+@dataclass(slots=True)
+class HostInfo:
+    """A name server or MX host, with the IPs it resolved to."""
+    host: str
+    domain: str
+    ip: List[str] = field(default_factory=list)
+    priority: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> 'HostInfo':
+        return cls(
+            host=_value(raw.get('host'), ''),
+            domain=_value(raw.get('domain'), ''),
+            ip=_values(raw.get('ip')),
+            priority=raw.get('priority')
+        )
+
+@dataclass(slots=True)
 class DomainRiskComponent:
     name: str
     risk_score: int
     threats: List[str] = field(default_factory=list)
     evidence: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class DomainRisk:
     risk_score: int
     components: List[DomainRiskComponent] = field(default_factory=list)
 
-@dataclass
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> 'DomainRisk':
+        return cls(
+            risk_score=raw.get('risk_score'),
+            components=[
+                DomainRiskComponent(
+                    name=c.get('name', ''),
+                    risk_score=c.get('risk_score'),
+                    threats=list(c.get('threats') or []),
+                    evidence=list(c.get('evidence') or [])
+                )
+                for c in raw.get('components') or []
+            ]
+        )
+
+# Sub-objects kept as the raw dicts and lists they arrived as until first access
+_LAZY_FIELDS = (
+    'ip', 'mx', 'name_server', 'domain_risk',
+    'admin_contact', 'billing_contact', 'registrant_contact', 'technical_contact'
+)
+
 class IrisInvestigateResult:
-    domain: str
-    create_date: Optional[str]
-    expiration_date: Optional[str]
-    registrant_name: Optional[str]
-    registrant_org: Optional[str]
-    registrar: Optional[str]
-    registrar_status: List[str] = field(default_factory=list)
-    ip: List[IPInfo] = field(default_factory=list)
-    name_server: List[str] = field(default_factory=list)
-    domain_risk: Optional[DomainRisk] = None
-    # Include other fields as needed
-
-@dataclass
+    """
+    One Iris Investigate result. Scalar attributes and the common projections are
+    unwrapped into slots up front; contacts, IPs, MX, name servers and risk
+    components keep a reference to their raw sub-object and are converted into
+    model objects on first access. The rest of the result is dropped unless
+    keep_raw is set.
+    """
+    __slots__ = (
+        'domain', 'risk_score', 'create_date', 'expiration_date', 'registrant_name',
+        'registrant_org', 'registrar', 'registrar_status', 'ip_addresses',
+        'name_server_hosts', '_raw', '_parsed'
+    ) + tuple(f'_{name}' for name in _LAZY_FIELDS)
+
+    def __init__(self, raw: Dict[str, Any], keep_raw: bool = False):
+        self.domain = raw.get('domain')
+        self.risk_score = (raw.get('domain_risk') or {}).get('risk_score')
+        self.create_date = _value(raw.get('create_date'))
+        self.expiration_date = _value(raw.get('expiration_date'))
+        self.registrant_name = _value(raw.get('registrant_name'))
+        self.registrant_org = _value(raw.get('registrant_org'))
+        self.registrar = _value(raw.get('registrar'))
+        self.registrar_status = _values(raw.get('registrar_status'))
+        self.ip_addresses = tuple(a for a in (_value(ip.get('address')) for ip in raw.get('ip') or []) if a)
+        self.name_server_hosts = tuple(h for h in (_value(ns.get('host')) for ns in raw.get('name_server') or []) if h)
+        self._raw = raw if keep_raw else None
+        self._parsed = 0
+        for name in _LAZY_FIELDS:
+            setattr(self, f'_{name}', raw.get(name) or None)
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any], keep_raw: bool = False) -> 'IrisInvestigateResult':
+        return cls(raw, keep_raw)
+
+    def __repr__(self):
+        return f"IrisInvestigateResult(domain={self.domain!r}, risk_score={self.risk_score!r})"
+
+    def get(self, key, default=None):
+        """Raw attribute access for fields without a typed accessor, needs keep_raw."""
+        if self._raw is None:
+            raise AttributeError(f"Raw Iris fields were not kept for {self.domain}, parse with keep_raw=True")
+        return self._raw.get(key, default)
+
+    def attribute_values(self, max_list_elements: int = 10) -> Iterator[Tuple[str, Any, Any]]:
+        """
+        (attribute, value, count) for every {"value": ..., "count": ...} leaf of the
+        raw result, in document order, needs keep_raw. The attribute is the path of
+        keys joined with '_' with list positions left out (every IP address is
+        ip_address), and lists stop after max_list_elements items like flatten_json.
+        """
+        if self._raw is None:
+            raise AttributeError(f"Raw Iris fields were not kept for {self.domain}, parse with keep_raw=True")
+        # Each frame: (key, value) pairs still to visit (key None inside a list), the
+        # attribute path so far, and the count next to a value in the same dict
+        stack = [(iter(self._raw.items()), '', None)]
+        while stack:
+            items, path, count = stack[-1]
+            for key, value in items:
+                attribute = path if key is None else (f"{path}_{key}" if path else key)
+                if isinstance(value, dict):
+                    stack.append((iter(value.items()), attribute, value.get('count')))
+                    break
+                if isinstance(value, list):
+                    stack.append((((None, item) for item in value[:max_list_elements]), attribute, None))
+                    break
+                if key == 'value':
+                    yield path, value, count
+            else:
+                stack.pop()
+
+    # Lazily parsed sub-objects
+
+    def _lazy(self, bit, slot, parse):
+        if not self._parsed & bit:
+            setattr(self, slot, parse(getattr(self, slot)))
+            self._parsed |= bit
+        return getattr(self, slot)
+
+    @property
+    def ip(self) -> List[IPInfo]:
+        return self._lazy(1, '_ip', lambda raw: [IPInfo.from_dict(ip) for ip in raw or []])
+
+    @property
+    def mx(self) -> List[HostInfo]:
+        return self._lazy(2, '_mx', lambda raw: [HostInfo.from_dict(mx) for mx in raw or []])
+
+    @property
+    def name_server(self) -> List[HostInfo]:
+        return self._lazy(4, '_name_server', lambda raw: [HostInfo.from_dict(ns) for ns in raw or []])
+
+    @property
+    def domain_risk(self) -> Optional[DomainRisk]:
+        return self._lazy(8, '_domain_risk', lambda raw: DomainRisk.from_dict(raw) if raw else None)
+
+    @property
+    def admin_contact(self) -> Optional[Contact]:
+        return self._lazy(16, '_admin_contact', _parse_contact)
+
+    @property
+    def billing_contact(self) -> Optional[Contact]:
+        return self._lazy(32, '_billing_contact', _parse_contact)
+
+    @property
+    def registrant_contact(self) -> Optional[Contact]:
+        return self._lazy(64, '_registrant_contact', _parse_contact)
+
+    @property
+    def technical_contact(self) -> Optional[Contact]:
+        return self._lazy(128, '_technical_contact', _parse_contact)
+
+def _parse_contact(raw) -> Optional[Contact]:
+    return Contact.from_dict(raw) if raw else None
+
 class IrisInvestigateResponse:
-    results: List[IrisInvestigateResult] = field(default_factory=list)
-    # Include other fields as needed
+    """Iris Investigate results plus column projections over the whole result set."""
+    __slots__ = ('results', 'has_more_results', 'position', 'missing_domains')
+
+    def __init__(self, results: Optional[List[IrisInvestigateResult]] = None, has_more_results: bool = False,
+                 position: Optional[str] = None, missing_domains: Optional[List[str]] = None):
+        self.results = results if results is not None else []
+        self.has_more_results = has_more_results
+        self.position = position
+        self.missing_domains = missing_domains if missing_domains is not None else []
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], keep_raw: bool = False) -> 'IrisInvestigateResponse':
+        """Accepts either the full API body or its 'response' object."""
+        response = data.get('response', data)
+        return cls(
+            results=[IrisInvestigateResult(raw, keep_raw) for raw in response.get('results') or []],
+            has_more_results=response.get('has_more_results', False),
+            position=response.get('position'),
+            missing_domains=list(response.get('missing_domains') or [])
+        )
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def domains(self) -> List[str]:
+        return [result.domain for result in self.results]
+
+    def risk_scores(self) -> Dict[str, Optional[int]]:
+        return {result.domain: result.risk_score for result in self.results}
+
+    def ip_addresses(self) -> Dict[str, List[str]]:
+        return {result.domain: list(result.ip_addresses) for result in self.results}
 
+    def by_domain(self) -> Dict[str, IrisInvestigateResult]:
+        return {result.domain: result for result in self.results}
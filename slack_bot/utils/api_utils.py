@@ -3,6 +3,7 @@
 import aiohttp
 import asyncio
 import json
+from urllib.parse import quote
 from typing import List
 from models.dnsdb_models import DnsdbRecord
 from utils.flatten_utils import flatten_json
@@ -51,7 +52,15 @@ async def query_dnsdb_rdata_ip(session, api_key, ip, limit=10000):
     records = await query_dnsdb(session, api_key, url)
     return records
 
-async def query_iris_api(api_key, api_username, search_hash):
+async def query_dnsdb_flex_rrnames(session, api_key, regex, limit=10000, **params):
+    # Flexible search: owner names matching a regular expression
+    url = f'https://api.dnsdb.info/dnsdb/v2/regex/rrnames/{quote(regex, safe="")}?limit={limit}'
+    for key, value in params.items():
+        url += f'&{key}={value}'
+    records = await query_dnsdb(session, api_key, url)
+    return records
+
+async def query_iris_api(api_key, api_username, search_hash, flatten=True):
     url = 'https://api.domaintools.com/v1/iris-investigate/'
     headers = {
         'Accept': 'application/json',
@@ -73,10 +82,9 @@ async def query_iris_api(api_key, api_username, search_hash):
                     print("Error in API response:", response_data)
                     break
 
-                # Normalize each result
+                # Normalize each result, unless the caller wants the raw results for the Iris model
                 for result in response_data['response']['results']:
-                    normalized_result = flatten_json(result)
-                    all_results.append(normalized_result)
+                    all_results.append(flatten_json(result) if flatten else result)
 
                 if not response_data['response'].get('has_more_results', False):
                     break
@@ -1,17 +1,174 @@
 # utils/flatten_utils.py
+#
+# Also imported by se_engine.py at the repository root, which puts this directory
+# on sys.path: keep the module free of imports from the bot package.
+
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, NamedTuple
+
+
+class FlattenStyle(NamedTuple):
+    """Naming and pruning rules for a flattened key layout."""
+    sep: str                   # Between a parent key and a child key
+    index_sep: str             # Between a parent key and a list index
+    index_start: int           # First list index
+    max_list_elements: int     # List items kept per list
+    prune_empty: bool          # Drop None/empty values and empty containers
+    flatten_nested_lists: bool # Recurse into lists inside lists, else store them as values
+
+
+# Iris results as the bot stores them: a_0_b, every value kept
+IRIS_STYLE = FlattenStyle('_', '_', 0, 10, False, True)
+
+# se_engine documents: a.b1, empties pruned, first 5 list items
+ELASTIC_STYLE = FlattenStyle('.', '', 1, 5, True, False)
+
+# Key paths are interned per style and prefix so every record with the same shape
+# shares the same key strings instead of rebuilding them with string concatenation.
+# Each path node is [key, child nodes by dict key, child nodes by list index].
+# Both the number of roots and the children kept per node are bounded.
+_MAX_CACHED_ROOTS = 64
+_MAX_CACHED_CHILDREN = 4096
+
+_END = object()
+
+
+@lru_cache(maxsize=_MAX_CACHED_ROOTS)
+def _key_root(style: FlattenStyle, prefix: str) -> list:
+    return [None, {}, {}]
+
+
+def _child_node(node, part, part_sep, prefix, table):
+    # Build and, while the table has room, remember the key for one child path
+    key = f"{prefix}{part}" if node[0] is None else f"{node[0]}{part_sep}{part}"
+    child = [key, {}, {}]
+    if len(table) < _MAX_CACHED_CHILDREN:
+        table[part] = child
+    return child
+
+
+def _prune(value):
+    """Recursively remove entries where the value is empty or None."""
+    if isinstance(value, dict):
+        return {k: v for k, v in ((k, _prune(v)) for k, v in value.items()) if v}
+    if isinstance(value, list):
+        return [v for v in (_prune(v) for v in value) if v]
+    return value
+
+
+def flatten(data: Any, style: FlattenStyle = IRIS_STYLE, prefix: str = '') -> Dict[str, Any]:
+    """
+    Flatten nested dicts and lists into a single-level dict in one iterative pass.
+    With style.prune_empty, empty values are dropped during the same traversal and
+    list indices only count the items that produced output; without it, the
+    simpler _flatten_keep_all walk is used.
+    """
+    if not isinstance(data, (dict, list)):
+        return {prefix[:-1]: data}
+
+    root = _key_root(style, prefix)
+    if not style.prune_empty:
+        return _flatten_keep_all(data, style, root, prefix)
 
-def flatten_json(y, prefix='', max_list_elements=10):
     out = {}
+    emitted = 0
+    nested_lists = style.flatten_nested_lists
+    max_items = style.max_list_elements
+    index_start = style.index_start
+    sep, index_sep = style.sep, style.index_sep
+
+    # Each frame walks one container: [items iterator, path node, is list,
+    # next list index, values emitted before the list item being descended into]
+    is_list = isinstance(data, list)
+    stack = [[iter(data) if is_list else iter(data.items()), root, is_list, index_start, None]]
+
+    while stack:
+        frame = stack[-1]
+        items, node, is_list = frame[0], frame[1], frame[2]
 
-    def flatten(x, name=''):
-        if isinstance(x, dict):
-            for key in x:
-                flatten(x[key], f"{name}{key}_")
-        elif isinstance(x, list):
-            for i, item in enumerate(x[:max_list_elements]):
-                flatten(item, f"{name}{i}_")
+        if is_list:
+            names = node[2]
+            index = frame[3]
+            if frame[4] is not None:
+                # A pruned list item that produced nothing gives its index back
+                if emitted > frame[4]:
+                    index += 1
+                frame[4] = None
+            while index - index_start < max_items:
+                value = next(items, _END)
+                if value is _END:
+                    break
+                child = names.get(index) or _child_node(node, index, index_sep, prefix, names)
+                if isinstance(value, dict) or (nested_lists and isinstance(value, list)):
+                    frame[3] = index
+                    frame[4] = emitted
+                    child_is_list = not isinstance(value, dict)
+                    stack.append([iter(value) if child_is_list else iter(value.items()), child, child_is_list, index_start, None])
+                    break
+                if isinstance(value, list):
+                    value = _prune(value)
+                if not value:
+                    continue
+                out[child[0]] = value
+                emitted += 1
+                index += 1
+            else:
+                stack.pop()
+                continue
+            if stack[-1] is frame:
+                stack.pop()
         else:
-            out[name[:-1]] = x  # Remove the trailing '_'
+            names = node[1]
+            for k, value in items:
+                child = names.get(k) or _child_node(node, k, sep, prefix, names)
+                if isinstance(value, (dict, list)):
+                    child_is_list = isinstance(value, list)
+                    stack.append([iter(value) if child_is_list else iter(value.items()), child, child_is_list, index_start, None])
+                    break
+                if not value:
+                    continue
+                out[child[0]] = value
+                emitted += 1
+            else:
+                stack.pop()
 
-    flatten(y, prefix)
     return out
+
+
+def _flatten_keep_all(data, style: FlattenStyle, root: list, prefix: str) -> Dict[str, Any]:
+    """
+    flatten without pruning. List items are walked as (index, value) pairs like
+    dict items, so both containers share one loop and no index bookkeeping.
+    """
+    out = {}
+    sep, index_sep = style.sep, style.index_sep
+    max_items, index_start = style.max_list_elements, style.index_start
+    nested_lists = style.flatten_nested_lists
+
+    def frame(value, node):
+        # [items iterator, child table, path node, separator before the child part]
+        if isinstance(value, dict):
+            return iter(value.items()), node[1], node, sep
+        return enumerate(islice(value, max_items), index_start), node[2], node, index_sep
+
+    stack = [frame(data, root)]
+    while stack:
+        items, names, node, part_sep = stack[-1]
+        for part, value in items:
+            child = names.get(part)
+            if child is None:
+                child = _child_node(node, part, part_sep, prefix, names)
+            if isinstance(value, dict) or (isinstance(value, list) and (nested_lists or names is node[1])):
+                stack.append(frame(value, child))
+                break
+            out[child[0]] = value
+        else:
+            stack.pop()
+
+    return out
+
+
+def flatten_json(y, prefix='', max_list_elements=10):
+    style = IRIS_STYLE if max_list_elements == IRIS_STYLE.max_list_elements else IRIS_STYLE._replace(max_list_elements=max_list_elements)
+    return flatten(y, style, prefix)
@@ -0,0 +1,148 @@
+# utils/public_suffix.py
+#
+# Also imported by dangling_dns_finder.py and simple-tld-parser.py at the repository
+# root, which put this directory on sys.path: keep the module free of imports from
+# the bot package.
+
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+PUBLIC_SUFFIX_FILE = Path(__file__).parent / 'public_suffix_list.dat'
+
+# Rule flags, stored on a trie node under a key no label can equal (labels are str,
+# and a name with an empty label such as foo..com must not find them)
+_FLAGS = None
+RULE = 1
+EXCEPTION = 2
+PRIVATE = 4
+
+
+class DomainParts(NamedTuple):
+    subdomain: str
+    domain: str
+    suffix: str
+
+    @property
+    def registered_domain(self) -> str:
+        return f"{self.domain}.{self.suffix}" if self.domain and self.suffix else ''
+
+
+class PublicSuffixTrie:
+    """
+    Public Suffix List rules in a trie keyed by labels from the TLD down, so a name
+    is split with a single right-to-left walk. Honours wildcard (*.ck) and exception
+    (!www.ck) rules, and can leave out the PRIVATE section the way tldextract does
+    by default.
+    """
+    __slots__ = ('version', '_root')
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self._root = {}
+
+    @classmethod
+    def from_file(cls, path=PUBLIC_SUFFIX_FILE) -> 'PublicSuffixTrie':
+        trie = cls()
+        private = False
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('//'):
+                    if line.startswith('// VERSION:'):
+                        trie.version = line.split(':', 1)[1].strip()
+                    elif '===BEGIN PRIVATE DOMAINS===' in line:
+                        private = True
+                    elif '===END PRIVATE DOMAINS===' in line:
+                        private = False
+                    continue
+                if line:
+                    trie.add_rule(line.split()[0], private)
+        return trie
+
+    def __len__(self):
+        count = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for label, child in node.items():
+                if label != _FLAGS:
+                    count += _FLAGS in child
+                    stack.append(child)
+        return count
+
+    def add_rule(self, rule: str, private: bool = False):
+        flags = PRIVATE if private else 0
+        if rule.startswith('!'):
+            rule = rule[1:]
+            flags |= EXCEPTION
+        else:
+            flags |= RULE
+
+        for labels in _rule_forms(rule.lower()):
+            node = self._root
+            for label in reversed(labels):
+                node = node.setdefault(label, {})
+            node[_FLAGS] = flags
+
+    def suffix_length(self, labels: List[str], include_private: bool = True) -> int:
+        """Number of trailing labels that form the public suffix (at least 1, the PSL's implicit * rule)."""
+        ignored = 0 if include_private else PRIVATE
+        length = 1
+        node = self._root
+        depth = 0
+        for label in reversed(labels):
+            if not label:
+                # An empty label (foo..com, .com) matches no rule, wildcards included
+                break
+            depth += 1
+            child = node.get(label)
+            if child is not None:
+                flags = child.get(_FLAGS, 0)
+                if flags & ignored:
+                    flags = 0
+                if flags & EXCEPTION:
+                    return depth - 1
+                if flags & RULE:
+                    length = depth
+            wildcard = node.get('*')
+            if wildcard is not None and not wildcard.get(_FLAGS, 0) & ignored:
+                length = max(length, depth)
+            if child is None:
+                break
+            node = child
+        return length
+
+    def split(self, name: str, include_private: bool = True) -> DomainParts:
+        """Split a name into (subdomain, registrable label, public suffix)."""
+        labels = name.strip().rstrip('.').lower().split('.')
+        if not labels or not labels[-1]:
+            return DomainParts('', '', '')
+        n = self.suffix_length(labels, include_private)
+        suffix = '.'.join(labels[-n:])
+        if len(labels) == n:
+            return DomainParts('', '', suffix)
+        return DomainParts('.'.join(labels[:-n - 1]), labels[-n - 1], suffix)
+
+    def public_suffix(self, name: str, include_private: bool = True) -> str:
+        return self.split(name, include_private).suffix
+
+    def registered_domain(self, name: str, include_private: bool = True) -> str:
+        return self.split(name, include_private).registered_domain
+
+
+def _rule_forms(rule: str) -> List[List[str]]:
+    """The rule's labels, plus their punycode form for internationalized rules."""
+    forms = [rule.split('.')]
+    if not rule.isascii():
+        try:
+            forms.append([label if label == '*' else label.encode('idna').decode('ascii') for label in forms[0]])
+        except UnicodeError:
+            pass
+    return forms
+
+
+@lru_cache(maxsize=4)
+def load_public_suffixes(path=PUBLIC_SUFFIX_FILE) -> PublicSuffixTrie:
+    """The bundled PSL snapshot, compiled once per process."""
+    return PublicSuffixTrie.from_file(path)